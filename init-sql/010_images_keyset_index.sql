@@ -0,0 +1,7 @@
+-- Keyset pagination for /api/files?after=<cursor>.
+-- Backs the (upload_time, id) < (%s, %s) seek and ORDER BY upload_time DESC, id DESC
+-- in PostgresImageRepository.list_all, so deep pages no longer scan skipped rows.
+--
+-- Runs after the base schema on a fresh database (docker-entrypoint-initdb.d);
+-- apply to an existing one with: psql -U admin -d upload_images_db -f 010_images_keyset_index.sql
+CREATE INDEX IF NOT EXISTS idx_images_upload_time_id ON images (upload_time DESC, id DESC);
@@ -0,0 +1,55 @@
+-- Trigger-maintained row count for IMAGE_COUNT_MODE=counter.
+-- count() then reads one row from image_counts instead of running COUNT(*) over images.
+-- Statement-level triggers with transition tables add one UPDATE per statement,
+-- not per row, so batch inserts/deletes stay cheap.
+--
+-- Runs after the base schema on a fresh database (docker-entrypoint-initdb.d);
+-- apply to an existing one with: psql -U admin -d upload_images_db -f 020_images_count_trigger.sql
+CREATE TABLE IF NOT EXISTS image_counts (
+    table_name text PRIMARY KEY,
+    row_count bigint NOT NULL
+);
+
+INSERT INTO image_counts (table_name, row_count)
+SELECT 'images', COUNT(*) FROM images
+ON CONFLICT (table_name) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION images_count_insert() RETURNS trigger AS $$
+BEGIN
+    UPDATE image_counts SET row_count = row_count + (SELECT COUNT(*) FROM new_rows)
+    WHERE table_name = 'images';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION images_count_delete() RETURNS trigger AS $$
+BEGIN
+    UPDATE image_counts SET row_count = row_count - (SELECT COUNT(*) FROM old_rows)
+    WHERE table_name = 'images';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION images_count_truncate() RETURNS trigger AS $$
+BEGIN
+    UPDATE image_counts SET row_count = 0 WHERE table_name = 'images';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS images_count_insert ON images;
+CREATE TRIGGER images_count_insert
+    AFTER INSERT ON images
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION images_count_insert();
+
+DROP TRIGGER IF EXISTS images_count_delete ON images;
+CREATE TRIGGER images_count_delete
+    AFTER DELETE ON images
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION images_count_delete();
+
+DROP TRIGGER IF EXISTS images_count_truncate ON images;
+CREATE TRIGGER images_count_truncate
+    AFTER TRUNCATE ON images
+    FOR EACH STATEMENT EXECUTE FUNCTION images_count_truncate();
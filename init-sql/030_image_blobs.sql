@@ -0,0 +1,18 @@
+-- Content-addressed storage of uploaded files.
+-- Uploads with the same SHA-256 share one blob (IMAGE_DIR/.blobs/<hash>); every images row
+-- keeps its own filename (a hard link to the blob) and points at the blob by content_hash.
+-- ref_count is maintained by PostgresImageRepository: create() takes a reference,
+-- deletes drop it, and the blob file is removed when the last one is gone.
+--
+-- Runs after the base schema on a fresh database (docker-entrypoint-initdb.d);
+-- apply to an existing one with: psql -U admin -d upload_images_db -f 030_image_blobs.sql
+CREATE TABLE IF NOT EXISTS image_blobs (
+    content_hash char(64) PRIMARY KEY,
+    size bigint NOT NULL,
+    ref_count integer NOT NULL DEFAULT 1,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- Rows uploaded before deduplication keep content_hash NULL and own their file
+ALTER TABLE images ADD COLUMN IF NOT EXISTS content_hash char(64);
+CREATE INDEX IF NOT EXISTS idx_images_content_hash ON images (content_hash);
@@ -0,0 +1,42 @@
+-- Soft deletes for images.
+-- DELETE requests only set deleted_at; the reaper (handlers.reaper) later removes the
+-- files, the rows and unreferenced blobs in batches, so a request never waits on disk I/O.
+-- Every read (lists, lookups, counts) skips rows with deleted_at set.
+--
+-- Runs after the base schema on a fresh database (docker-entrypoint-initdb.d);
+-- apply to an existing one with: psql -U admin -d upload_images_db -f 040_images_tombstones.sql
+ALTER TABLE images ADD COLUMN IF NOT EXISTS deleted_at timestamptz;
+
+-- Keyset pagination over live rows only (replaces idx_images_upload_time_id for list_all)
+CREATE INDEX IF NOT EXISTS idx_images_live_upload_time_id
+    ON images (upload_time DESC, id DESC) WHERE deleted_at IS NULL;
+
+-- Reaper batches: oldest tombstones first
+CREATE INDEX IF NOT EXISTS idx_images_deleted_at
+    ON images (deleted_at) WHERE deleted_at IS NOT NULL;
+
+-- image_counts (020) counts live rows: a tombstone decrements it, purging a tombstone doesn't.
+CREATE OR REPLACE FUNCTION images_count_delete() RETURNS trigger AS $$
+BEGIN
+    UPDATE image_counts SET row_count = row_count - (SELECT COUNT(*) FROM old_rows WHERE deleted_at IS NULL)
+    WHERE table_name = 'images';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION images_count_tombstone() RETURNS trigger AS $$
+BEGIN
+    UPDATE image_counts SET row_count = row_count - (
+        SELECT COUNT(*) FROM old_rows JOIN new_rows USING (id)
+        WHERE old_rows.deleted_at IS NULL AND new_rows.deleted_at IS NOT NULL
+    )
+    WHERE table_name = 'images';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS images_count_tombstone ON images;
+CREATE TRIGGER images_count_tombstone
+    AFTER UPDATE ON images
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION images_count_tombstone();
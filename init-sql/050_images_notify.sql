@@ -0,0 +1,25 @@
+-- Cache invalidation across worker processes.
+-- Every statement that inserts, updates (soft-deletes) or purges images sends an empty
+-- NOTIFY on the images_changed channel. With IMAGE_CACHE_NOTIFY workers LISTEN on it
+-- (db.cached) and drop all their cached list pages, so the payload carries nothing.
+-- Notifications are delivered on commit only, and identical ones within a transaction
+-- are folded into one.
+--
+-- Runs after the base schema on a fresh database (docker-entrypoint-initdb.d);
+-- apply to an existing one with: psql -U admin -d upload_images_db -f 050_images_notify.sql
+CREATE OR REPLACE FUNCTION images_notify_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('images_changed', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Попередня версія мала окремий тригер на кожну подію (transition tables)
+DROP TRIGGER IF EXISTS images_notify_insert ON images;
+DROP TRIGGER IF EXISTS images_notify_update ON images;
+DROP TRIGGER IF EXISTS images_notify_delete ON images;
+
+DROP TRIGGER IF EXISTS images_notify ON images;
+CREATE TRIGGER images_notify
+    AFTER INSERT OR UPDATE OR DELETE ON images
+    FOR EACH STATEMENT EXECUTE FUNCTION images_notify_changed();
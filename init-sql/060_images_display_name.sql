@@ -0,0 +1,24 @@
+-- Gallery display names stored with the image.
+-- The server computes display_name once at upload (db.dto.get_display_name: the original
+-- name without its last "_suffix") instead of on every /api/files request. Existing rows
+-- are backfilled here with the same rule; rows still NULL fall back to the Python rule.
+--
+-- Runs after the base schema on a fresh database (docker-entrypoint-initdb.d);
+-- apply to an existing one with: psql -U admin -d upload_images_db -f 060_images_display_name.sql
+ALTER TABLE images ADD COLUMN IF NOT EXISTS display_name text;
+
+-- Розширення як у os.path.splitext: від останньої крапки, крім крапок на початку імені
+WITH names AS (
+    SELECT id, original_name,
+           coalesce(substring(original_name from '^\.*[^.].*(\.[^.]*)$'), '') AS ext
+    FROM images
+    WHERE display_name IS NULL
+)
+UPDATE images
+SET display_name = CASE
+        WHEN position('_' in left(names.original_name, length(names.original_name) - length(names.ext))) > 0
+            THEN regexp_replace(names.original_name, '_[^_]*$', '') || names.ext
+        ELSE names.original_name
+    END
+FROM names
+WHERE images.id = names.id;
@@ -0,0 +1,14 @@
+-- Image dimensions and MIME type stored with the image.
+-- The server reads them from the image header while the upload streams in
+-- (handlers.image_probe: no pixel decoding), so the gallery can lay pages out
+-- from /api/files alone. width/height are as displayed, i.e. after the EXIF orientation.
+-- Rows uploaded before this migration keep NULLs: the values need the files, not SQL.
+--
+-- Runs after the base schema on a fresh database (docker-entrypoint-initdb.d);
+-- apply to an existing one with: psql -U admin -d upload_images_db -f 070_images_dimensions.sql
+ALTER TABLE images ADD COLUMN IF NOT EXISTS width integer;
+ALTER TABLE images ADD COLUMN IF NOT EXISTS height integer;
+ALTER TABLE images ADD COLUMN IF NOT EXISTS mime_type text;
+
+ALTER TABLE images DROP CONSTRAINT IF EXISTS images_dimensions_positive;
+ALTER TABLE images ADD CONSTRAINT images_dimensions_positive CHECK (width > 0 AND height > 0);
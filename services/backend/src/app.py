@@ -1,95 +1,132 @@
 import json
-# Генерація випадкового UUID (v4)
-import uuid
-# це стандартний модуль Python, який надає високорівневі операції з файлами та директоріями
-import shutil
 from multiprocessing import Process, current_process
 from datetime import datetime, UTC, timezone
 from typing import cast, Any
 from http.server import HTTPServer, BaseHTTPRequestHandler
 
-# Python-бібліотека для обробки multipart/form-data
-from python_multipart import parse_form
-from exceptions.api_errors import NotSupportedFormatError, MaxSizeExceedError
-from interfaces.protocols import SupportsWrite
 import os
-import re
-import unicodedata
 import urllib
+from cache.file_cache import get_file_cache
 from db.dependencies import get_image_repository
 from db.dto import ImageDTO
+from db.session import get_pool_stats
 from exceptions.api_errors import APIError
 from exceptions.repository_errors import RepositoryError
 from interfaces.protocols import RequestHandlerFactory
+from interfaces.pagination import PaginationError
+from metrics.profiling import (
+    PROFILER_PATHS,
+    TOKEN_HEADER as PROFILER_TOKEN_HEADER,
+    control_sampling_profiler,
+    install_signal_handler as install_profiling_signal_handler
+)
+from metrics.prometheus import CONTENT_TYPE as METRICS_CONTENT_TYPE, render_metrics, reset_metrics_dir
+from metrics.registry import count_upload_bytes, get_metrics_registry, timed
+from mixins.pagination import PaginationMixin
 from settings.config import config
 from settings.logging_config import get_logger
-from mixins.http import HeadersMixin, JsonResponseMixin, LoggingMixin
-
-
-def sanitize_filename(name: str) -> str:
-    # Перетворюємо кирилицю та інші символи у латиницю (якщо можливо)
-    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
-    # Замінюємо все, що не букви/цифри/дефіс/підкреслення, на "_"
-    name = re.sub(r'[^a-zA-Z0-9_-]', '_', name)
-    return name
+from handlers.batch import (
+    batch_image_dtos,
+    batch_response,
+    check_delete_body_length,
+    discard_saved,
+    finish_batch_delete,
+    parse_delete_request,
+    save_uploaded_batch
+)
+from handlers.precompress import precompress_on_startup
+from handlers.reaper import start_reaper
+from handlers.responses import files_page_response
+from handlers.static import (
+    IMAGE_CONTENT_TYPES,
+    STATIC_CONTENT_TYPES,
+    frontend_path,
+    get_content_type,
+    media_path,
+    page_path
+)
+from handlers.upload import parse_content_length, save_uploaded_stream
+from handlers.variants import get_variant_service, parse_variant_params, warm_uploaded
+from mixins.http import FileResponseMixin, HeadersMixin, JsonResponseMixin, LoggingMixin
+from server.async_engine import run_async_server
+from server.http_servers import create_server
 
 
 logger = get_logger(__name__)
 
 
-class UploadHandler(BaseHTTPRequestHandler, HeadersMixin, JsonResponseMixin, LoggingMixin):
+class UploadHandler(LoggingMixin, BaseHTTPRequestHandler, HeadersMixin, JsonResponseMixin, FileResponseMixin,
+                    PaginationMixin):
 
     def do_DELETE(self):
+        if self.path == '/api/files':
+            self.handle_batch_delete()
+            return
+
         if self.path.startswith('/api/delete/'):
             filename = self.path.removeprefix('/api/delete/')
-            file_path = os.path.join(config.IMAGE_DIR, filename)
-
             repository = get_image_repository()
 
-            # Перевірка: чи є запис у БД
+            # Лише позначка deleted_at: файл, рядок і blob прибирає reaper у фоні
             try:
-                image = repository.get_by_filename(filename)
-                if not image:
-                    logger.warning(f"✖ No DB record found for: {filename}")
-                    self.send_json_error(404, "File record not found in DB")
-                    return
+                deleted = repository.delete_by_filename(filename)
             except RepositoryError as e:
-                logger.error(f"✖ DB error while fetching record: {e.message}")
+                logger.error("✖ Failed to delete DB record: %s", e.message)
                 self.send_json_error(e.status_code, e.message)
                 return
 
-            # Видалення файлу з диску
-            if os.path.isfile(file_path):
-                try:
-                    os.remove(file_path)
-                    logger.info(f"✓ Deleted file from disk: {filename}")
-                except Exception as e:
-                    logger.error(f"✖ Failed to delete file: {e}")
-                    self.send_json_error(500, "Failed to delete file from disk")
-                    return
-            else:
-                logger.warning(f"✖ File not found on disk: {filename}")
-                # навіть якщо файлу немає, все одно видаляємо запис у БД
-
-            # Видалення запису з БД
-            try:
-                repository.delete_by_filename(filename)
-                logger.info(f"✓ Deleted DB record for: {filename}")
-            except RepositoryError as e:
-                logger.error(f"✖ Failed to delete DB record: {e.message}")
-                self.send_json_error(e.status_code, e.message)
+            if not deleted:
+                logger.warning("✖ No DB record found for: %s", filename)
+                self.send_json_error(404, "File record not found in DB")
                 return
+            logger.info("✓ Marked as deleted: %s", filename)
 
             # Успішна відповідь
             self.set_headers(200, {"Content-Type": "application/json"})
             self.wfile.write(json.dumps({"detail": "File and DB record deleted"}).encode())
         else:
-            logger.warning(f"✖ Unsupported DELETE path: {self.path}")
+            logger.warning("✖ Unsupported DELETE path: %s", self.path)
             self.send_json_error(404, "Not Found")
 
+    def handle_batch_delete(self):
+        """DELETE /api/files — soft-delete many images by filenames or upload time in one statement."""
+        try:
+            content_length = parse_content_length(self.headers.get("Content-Length"))
+            check_delete_body_length(content_length)
+            filenames, older_than = parse_delete_request(self.rfile.read(content_length))
+        except APIError as e:
+            logger.warning("✖ Invalid bulk delete request: %s", e.message)
+            self.close_connection = True
+            self.send_json_error(e.status_code, e.message)
+            return
+
+        repository = get_image_repository()
+        try:
+            deleted = repository.delete_many(filenames=filenames, older_than=older_than)
+        except RepositoryError as e:
+            logger.error("✖ Failed to delete DB records: %s", e.message)
+            self.send_json_error(e.status_code, e.message)
+            return
+
+        response = finish_batch_delete(filenames, deleted)
+        logger.info("✓ Bulk delete: %s deleted, %s failed", response['deleted'], response['failed'])
+        self.set_headers(200, {"Content-Type": "application/json"})
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8"))
+
     def do_POST(self):
         logger.info("POST request received: %s", self.path)
 
+        if self.path == '/api/upload/batch':
+            self.handle_batch_upload()
+            return
+
+        if self.path in PROFILER_PATHS:
+            # Семплер стеків лише того воркера, що прийняв запит
+            status, payload = control_sampling_profiler(self.path, self.headers.get(PROFILER_TOKEN_HEADER))
+            self.set_headers(status, {"Content-Type": "application/json"})
+            self.wfile.write(json.dumps(payload).encode())
+            return
+
         if self.path != '/upload/':
             logger.warning("Invalid POST path: %s", self.path)
             self.send_json_error(404, 'Not Found')
@@ -101,65 +138,18 @@ class UploadHandler(BaseHTTPRequestHandler, HeadersMixin, JsonResponseMixin, Log
             self.send_json_error(400, "Bad Request: Expected multipart/form-data.")
             return
 
-        content_length = int(self.headers.get("Content-Length", 0))
-        logger.info("Content-Length: %d", content_length)
-
-        headers = {
-            'Content-Type': content_type,
-            "Content-Length": str(content_length)
-        }
-
-        saved_file_info = {}
-
-        def on_file(file: Any):
-            logger.info("→ on_file called with: %s", file.file_name)
-
-            filename = file.file_name.decode('utf-8') if file.file_name else "uploaded_file"
-            ext = os.path.splitext(filename)[1].lower()
-
-            if ext not in config.SUPPORTED_FORMATS:
-                logger.warning("Unsupported format: %s", ext)
-                raise NotSupportedFormatError(config.SUPPORTED_FORMATS)
-
-            file.file_object.seek(0, os.SEEK_END)
-            size = file.file_object.tell()
-            file.file_object.seek(0)
-
-            logger.info("File size: %d bytes", size)
-
-            if size > config.MAX_FILE_SIZE:
-                logger.warning("File too large: %d bytes", size)
-                raise MaxSizeExceedError(config.MAX_FILE_SIZE)
-
-            original_name = os.path.splitext(filename)[0].lower()
-            safe_name = sanitize_filename(original_name)
-            unique_name = f'{safe_name}_{uuid.uuid4()}{ext}'
-            os.makedirs(config.IMAGE_DIR, exist_ok=True)
-
-            file_path = os.path.join(config.IMAGE_DIR, unique_name)
-            logger.info("Saving file to: %s", os.path.abspath(file_path))
-
-            try:
-                with open(file_path, 'wb') as f:
-                    file.file_object.seek(0)
-                    shutil.copyfileobj(file.file_object, cast(SupportsWrite, f))
-            except Exception as e:
-                logger.error("Failed to save file: %s", e)
-                raise APIError(500, "Internal Server Error")
-
-            saved_file_info['filename'] = unique_name
-            saved_file_info['url'] = f'/images/{unique_name}'
-            saved_file_info['size'] = size
-            saved_file_info['original_name'] = filename
-            saved_file_info['file_type'] = ext
-            logger.info("File saved successfully: %s", unique_name)
-
+        # Файл пишеться у IMAGE_DIR частинами прямо з rfile, без проміжної копії
         try:
-            parse_form(headers, self.rfile, lambda _: None, on_file)
+            content_length = parse_content_length(self.headers.get("Content-Length"))
+            logger.info("Content-Length: %s", content_length)
+            saved_file_info = save_uploaded_stream(self.rfile, content_type, content_length)
         except APIError as e:
             logger.error("APIError: %s", e.message)
+            # Тіло запиту могло залишитися непрочитаним — з'єднання не перевикористовується
+            self.close_connection = True
             self.send_json_error(e.status_code, e.message)
             return
+        count_upload_bytes('/upload/', content_length)
 
         # --- інтеграція з БД ---
         repository = get_image_repository()
@@ -167,13 +157,20 @@ class UploadHandler(BaseHTTPRequestHandler, HeadersMixin, JsonResponseMixin, Log
             filename=saved_file_info['filename'],
             original_name=saved_file_info['original_name'],
             size=saved_file_info['size'],
-            file_type=saved_file_info['file_type']
+            file_type=saved_file_info['file_type'],
+            content_hash=saved_file_info['content_hash'],
+            width=saved_file_info['width'],
+            height=saved_file_info['height'],
+            mime_type=saved_file_info['mime_type']
         )
 
         try:
-            repository.create(image_dto)
+            with timed('/upload/', 'db'):
+                repository.create(image_dto)
         except RepositoryError as e:
             logger.error("Failed to save image metadata to DB: %s", e.message)
+            # Файл уже збережено — без запису в БД він нікому не потрібен
+            discard_saved([saved_file_info])
             self.send_json_error(e.status_code, e.message)
             return
 
@@ -182,22 +179,79 @@ class UploadHandler(BaseHTTPRequestHandler, HeadersMixin, JsonResponseMixin, Log
         self.send_header("Content-Type", "application/json")
         self.end_headers()
         self.wfile.write(json.dumps(saved_file_info).encode())
+        # Мініатюри галереї (UPLOAD_PREGENERATE_VARIANTS) — у фоні, після відповіді
+        warm_uploaded([saved_file_info['filename']])
+
+    def handle_batch_upload(self):
+        """POST /api/upload/batch — many files per request, one create_many() transaction."""
+        content_type = self.headers.get('Content-Type', "")
+        if "multipart/form-data" not in content_type:
+            logger.warning("Invalid Content-Type: %s", content_type)
+            self.send_json_error(400, "Bad Request: Expected multipart/form-data.")
+            return
+
+        try:
+            content_length = parse_content_length(self.headers.get("Content-Length"))
+            results = save_uploaded_batch(self.rfile, content_type, content_length)
+        except APIError as e:
+            logger.error("APIError: %s", e.message)
+            self.close_connection = True
+            self.send_json_error(e.status_code, e.message)
+            return
+        count_upload_bytes('/api/upload/batch', content_length)
+
+        repository = get_image_repository()
+        try:
+            with timed('/api/upload/batch', 'db'):
+                created = repository.create_many(batch_image_dtos(results))
+        except RepositoryError as e:
+            logger.error("Failed to save batch metadata to DB: %s", e.message)
+            discard_saved(results)
+            self.send_json_error(e.status_code, e.message)
+            return
+
+        response = batch_response(results, created)
+        logger.info("Batch upload completed: %d saved, %d failed", response['uploaded'], response['failed'])
+        self.set_headers(200, {"Content-Type": "application/json"})
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8"))
+        warm_uploaded(result['filename'] for result in results if 'error' not in result)
 
     def do_GET(self):
-        html_path = os.path.join('/usr/src/frontend', 'index.html')
+        html_path = page_path('/')
         # html_path = os.path.join(BASE_DIR, 'services', 'frontend', 'index.html')
 
         if self.path == '/':
             try:
-                with open(html_path, 'rb') as f:
-                    self.set_headers(200, {"Content-Type": "text/html"})
-                    self.wfile.write(f.read())
-                    logger.info("→ Served index.html")
+                self.send_static_file(html_path, "text/html")
+                logger.info("→ Served index.html")
             except FileNotFoundError:
                 logger.error("✖ index.html not found")
                 self.send_json_error(404, "index.html not found")
             return
 
+        if self.path == '/api/cache/stats':
+            # Лічильники кешу конкретного воркера (для підбору FILE_CACHE_MAX_BYTES)
+            self.set_headers(200, {"Content-Type": "application/json"})
+            self.wfile.write(json.dumps({
+                "pid": os.getpid(),
+                "file_cache": get_file_cache().stats(),
+                "variants": get_variant_service().stats()
+            }).encode())
+            return
+
+        if self.path == '/api/db/stats':
+            # Стан пулу з'єднань воркера: зайняті/вільні, черга, гістограма очікування
+            self.set_headers(200, {"Content-Type": "application/json"})
+            self.wfile.write(json.dumps(get_pool_stats()).encode())
+            return
+
+        if self.path == '/metrics':
+            # Сума по всіх воркерах: знімки з METRICS_DIR плюс поточні числа цього процесу
+            body = render_metrics(get_metrics_registry())
+            self.set_headers(200, {"Content-Type": METRICS_CONTENT_TYPE, "Content-Length": str(len(body))})
+            self.wfile.write(body)
+            return
+
         if self.path.startswith('/api/files'):
             try:
                 parsed_url = urllib.parse.urlparse(self.path)
@@ -205,102 +259,80 @@ class UploadHandler(BaseHTTPRequestHandler, HeadersMixin, JsonResponseMixin, Log
 
                 limit = int(query_params.get("limit", [10])[0])
                 offset = int(query_params.get("offset", [0])[0])
+                # Keyset-пагінація: ?after=<cursor> замість OFFSET
+                after = self.parse_cursor({key: values[0] for key, values in query_params.items()})
 
                 repository = get_image_repository()
-                files = repository.list_all(limit=limit, offset=offset)
-                total_count = repository.count()
-
-                result = {
-                    "items": [
-                        {
-                            "filename": img.filename,
-                            "display_name": (
-                                "_".join(img.original_name.split("_")[:-1]) + os.path.splitext(img.original_name)[1]
-                                if "_" in os.path.splitext(img.original_name)[0]
-                                else img.original_name
-                            )
-                        }
-                        for img in files
-                    ],
-                    "totalCount": total_count
-                }
-
-                self.set_headers(200, {"Content-Type": "application/json"})
-                self.wfile.write(json.dumps(result, ensure_ascii=False).encode("utf-8"))
-                logger.info(f"→ Served files list (limit={limit}, offset={offset}, total={total_count})")
-
+                with timed('/api/files', 'db'):
+                    files, total_count = repository.list_page(limit=limit, offset=offset, after=after)
+
+                with timed('/api/files', 'serialize'):
+                    status, headers, body = files_page_response(
+                        files, total_count, self.get_next_cursor(files, limit), self.headers.get('If-None-Match')
+                    )
+                self.set_headers(status, {**headers, "Content-Length": str(len(body))})
+                self.wfile.write(body)
+                logger.info("→ Served files list (limit=%s, offset=%s, total=%s)", limit, offset, total_count)
+
+            except PaginationError as e:
+                logger.warning("✖ Invalid pagination parameters: %s", e)
+                self.send_json_error(400, str(e))
             except Exception as e:
-                logger.error(f"✖ Failed to get files: {e}")
+                logger.error("✖ Failed to get files: %s", e)
                 self.send_json_error(500, "Failed to get files")
             return
 
         if self.path.startswith('/media/'):
-            image_name = self.path.removeprefix('/media/')
-            image_path = os.path.join(config.IMAGE_DIR, image_name)
+            parsed_url = urllib.parse.urlsplit(self.path)
+            image_name = parsed_url.path.removeprefix('/media/')
+            image_path = media_path(image_name)
 
             if os.path.isfile(image_path):
-                ext = os.path.splitext(image_path)[1].lower()
-                content_types = {
-                    '.png': 'image/png',
-                    '.jpg': 'image/jpeg',
-                    '.jpeg': 'image/jpeg',
-                    '.gif': 'image/gif',
-                    '.webp': 'image/webp'
-                }
-                content_type = content_types.get(ext, 'application/octet-stream')
                 try:
-                    with open(image_path, 'rb') as f:
-                        self.set_headers(200, {"Content-Type": content_type})
-                        self.wfile.write(f.read())
-                        logger.info(f"→ Served image: {image_name}")
+                    # ?w=&h=&fmt= — зменшений варіант замість оригіналу
+                    spec = parse_variant_params(parsed_url.query)
+                    if spec is not None:
+                        image_path = get_variant_service().get_variant(image_path, spec)
+                    content_type = get_content_type(image_path, IMAGE_CONTENT_TYPES)
+                    self.send_file(image_path, content_type)
+                    logger.info("→ Served image: %s", image_name)
+                except APIError as e:
+                    logger.warning("✖ Failed to serve image variant: %s", e)
+                    self.send_json_error(e.status_code, str(e))
                 except Exception as e:
-                    logger.error(f"✖ Failed to serve image: {e}")
+                    logger.error("✖ Failed to serve image: %s", e)
                     self.send_json_error(500, "Failed to serve image.")
             else:
-                logger.warning(f"✖ Image not found: {image_path}")
+                logger.warning("✖ Image not found: %s", image_path)
                 self.send_json_error(404, "Image not found.")
             return
 
         if self.path.startswith('/frontend/'):
-            static_path = os.path.join('/usr/src/frontend', self.path.removeprefix('/frontend/'))
+            static_path = frontend_path(self.path.removeprefix('/frontend/'))
 
             # static_path = os.path.join(BASE_DIR, 'services', self.path.lstrip('/'))
             if os.path.isfile(static_path):
-                ext = os.path.splitext(static_path)[1].lower()
-                content_types = {
-                    '.css': 'text/css',
-                    '.js': 'application/javascript',
-                    '.png': 'image/png',
-                    '.jpg': 'image/jpeg',
-                    '.jpeg': 'image/jpeg',
-                    '.svg': 'image/svg+xml',
-                    '.gif': 'image/gif'
-                }
-                content_type = content_types.get(ext, 'application/octet-stream')
+                content_type = get_content_type(static_path, STATIC_CONTENT_TYPES)
                 try:
-                    with open(static_path, 'rb') as f:
-                        self.set_headers(200, {"Content-Type": content_type})
-                        self.wfile.write(f.read())
-                        # Не логувати успішні static-файли
+                    self.send_static_file(static_path, content_type)
+                    # Не логувати успішні static-файли
                 except Exception as e:
-                    logger.error(f"✖ Failed to serve static file: {e}")
+                    logger.error("✖ Failed to serve static file: %s", e)
                     self.send_json_error(500, "Failed to serve static file.")
             else:
-                logger.warning(f"✖ Static file not found: {self.path}")
+                logger.warning("✖ Static file not found: %s", self.path)
                 self.send_json_error(404, "Static file not found.")
             return
 
         if self.path == '/images/':
             # images_path = os.path.join(BASE_DIR, 'services', 'frontend', 'images.html')
-            images_path = os.path.join('/usr/src/frontend', 'images.html')
+            images_path = page_path('/images/')
             if os.path.isfile(images_path):
                 try:
-                    with open(images_path, 'rb') as f:
-                        self.set_headers(200, {"Content-Type": "text/html"})
-                        self.wfile.write(f.read())
-                        logger.info("→ Served images.html")
+                    self.send_static_file(images_path, "text/html")
+                    logger.info("→ Served images.html")
                 except Exception as e:
-                    logger.error(f"✖ Failed to serve images.html: {e}")
+                    logger.error("✖ Failed to serve images.html: %s", e)
                     self.send_json_error(500, "Failed to serve images.html")
             else:
                 logger.warning("✖ images.html not found")
@@ -309,22 +341,20 @@ class UploadHandler(BaseHTTPRequestHandler, HeadersMixin, JsonResponseMixin, Log
 
         if self.path == '/upload/':
             # upload_path = os.path.join(BASE_DIR, 'services', 'frontend', 'upload.html')
-            upload_path = os.path.join('/usr/src/frontend', 'upload.html')
+            upload_path = page_path('/upload/')
             if os.path.isfile(upload_path):
                 try:
-                    with open(upload_path, 'rb') as f:
-                        self.set_headers(200, {"Content-Type": "text/html"})
-                        self.wfile.write(f.read())
-                        logger.info("→ Served upload.html")
+                    self.send_static_file(upload_path, "text/html")
+                    logger.info("→ Served upload.html")
                 except Exception as e:
-                    logger.error(f"✖ Failed to serve upload.html: {e}")
+                    logger.error("✖ Failed to serve upload.html: %s", e)
                     self.send_json_error(500, "Failed to serve upload.html")
             else:
                 logger.warning("✖ upload.html not found")
                 self.send_json_error(404, "upload.html not found")
             return
 
-        logger.warning(f"✖ Unknown GET path: {self.path}")
+        logger.warning("✖ Unknown GET path: %s", self.path)
         self.send_json_error(404, "Not Found")
 
 
@@ -342,35 +372,66 @@ class UploadHandler(BaseHTTPRequestHandler, HeadersMixin, JsonResponseMixin, Log
 def run_server_on_port(port: int):
     """Starts a single HTTP server instance on the specified port.
 
+    The engine is chosen by ``config.SERVER_ENGINE``: ``asyncio`` runs ``server.async_engine``,
+    ``http`` builds the server class for ``config.SERVER_MODE`` (see ``server.http_servers``).
+
     Args:
         port (int): The port number to bind the HTTP server to.
 
     Side effects:
         - Starts blocking HTTP server loop.
+        - Toggles the sampling profiler on SIGUSR2 if PROFILING_ENABLED is set.
         - Logs process and port information.
     """
     current_process().name = f"worker-{port}"
-    logger.info(f"Starting server on http://0.0.0.0:{port}")
-    server = HTTPServer(("0.0.0.0", port), cast(RequestHandlerFactory, UploadHandler))
+    install_profiling_signal_handler()
+
+    if config.SERVER_ENGINE == "asyncio":
+        logger.info("Starting asyncio server on http://0.0.0.0:%s", port)
+        run_async_server(port, reuse_port=config.SERVER_MODE == "prefork")
+        return
+
+    logger.info("Starting %s server on http://0.0.0.0:%s", config.SERVER_MODE, port)
+    server = create_server(
+        ("0.0.0.0", port),
+        UploadHandler,
+        mode=config.SERVER_MODE,
+        max_threads=config.SERVER_THREADS,
+        request_queue_size=config.SERVER_REQUEST_QUEUE_SIZE
+    )
     server.serve_forever()
 
 
 def run(workers: int = 1, start_port: int = 8000):
     """Starts multiple server worker processes for concurrent handling.
 
+    In ``prefork`` mode every worker shares ``start_port`` through ``SO_REUSEPORT``;
+    in the other modes each worker listens on its own port.
+
     Args:
         workers (int): Number of worker processes to spawn.
         start_port (int): Starting port number for workers.
 
     Side effects:
-        - Launches `workers` processes each listening on a unique port.
+        - Precompresses frontend assets if STATIC_PRECOMPRESS_ON_STARTUP is set.
+        - Starts the reaper process if REAPER_ENABLED is set.
+        - Launches `workers` server processes.
         - Logs worker startup.
     """
+    if config.STATIC_PRECOMPRESS_ON_STARTUP:
+        precompress_on_startup()
+
+    if config.REAPER_ENABLED:
+        start_reaper()
+
+    if config.METRICS_ENABLED:
+        reset_metrics_dir()
+
     for i in range(workers):
-        port = start_port + i
+        port = start_port if config.SERVER_MODE == "prefork" else start_port + i
         p = Process(target=run_server_on_port, args=(port,))
         p.start()
-        logger.info(f"Worker {i + 1} started on port {port}")
+        logger.info("Worker %s started on port %s", i + 1, port)
 
 if __name__ == '__main__':
     # run()
@@ -0,0 +1,174 @@
+"""In-memory stand-ins used by the benchmarks.
+
+The fakes implement the same interfaces as the production classes so the
+server can be benchmarked without a running PostgreSQL instance.
+"""
+
+import threading
+from datetime import datetime, UTC
+from typing import Any, Iterator, List, Optional, Sequence, Set, Tuple
+
+from db.dto import ImageDTO, ImageDetailsDTO
+from dto.pagination import CursorDTO
+from interfaces.repositories import AsyncImageRepository, ImageRepository
+
+
+class InMemoryImageRepository(ImageRepository):
+    """Thread-safe in-memory implementation of the ImageRepository interface."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._images: dict[int, ImageDetailsDTO] = {}
+        self._deleted: dict[int, ImageDetailsDTO] = {}
+        self._blob_refs: dict[str, int] = {}
+        self._next_id = 1
+
+    def create(self, image: ImageDTO) -> ImageDetailsDTO:
+        with self._lock:
+            details = ImageDetailsDTO(
+                id=self._next_id,
+                filename=image.filename,
+                original_name=image.original_name,
+                size=image.size,
+                file_type=image.file_type,
+                content_hash=image.content_hash,
+                display_name=image.display_name,
+                width=image.width,
+                height=image.height,
+                mime_type=image.mime_type,
+                upload_time=datetime.now(UTC).isoformat()
+            )
+            self._images[details.id] = details
+            if image.content_hash is not None:
+                self._blob_refs[image.content_hash] = self._blob_refs.get(image.content_hash, 0) + 1
+            self._next_id += 1
+            return details
+
+    def create_many(self, images: List[ImageDTO]) -> List[ImageDetailsDTO]:
+        with self._lock:
+            return [self.create(image) for image in images]
+
+    def get_by_id(self, image_id: int) -> Optional[ImageDetailsDTO]:
+        with self._lock:
+            return self._images.get(image_id)
+
+    def get_by_filename(self, filename: str) -> Optional[ImageDetailsDTO]:
+        with self._lock:
+            return next((img for img in self._images.values() if img.filename == filename), None)
+
+    def delete(self, image_id: int) -> bool:
+        with self._lock:
+            image = self._images.pop(image_id, None)
+            if image is not None:
+                self._deleted[image_id] = image
+            return image is not None
+
+    def delete_by_filename(self, filename: str) -> bool:
+        with self._lock:
+            image = self.get_by_filename(filename)
+            return image is not None and self.delete(image.id)
+
+    def delete_many(self, filenames: Optional[List[str]] = None,
+                    older_than: Optional[datetime] = None) -> List[str]:
+        if filenames is None and older_than is None:
+            raise ValueError("delete_many() needs filenames or older_than")
+        with self._lock:
+            matched = [
+                img for img in self._images.values()
+                if (filenames is None or img.filename in filenames)
+                and (older_than is None or datetime.fromisoformat(img.upload_time) < older_than)
+            ]
+            for img in matched:
+                self.delete(img.id)
+            return [img.filename for img in matched]
+
+    def purge_deleted(self, limit: int = 500) -> List[Tuple[str, Optional[str]]]:
+        with self._lock:
+            purged = [self._deleted.pop(image_id) for image_id in list(self._deleted)[:limit]]
+            orphans = {self._release(img) for img in purged}
+            # Як у Postgres: хеш звільненого blob повторюється для всіх його рядків
+            return [(img.filename, img.content_hash if img.content_hash in orphans else None) for img in purged]
+
+    def iter_filenames(self, batch_size: int = 1000) -> Iterator[str]:
+        with self._lock:
+            filenames = [img.filename for img in self._images.values()]
+        return iter(filenames)
+
+    def existing_filenames(self, filenames: List[str]) -> Set[str]:
+        with self._lock:
+            known = {img.filename for img in self._images.values()} | {img.filename for img in self._deleted.values()}
+        return known.intersection(filenames)
+
+    def existing_blobs(self, content_hashes: List[str]) -> Set[str]:
+        with self._lock:
+            return set(self._blob_refs).intersection(content_hashes)
+
+    def _release(self, image: ImageDetailsDTO) -> Optional[str]:
+        if image.content_hash is None:
+            return None
+        self._blob_refs[image.content_hash] -= 1
+        if self._blob_refs[image.content_hash] > 0:
+            return None
+        del self._blob_refs[image.content_hash]
+        return image.content_hash
+
+    def list_all(self, limit: int = 10, offset: int = 0, after: Optional[CursorDTO] = None,
+                 projection: Optional[Sequence[str]] = None) -> List[ImageDetailsDTO] | List[dict[str, Any]]:
+        with self._lock:
+            images = sorted(self._images.values(), key=lambda img: (img.upload_time, img.id), reverse=True)
+            if after is not None:
+                images = [img for img in images if (img.upload_time, img.id) < (after.upload_time, after.id)]
+                offset = 0
+            page = images[offset:offset + limit]
+            if projection is not None:
+                return [{column: getattr(img, column) for column in projection} for img in page]
+            return page
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._images)
+
+    def list_page(self, limit: int = 10, offset: int = 0,
+                  after: Optional[CursorDTO] = None) -> Tuple[List[ImageDetailsDTO], int]:
+        with self._lock:
+            return self.list_all(limit, offset, after), len(self._images)
+
+
+class InMemoryAsyncImageRepository(AsyncImageRepository):
+    """AsyncImageRepository adapter over an InMemoryImageRepository."""
+
+    def __init__(self, repository: InMemoryImageRepository = None):
+        self._repository = repository or InMemoryImageRepository()
+
+    async def create(self, image: ImageDTO) -> ImageDetailsDTO:
+        return self._repository.create(image)
+
+    async def create_many(self, images: List[ImageDTO]) -> List[ImageDetailsDTO]:
+        return self._repository.create_many(images)
+
+    async def get_by_id(self, image_id: int) -> Optional[ImageDetailsDTO]:
+        return self._repository.get_by_id(image_id)
+
+    async def get_by_filename(self, filename: str) -> Optional[ImageDetailsDTO]:
+        return self._repository.get_by_filename(filename)
+
+    async def delete(self, image_id: int) -> bool:
+        return self._repository.delete(image_id)
+
+    async def delete_by_filename(self, filename: str) -> bool:
+        return self._repository.delete_by_filename(filename)
+
+    async def delete_many(self, filenames: Optional[List[str]] = None,
+                          older_than: Optional[datetime] = None) -> List[str]:
+        return self._repository.delete_many(filenames, older_than)
+
+    async def list_all(self, limit: int = 10, offset: int = 0, after: Optional[CursorDTO] = None,
+                       projection: Optional[Sequence[str]] = None) -> List[ImageDetailsDTO] | List[dict[str, Any]]:
+        return self._repository.list_all(limit, offset, after, projection)
+
+    async def count(self) -> int:
+        return self._repository.count()
+
+    async def list_page(self, limit: int = 10, offset: int = 0,
+                        after: Optional[CursorDTO] = None) -> Tuple[List[ImageDetailsDTO], int]:
+        return self._repository.list_page(limit, offset, after)
@@ -0,0 +1,346 @@
+"""Load test of the upload server with a realistic request mix.
+
+Starts the server (any engine and SERVER_MODE) against an in-memory
+repository, or against the configured PostgreSQL with ``--repository
+postgres``, seeds it with images and drives a weighted mix of:
+
+- ``upload``: ``POST /upload/`` of PNGs of several sizes;
+- ``list``: ``GET /api/files`` at several offsets;
+- ``media``: ``GET /media/<filename>`` of uploaded images;
+- ``delete``: ``DELETE /api/delete/<filename>`` of uploaded images.
+
+Reports requests/sec, p50/p95/p99 latency, errors and bytes/sec per kind and
+the resident memory of every worker (peak and at the end) as JSON. With the
+in-memory repository every worker keeps its own rows, so a delete may reach
+a worker that never saw the upload; 404s of deletes are reported as
+``not_found`` rather than as errors.
+
+``--save`` writes the report to a file; ``--baseline`` compares the run with
+a saved report and exits with status 1 when throughput dropped or p95
+latency grew by more than ``--threshold`` (a fraction) for any kind.
+
+Usage:
+    python -m benchmarks.load --engine asyncio --mode prefork --workers 4 --duration 20
+    python -m benchmarks.load --save baseline.json
+    python -m benchmarks.load --baseline baseline.json --threshold 0.15
+    python -m benchmarks.load --mix upload=1 list=8 media=8 delete=1
+
+Side effects:
+    - Starts and stops server worker processes on local ports.
+    - Writes uploaded images into a temporary directory.
+    - With ``--repository postgres``, inserts and soft-deletes rows in the configured database.
+"""
+
+import argparse
+import http.client
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import psutil
+
+import db.dependencies
+from benchmarks.fakes import InMemoryAsyncImageRepository, InMemoryImageRepository
+from benchmarks.server_modes import build_multipart, make_image, percentile, start_servers
+from server.http_servers import SERVER_MODES
+from settings.config import config
+
+UPLOAD_SIZES_KB = (8, 64, 512, 2048)
+LIST_OFFSETS = (0, 0, 0, 20, 100, 500)
+DEFAULT_MIX = {"upload": 15, "list": 45, "media": 35, "delete": 5}
+# Метрики, за якими шукаємо регресію: (ключ, чи "більше — краще")
+REGRESSION_KEYS = (("rps", True), ("p95_ms", False))
+
+
+@dataclass
+class Sample:
+    kind: str
+    latency: float
+    status: int
+    bytes_sent: int
+    bytes_received: int
+
+
+@dataclass
+class FilePool:
+    """Filenames of uploaded images that ``media`` and ``delete`` requests pick from."""
+    filenames: list[str] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add(self, filename: str) -> None:
+        with self.lock:
+            self.filenames.append(filename)
+
+    def pick(self, rnd: random.Random) -> Optional[str]:
+        with self.lock:
+            return rnd.choice(self.filenames) if self.filenames else None
+
+    def take(self, rnd: random.Random) -> Optional[str]:
+        with self.lock:
+            # Лишаємо кілька файлів, щоб запити media не залишились без цілей
+            if len(self.filenames) <= 10:
+                return None
+            index = rnd.randrange(len(self.filenames))
+            self.filenames[index], self.filenames[-1] = self.filenames[-1], self.filenames[index]
+            return self.filenames.pop()
+
+
+def parse_mix(items: Optional[list[str]]) -> dict[str, float]:
+    """Parse ``kind=weight`` pairs into a request mix (unlisted kinds get weight 0)."""
+    if not items:
+        return dict(DEFAULT_MIX)
+    mix = dict.fromkeys(DEFAULT_MIX, 0.0)
+    for item in items:
+        kind, _, weight = item.partition("=")
+        if kind not in mix:
+            raise argparse.ArgumentTypeError(f"Unknown request kind: {kind}")
+        mix[kind] = float(weight)
+    if sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("The request mix needs a positive weight")
+    return mix
+
+
+def send(conn: http.client.HTTPConnection, method: str, path: str, body: bytes = None,
+         headers: dict = None) -> tuple[int, bytes]:
+    """Send one request over a keep-alive connection and return (status, body)."""
+    conn.request(method, path, body=body, headers=headers or {})
+    response = conn.getresponse()
+    data = response.read()
+    if response.will_close:
+        conn.close()
+    return response.status, data
+
+
+def upload(conn: http.client.HTTPConnection, payload: bytes, files: FilePool) -> tuple[int, int, int]:
+    body, content_type = build_multipart("bench.png", payload)
+    status, data = send(conn, "POST", "/upload/", body, {"Content-Type": content_type})
+    if status == 200:
+        files.add(json.loads(data)["filename"])
+    return status, len(body), len(data)
+
+
+def seed(ports: list[int], count: int, payloads: list[bytes], files: FilePool) -> None:
+    """Upload ``count`` images (spread over ``ports``) so that media and delete requests have targets."""
+    for i in range(count):
+        conn = http.client.HTTPConnection("127.0.0.1", ports[i % len(ports)], timeout=30)
+        try:
+            upload(conn, payloads[i % len(payloads)], files)
+        finally:
+            conn.close()
+
+
+def run_load(ports: list[int], concurrency: int, duration: float, mix: dict[str, float],
+             payloads: list[bytes], files: FilePool) -> list[Sample]:
+    """Drive the request mix from ``concurrency`` client threads for ``duration`` seconds."""
+    kinds, weights = list(mix), list(mix.values())
+    samples: list[Sample] = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def request(conn: http.client.HTTPConnection, kind: str, rnd: random.Random) -> tuple[int, int, int]:
+        if kind == "upload":
+            return upload(conn, rnd.choice(payloads), files)
+        if kind == "list":
+            status, data = send(conn, "GET", f"/api/files?limit=20&offset={rnd.choice(LIST_OFFSETS)}")
+            return status, 0, len(data)
+        if kind == "media":
+            filename = files.pick(rnd)
+            status, data = send(conn, "GET", f"/media/{filename}")
+            return status, 0, len(data)
+        filename = files.take(rnd)
+        if filename is None:
+            return request(conn, "media", rnd)
+        status, data = send(conn, "DELETE", f"/api/delete/{filename}")
+        return status, 0, len(data)
+
+    def client(port: int):
+        rnd = random.Random()
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        local = []
+        while time.monotonic() < deadline:
+            kind = rnd.choices(kinds, weights)[0]
+            started = time.perf_counter()
+            try:
+                status, sent, received = request(conn, kind, rnd)
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                status, sent, received = 0, 0, 0
+            local.append(Sample(kind, time.perf_counter() - started, status, sent, received))
+        conn.close()
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=client, args=(ports[i % len(ports)],)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+class MemorySampler:
+    """Samples the resident memory of the worker processes (and their children) in a thread."""
+
+    def __init__(self, pids: list[int], interval: float = 0.5):
+        self._processes = {pid: psutil.Process(pid) for pid in pids}
+        self._interval = interval
+        self._peak: dict[int, int] = dict.fromkeys(pids, 0)
+        self._last: dict[int, int] = dict.fromkeys(pids, 0)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="memory-sampler", daemon=True)
+
+    def _rss(self, process: psutil.Process) -> int:
+        try:
+            members = [process, *process.children(recursive=True)]
+            return sum(member.memory_info().rss for member in members)
+        except psutil.NoSuchProcess:
+            return 0
+
+    def sample(self) -> None:
+        for pid, process in self._processes.items():
+            rss = self._rss(process)
+            self._last[pid] = rss
+            self._peak[pid] = max(self._peak[pid], rss)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            self.sample()
+
+    def __enter__(self) -> "MemorySampler":
+        self.sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+    def report(self) -> list[dict]:
+        mb = 1024 * 1024
+        return [{"pid": pid, "rss_peak_mb": round(self._peak[pid] / mb, 1), "rss_end_mb": round(self._last[pid] / mb, 1)}
+                for pid in self._processes]
+
+
+def summarize(samples: list[Sample], duration: float) -> dict:
+    """Aggregate samples into throughput, latency and transfer figures, overall and per kind."""
+
+    def stats(group: list[Sample]) -> dict:
+        latencies = [sample.latency for sample in group]
+        not_found = sum(1 for sample in group if sample.kind == "delete" and sample.status == 404)
+        return {
+            "requests": len(group),
+            "errors": sum(1 for sample in group if not 200 <= sample.status < 400) - not_found,
+            "not_found": not_found,
+            "rps": round(len(group) / duration, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "sent_bytes_per_sec": round(sum(sample.bytes_sent for sample in group) / duration),
+            "received_bytes_per_sec": round(sum(sample.bytes_received for sample in group) / duration),
+        }
+
+    result = {"all": stats(samples)}
+    for kind in DEFAULT_MIX:
+        group = [sample for sample in samples if sample.kind == kind]
+        if group:
+            result[kind] = stats(group)
+    return result
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list[str]:
+    """Return descriptions of every throughput or p95 regression beyond ``threshold`` against ``baseline``."""
+    regressions = []
+    for kind, current in report["requests"].items():
+        previous = baseline.get("requests", {}).get(kind)
+        if not previous:
+            continue
+        for key, higher_is_better in REGRESSION_KEYS:
+            before, after = previous[key], current[key]
+            if not before:
+                continue
+            change = (after - before) / before
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(f"{kind}.{key}: {before} -> {after} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the upload server with a mixed workload")
+    parser.add_argument("--engine", default="http", choices=("http", "asyncio"))
+    parser.add_argument("--mode", default="prefork", choices=SERVER_MODES)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--mix", nargs="+", metavar="KIND=WEIGHT",
+                        help=f"request mix, default {' '.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())}")
+    parser.add_argument("--seed-images", type=int, default=50)
+    parser.add_argument("--repository", default="memory", choices=("memory", "postgres"))
+    parser.add_argument("--port", type=int, default=18100)
+    parser.add_argument("--save", help="write the report to this file")
+    parser.add_argument("--baseline", help="compare with a report saved by --save")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed relative drop of rps / growth of p95 (default 0.10)")
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    config.SERVER_ENGINE = args.engine
+    config.IMAGE_DIR = tempfile.mkdtemp(prefix="bench-images-")
+    if args.repository == "memory":
+        # Процеси-воркери успадковують підмінений репозиторій через fork
+        shared = InMemoryImageRepository()
+        db.dependencies._image_repository = shared
+        db.dependencies._async_image_repository = InMemoryAsyncImageRepository(shared)
+    payloads = [make_image(size) for size in UPLOAD_SIZES_KB]
+
+    processes, ports = start_servers(args.mode, args.workers, args.port)
+    try:
+        files = FilePool()
+        seed(ports, args.seed_images, payloads, files)
+        with MemorySampler([process.pid for process in processes]) as memory:
+            samples = run_load(ports, args.concurrency, args.duration, mix, payloads, files)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+    report = {
+        "setup": {
+            "engine": args.engine,
+            "mode": args.mode,
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "repository": args.repository,
+            "mix": mix,
+        },
+        "requests": summarize(samples, args.duration),
+        "memory": memory.report(),
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        report["regressions"] = regressions
+
+    print(json.dumps(report, indent=2))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if regressions:
+        print(f"✖ {len(regressions)} regression(s) over {args.threshold:.0%}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
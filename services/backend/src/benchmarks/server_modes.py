@@ -0,0 +1,204 @@
+"""Benchmark of the SERVER_MODE options with mixed upload and list traffic.
+
+Starts the upload server (http or asyncio engine) in every requested mode against an in-memory
+repository, drives a mix of uploads (of several sizes) and ``/api/files``
+listings from a pool of client threads and prints requests/sec and latency
+percentiles per mode as JSON.
+
+Usage:
+    python -m benchmarks.server_modes --workers 2 --concurrency 32 --duration 10
+    python -m benchmarks.server_modes --engine asyncio --modes threaded prefork
+
+Side effects:
+    - Starts and stops server worker processes on local ports.
+    - Writes uploaded images into a temporary directory.
+"""
+
+import argparse
+import http.client
+import io
+import json
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from multiprocessing import Process
+
+from PIL import Image
+
+import app
+import db.dependencies
+from benchmarks.fakes import InMemoryAsyncImageRepository, InMemoryImageRepository
+from server.http_servers import SERVER_MODES
+from settings.config import config
+
+UPLOAD_SIZES_KB = (16, 256, 2048)
+
+
+def make_image(size_kb: int) -> bytes:
+    """Create a PNG of roughly ``size_kb`` kilobytes filled with noise."""
+    side = max(int((size_kb * 1024 / 3) ** 0.5), 1)
+    image = Image.frombytes("RGB", (side, side), os.urandom(side * side * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def build_multipart(filename: str, data: bytes) -> tuple[bytes, str]:
+    """Encode a single file as a multipart/form-data body."""
+    boundary = uuid.uuid4().hex
+    head = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f'Content-Type: application/octet-stream\r\n\r\n'
+    ).encode()
+    tail = f'\r\n--{boundary}--\r\n'.encode()
+    return head + data + tail, f'multipart/form-data; boundary={boundary}'
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Return the ``pct`` percentile (0-100) of ``values`` using nearest rank."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def wait_for_port(port: int, timeout: float = 10.0) -> None:
+    """Block until something accepts connections on ``port``."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"Server on port {port} did not start in {timeout} seconds")
+
+
+def start_servers(mode: str, workers: int, start_port: int) -> tuple[list[Process], list[int]]:
+    """Start worker processes for ``mode`` and return them with the ports to hit."""
+    config.SERVER_MODE = mode
+    ports = [start_port] if mode == "prefork" else [start_port + i for i in range(workers)]
+    processes = []
+    for i in range(workers):
+        port = start_port if mode == "prefork" else start_port + i
+        process = Process(target=app.run_server_on_port, args=(port,), daemon=True)
+        process.start()
+        processes.append(process)
+    for port in ports:
+        wait_for_port(port)
+    return processes, ports
+
+
+def send_request(port: int, method: str, path: str, body: bytes = None, headers: dict = None) -> int:
+    """Send one HTTP request and return the response status."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def run_load(ports: list[int], concurrency: int, duration: float, upload_ratio: float,
+             payloads: list[bytes]) -> list[tuple[str, float, int]]:
+    """Drive mixed traffic for ``duration`` seconds.
+
+    Returns:
+        list[tuple[str, float, int]]: (kind, latency in seconds, status) per request.
+    """
+    samples = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        rnd = random.Random()
+        local = []
+        while time.monotonic() < deadline:
+            port = rnd.choice(ports)
+            started = time.perf_counter()
+            if rnd.random() < upload_ratio:
+                kind = "upload"
+                body, content_type = build_multipart("bench.png", rnd.choice(payloads))
+                try:
+                    status = send_request(port, "POST", "/upload/", body, {"Content-Type": content_type})
+                except OSError:
+                    status = 0
+            else:
+                kind = "list"
+                try:
+                    status = send_request(port, "GET", "/api/files?limit=10&offset=0")
+                except OSError:
+                    status = 0
+            local.append((kind, time.perf_counter() - started, status))
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def summarize(samples: list[tuple[str, float, int]], duration: float) -> dict:
+    """Aggregate raw samples into throughput and latency figures."""
+
+    def stats(latencies: list[float]) -> dict:
+        return {
+            "requests": len(latencies),
+            "rps": round(len(latencies) / duration, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        }
+
+    result = stats([latency for _, latency, _ in samples])
+    result["errors"] = sum(1 for _, _, status in samples if status != 200)
+    for kind in ("upload", "list"):
+        result[kind] = stats([latency for k, latency, _ in samples if k == kind])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SERVER_MODE options")
+    parser.add_argument("--modes", nargs="+", default=list(SERVER_MODES), choices=SERVER_MODES)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--upload-ratio", type=float, default=0.2)
+    parser.add_argument("--port", type=int, default=18000)
+    parser.add_argument("--engine", default="http", choices=("http", "asyncio"))
+    args = parser.parse_args()
+
+    config.SERVER_ENGINE = args.engine
+
+    config.IMAGE_DIR = tempfile.mkdtemp(prefix="bench-images-")
+    # Процеси-воркери успадковують підмінений репозиторій через fork
+    db.dependencies._image_repository = InMemoryImageRepository()
+    db.dependencies._async_image_repository = InMemoryAsyncImageRepository()
+    payloads = [make_image(size) for size in UPLOAD_SIZES_KB]
+
+    results = {}
+    for mode in args.modes:
+        processes, ports = start_servers(mode, args.workers, args.port)
+        try:
+            samples = run_load(ports, args.concurrency, args.duration, args.upload_ratio, payloads)
+            results[mode] = summarize(samples, args.duration)
+        finally:
+            for process in processes:
+                process.terminate()
+                process.join()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""In-process LRU cache for small, frequently served files.
+
+Keeps the bytes of HTML pages, frontend assets and hot images in memory
+together with their precomputed response headers. Every lookup takes the
+file's current stat, so an entry is dropped as soon as the file's inode, mtime or size
+changes. The cache is bounded by a total byte budget (FILE_CACHE_MAX_BYTES);
+files larger than FILE_CACHE_MAX_ENTRY_BYTES are never cached and are
+streamed with sendfile instead.
+
+Each worker process has its own cache; stats() reports hit/miss/eviction
+counters so the budget can be sized per worker. Requests for files too large
+to cache are counted separately (``uncacheable``) and don't skew the hit ratio.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+from handlers.static import file_headers
+from settings.config import config
+
+
+@dataclass(frozen=True)
+class CachedFile:
+    """A cached file body with the stat it was read at and its response headers."""
+    body: bytes
+    stat: os.stat_result
+    headers: dict[str, str]
+
+    def matches(self, st: os.stat_result) -> bool:
+        return (self.stat.st_ino, self.stat.st_mtime_ns, self.stat.st_size) == \
+            (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class FileCache:
+    """Thread-safe, byte-bounded LRU cache of files keyed by path.
+
+    Attributes:
+        max_bytes (int): Total budget for cached bodies; 0 disables the cache.
+        max_entry_bytes (int): Largest file that will be cached.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: OrderedDict[str, CachedFile] = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.uncacheable = 0
+
+    def cacheable(self, st: os.stat_result) -> bool:
+        """Whether a file of this stat fits in the cache at all."""
+        return bool(self.max_bytes) and st.st_size <= min(self.max_entry_bytes, self.max_bytes)
+
+    def get(self, path: str, st: os.stat_result) -> Optional[CachedFile]:
+        """Return the cached entry for ``path`` if it is still fresh.
+
+        Files too large to cache are counted as ``uncacheable``, not as misses,
+        so the hit ratio reflects only what the budget could hold.
+
+        Args:
+            path (str): File path (the cache key).
+            st (os.stat_result): Current stat of the file.
+        """
+        if not self.cacheable(st):
+            if self.max_bytes:
+                with self._lock:
+                    self.uncacheable += 1
+            return None
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.matches(st):
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry
+
+            if entry is not None:
+                # Файл змінився на диску — запис застарів
+                self._remove(path)
+                self.invalidations += 1
+            self.misses += 1
+            return None
+
+    def load(self, path: str, f: BinaryIO, st: os.stat_result, content_type: str) -> Optional[CachedFile]:
+        """Read an opened file into the cache.
+
+        Args:
+            path (str): File path (the cache key).
+            f (BinaryIO): The file opened for reading, positioned at its start.
+            st (os.stat_result): fstat of ``f``.
+            content_type (str): Content-Type for the precomputed headers.
+
+        Returns:
+            Optional[CachedFile]: The new entry, or None if the file is too large
+            to cache (or changed while it was being read); the caller then sends
+            it from ``f``.
+        """
+        if not self.cacheable(st):
+            return None
+
+        body = f.read()
+        if len(body) != st.st_size:
+            return None
+
+        entry = CachedFile(body=body, stat=st, headers=file_headers(st, content_type))
+        with self._lock:
+            if path in self._entries:
+                self._remove(path)
+            self._entries[path] = entry
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                evicted_path, _ = next(iter(self._entries.items()))
+                self._remove(evicted_path)
+                self.evictions += 1
+        return entry
+
+    def _remove(self, path: str) -> None:
+        entry = self._entries.pop(path)
+        self._size -= len(entry.body)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss/eviction counters and current usage."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "uncacheable": self.uncacheable,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_file_cache: Optional[FileCache] = None
+_file_cache_lock = threading.Lock()
+
+
+def get_file_cache() -> FileCache:
+    """Get or create the per-process file cache configured from AppConfig."""
+    global _file_cache
+    if _file_cache is None:
+        with _file_cache_lock:
+            if _file_cache is None:
+                _file_cache = FileCache(
+                    max_bytes=config.FILE_CACHE_MAX_BYTES,
+                    max_entry_bytes=config.FILE_CACHE_MAX_ENTRY_BYTES
+                )
+    return _file_cache
@@ -0,0 +1,67 @@
+"""Small in-process TTL + LRU cache.
+
+Used for short-lived per-worker caches of database results (e.g. the image
+count), where a slightly stale value is acceptable in exchange for skipping a
+round trip.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe mapping bounded by ``maxsize`` whose entries expire after ``ttl`` seconds.
+
+    The least recently used entry is evicted when the cache is full.
+
+    Attributes:
+        maxsize (int): Maximum number of entries.
+        ttl (float): Entry lifetime in seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Return the live value for ``key`` or ``default``."""
+        with self._lock:
+            item = self._entries.get(key, _MISSING)
+            if item is not _MISSING:
+                expires_at, value = item
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store ``value`` under ``key`` for ``ttl`` seconds."""
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """Drop ``key`` if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
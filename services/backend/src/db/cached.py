@@ -0,0 +1,270 @@
+"""Read-through cache of the first list pages in front of the image repositories.
+
+``CachedImageRepository`` (and its async twin) decorate a repository with a
+per-worker cache of the first LIST_CACHE_PAGES offset pages of
+``list_all()``/``list_page()`` for LIST_CACHE_TTL seconds — the gallery's
+hottest query. Lookups by ID or filename pass straight through: no request
+path uses them (DELETE is a single ``UPDATE ... RETURNING``).
+
+Writes made through the decorator drop the cached pages at once. Writes made
+by other workers show up once the TTL (a couple of seconds) expires or, with
+IMAGE_CACHE_NOTIFY, right away: a trigger from ``init-sql/050_images_notify.sql``
+sends an empty notification on the ``images_changed`` channel for every
+write, and one ``ImageChangeListener`` thread per process tells every
+subscribed cache to drop its pages. The listener holds a direct Postgres connection per worker (LISTEN
+doesn't work through PgBouncer), so it is off by default.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Hashable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import psycopg
+from psycopg.errors import Error as PsycopgError
+
+from cache.ttl import TTLCache
+from db.dto import ImageDTO, ImageDetailsDTO
+from dto.pagination import CursorDTO
+from interfaces.repositories import AsyncImageRepository, ImageRepository
+from settings.config import config
+from settings.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+NOTIFY_CHANNEL = "images_changed"
+# Скільки різних (limit, offset) сторінок тримати одночасно
+_PAGE_CACHE_SIZE = 64
+_RECONNECT_DELAY = 5.0
+
+
+def _projection_key(projection: Optional[Sequence[str]]) -> Optional[tuple[str, ...]]:
+    return tuple(projection) if projection is not None else None
+
+
+class _PageCacheMixin:
+    """Page cache state and invalidation shared by the sync and async decorators."""
+
+    _pages: TTLCache
+    _list_pages: int
+
+    def _init_cache(self, list_pages: int, list_ttl: float) -> None:
+        self._pages = TTLCache(maxsize=_PAGE_CACHE_SIZE, ttl=list_ttl)
+        self._list_pages = list_pages if list_ttl > 0 else 0
+
+    def _page_key(self, kind: Hashable, limit: int, offset: int, after: Optional[CursorDTO]) -> Optional[Hashable]:
+        """Cache key for the first pages of a listing; None for deeper or keyset pages."""
+        if after is not None or offset >= limit * self._list_pages:
+            return None
+        return kind, limit, offset
+
+    def invalidate(self) -> None:
+        """Drop all cached pages: any added or removed image shifts the first pages."""
+        self._pages.clear()
+
+
+class CachedImageRepository(_PageCacheMixin, ImageRepository):
+    """ImageRepository decorator with a read-through cache of the first list pages."""
+
+    def __init__(self, repository: ImageRepository, list_pages: int = 3, list_ttl: float = 2.0):
+        """Wrap ``repository``, caching its first ``list_pages`` offset pages for ``list_ttl`` seconds."""
+        self._repository = repository
+        self._init_cache(list_pages, list_ttl)
+
+    def create(self, image: ImageDTO) -> ImageDetailsDTO:
+        created = self._repository.create(image)
+        self.invalidate()
+        return created
+
+    def create_many(self, images: List[ImageDTO]) -> List[ImageDetailsDTO]:
+        created = self._repository.create_many(images)
+        self.invalidate()
+        return created
+
+    def get_by_id(self, image_id: int) -> Optional[ImageDetailsDTO]:
+        return self._repository.get_by_id(image_id)
+
+    def get_by_filename(self, filename: str) -> Optional[ImageDetailsDTO]:
+        return self._repository.get_by_filename(filename)
+
+    def delete(self, image_id: int) -> bool:
+        deleted = self._repository.delete(image_id)
+        self.invalidate()
+        return deleted
+
+    def delete_by_filename(self, filename: str) -> bool:
+        deleted = self._repository.delete_by_filename(filename)
+        self.invalidate()
+        return deleted
+
+    def delete_many(self, filenames: Optional[List[str]] = None,
+                    older_than: Optional[datetime] = None) -> List[str]:
+        deleted = self._repository.delete_many(filenames, older_than)
+        self.invalidate()
+        return deleted
+
+    def purge_deleted(self, limit: int = 500) -> List[Tuple[str, Optional[str]]]:
+        return self._repository.purge_deleted(limit)
+
+    def iter_filenames(self, batch_size: int = 1000) -> Iterator[str]:
+        return self._repository.iter_filenames(batch_size)
+
+    def existing_filenames(self, filenames: List[str]) -> Set[str]:
+        return self._repository.existing_filenames(filenames)
+
+    def existing_blobs(self, content_hashes: List[str]) -> Set[str]:
+        return self._repository.existing_blobs(content_hashes)
+
+    def list_all(self, limit: int = 10, offset: int = 0, after: Optional[CursorDTO] = None,
+                 projection: Optional[Sequence[str]] = None) -> List[ImageDetailsDTO] | List[dict[str, Any]]:
+        key = self._page_key(('list_all', _projection_key(projection)), limit, offset, after)
+        if key is None:
+            return self._repository.list_all(limit, offset, after, projection=projection)
+        images = self._pages.get(key)
+        if images is None:
+            images = self._repository.list_all(limit, offset, after, projection=projection)
+            self._pages.set(key, images)
+        return list(images)
+
+    def count(self) -> int:
+        return self._repository.count()
+
+    def list_page(self, limit: int = 10, offset: int = 0,
+                  after: Optional[CursorDTO] = None) -> Tuple[List[ImageDetailsDTO], int]:
+        key = self._page_key('list_page', limit, offset, after)
+        if key is None:
+            return self._repository.list_page(limit, offset, after)
+        page = self._pages.get(key)
+        if page is None:
+            page = self._repository.list_page(limit, offset, after)
+            self._pages.set(key, page)
+        return list(page[0]), page[1]
+
+
+class AsyncCachedImageRepository(_PageCacheMixin, AsyncImageRepository):
+    """AsyncImageRepository decorator, the asyncio counterpart of CachedImageRepository."""
+
+    def __init__(self, repository: AsyncImageRepository, list_pages: int = 3, list_ttl: float = 2.0):
+        self._repository = repository
+        self._init_cache(list_pages, list_ttl)
+
+    async def create(self, image: ImageDTO) -> ImageDetailsDTO:
+        created = await self._repository.create(image)
+        self.invalidate()
+        return created
+
+    async def create_many(self, images: List[ImageDTO]) -> List[ImageDetailsDTO]:
+        created = await self._repository.create_many(images)
+        self.invalidate()
+        return created
+
+    async def get_by_id(self, image_id: int) -> Optional[ImageDetailsDTO]:
+        return await self._repository.get_by_id(image_id)
+
+    async def get_by_filename(self, filename: str) -> Optional[ImageDetailsDTO]:
+        return await self._repository.get_by_filename(filename)
+
+    async def delete(self, image_id: int) -> bool:
+        deleted = await self._repository.delete(image_id)
+        self.invalidate()
+        return deleted
+
+    async def delete_by_filename(self, filename: str) -> bool:
+        deleted = await self._repository.delete_by_filename(filename)
+        self.invalidate()
+        return deleted
+
+    async def delete_many(self, filenames: Optional[List[str]] = None,
+                          older_than: Optional[datetime] = None) -> List[str]:
+        deleted = await self._repository.delete_many(filenames, older_than)
+        self.invalidate()
+        return deleted
+
+    async def list_all(self, limit: int = 10, offset: int = 0, after: Optional[CursorDTO] = None,
+                       projection: Optional[Sequence[str]] = None) -> List[ImageDetailsDTO] | List[dict[str, Any]]:
+        key = self._page_key(('list_all', _projection_key(projection)), limit, offset, after)
+        if key is None:
+            return await self._repository.list_all(limit, offset, after, projection=projection)
+        images = self._pages.get(key)
+        if images is None:
+            images = await self._repository.list_all(limit, offset, after, projection=projection)
+            self._pages.set(key, images)
+        return list(images)
+
+    async def count(self) -> int:
+        return await self._repository.count()
+
+    async def list_page(self, limit: int = 10, offset: int = 0,
+                        after: Optional[CursorDTO] = None) -> Tuple[List[ImageDetailsDTO], int]:
+        key = self._page_key('list_page', limit, offset, after)
+        if key is None:
+            return await self._repository.list_page(limit, offset, after)
+        page = self._pages.get(key)
+        if page is None:
+            page = await self._repository.list_page(limit, offset, after)
+            self._pages.set(key, page)
+        return list(page[0]), page[1]
+
+
+class ImageChangeListener:
+    """Background thread that LISTENs on images_changed and notifies subscribers of every change.
+
+    Uses its own autocommit connection straight to Postgres: LISTEN doesn't
+    work through PgBouncer in transaction pooling mode.
+    """
+
+    def __init__(self, conninfo: str, channel: str = NOTIFY_CHANNEL):
+        self._conninfo = conninfo
+        self._channel = channel
+        self._callbacks: list[Callable[[], None]] = []
+        self._thread = threading.Thread(target=self._run, name="image-cache-listener", daemon=True)
+
+    def subscribe(self, callback: Callable[[], None]) -> None:
+        """Call ``callback()`` on every notification and after every reconnect."""
+        self._callbacks.append(callback)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _dispatch(self) -> None:
+        for callback in self._callbacks:
+            callback()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                with psycopg.connect(self._conninfo, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {self._channel}")
+                    # Поки з'єднання не було, сповіщення могли загубитися — скидаємо кеш повністю
+                    self._dispatch()
+                    for _ in conn.notifies():
+                        self._dispatch()
+            except PsycopgError as e:
+                logger.warning("✖ Cache invalidation listener disconnected: %s", e)
+            time.sleep(_RECONNECT_DELAY)
+
+
+_listener: Optional[ImageChangeListener] = None
+_listener_lock = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    # Потік слухача батька не переживає fork, а кеші батька дочірньому процесу не потрібні
+    global _listener, _listener_lock
+    _listener, _listener_lock = None, threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_change_listener() -> ImageChangeListener:
+    """Get or start the per-process ImageChangeListener (direct Postgres connection)."""
+    global _listener
+    if _listener is None:
+        with _listener_lock:
+            if _listener is None:
+                listener = ImageChangeListener(config.database_url)
+                listener.start()
+                _listener = listener
+    return _listener
@@ -1,10 +1,43 @@
+import os
+import threading
 from typing import Optional
 
-from db.session import get_connection_pool
-from db.repositories import PostgresImageRepository
-from interfaces.repositories import ImageRepository
+from db.cached import AsyncCachedImageRepository, CachedImageRepository, get_change_listener
+from db.session import get_async_connection_pool, get_connection_pool
+from db.repositories import AsyncPostgresImageRepository, PostgresImageRepository
+from interfaces.repositories import AsyncImageRepository, ImageRepository
+from settings.config import config
 
 _image_repository: Optional[ImageRepository] = None
+_repository_lock = threading.Lock()
+
+_async_image_repository: Optional[AsyncImageRepository] = None
+
+
+def _reset_after_fork() -> None:
+    # Репозиторії батька тримають його пули з'єднань — воркер створює власні (див. db.session)
+    global _image_repository, _async_image_repository, _repository_lock
+    _image_repository, _async_image_repository = None, None
+    _repository_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _with_cache(repository, cached_class):
+    """Wrap a repository in its list page cache and subscribe the cache to cross-worker invalidation."""
+    if config.LIST_CACHE_PAGES <= 0 or config.LIST_CACHE_TTL <= 0:
+        # Без кешу немає чого інвалідовувати — і зайвого з'єднання LISTEN теж
+        return repository
+    cached = cached_class(
+        repository,
+        list_pages=config.LIST_CACHE_PAGES,
+        list_ttl=config.LIST_CACHE_TTL
+    )
+    if config.IMAGE_CACHE_NOTIFY:
+        get_change_listener().subscribe(cached.invalidate)
+    return cached
+
 
 def get_image_repository() -> ImageRepository:
     """
@@ -16,10 +49,40 @@ def get_image_repository() -> ImageRepository:
 
     # Якщо репозиторій ще не створений
     if _image_repository is None:
-        # Отримуємо пул з'єднань до PostgreSQL
-        pool = get_connection_pool()
-        # Створюємо новий репозиторій на основі пулу
-        _image_repository = PostgresImageRepository(pool)
+        # Блокування потрібне для threaded-режиму сервера
+        with _repository_lock:
+            if _image_repository is None:
+                # Отримуємо пул з'єднань до PostgreSQL
+                pool = get_connection_pool()
+                # Створюємо новий репозиторій на основі пулу
+                repository = PostgresImageRepository(
+                    pool,
+                    count_mode=config.IMAGE_COUNT_MODE,
+                    count_cache_ttl=config.IMAGE_COUNT_CACHE_TTL,
+                    prepare=config.DB_PREPARE_THRESHOLD > 0
+                )
+                # Кеш перших сторінок списку поверх репозиторію (LIST_CACHE_TTL=0 — без кешу)
+                _image_repository = _with_cache(repository, CachedImageRepository)
 
     # Повертаємо екземпляр (новий або вже існуючий)
     return _image_repository
+
+
+async def get_async_image_repository() -> AsyncImageRepository:
+    """
+    Асинхронний аналог get_image_repository() для asyncio-рушія.
+    Створює репозиторій на основі AsyncConnectionPool при першому виклику.
+    """
+    global _async_image_repository
+
+    if _async_image_repository is None:
+        pool = await get_async_connection_pool()
+        repository = AsyncPostgresImageRepository(
+            pool,
+            count_mode=config.IMAGE_COUNT_MODE,
+            count_cache_ttl=config.IMAGE_COUNT_CACHE_TTL,
+            prepare=config.DB_PREPARE_THRESHOLD > 0
+        )
+        _async_image_repository = _with_cache(repository, AsyncCachedImageRepository)
+
+    return _async_image_repository
@@ -1,8 +1,17 @@
+import os
 from dataclasses import dataclass, asdict
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 
-@dataclass
+def get_display_name(original_name: str) -> str:
+    """Повертає ім'я файлу для відображення у галереї (без суфікса після останнього "_")."""
+    stem, ext = os.path.splitext(original_name)
+    if "_" in stem:
+        return "_".join(original_name.split("_")[:-1]) + ext
+    return original_name
+
+
+@dataclass(slots=True)
 class ImageDTO:
     # Data Transfer Object for image metadata
 
@@ -10,6 +19,18 @@ class ImageDTO:
     original_name: str
     size: int
     file_type: str
+    # SHA-256 вмісту; однакові файли мають один blob (image_blobs)
+    content_hash: Optional[str] = None
+    # Ім'я для галереї рахується один раз при завантаженні й зберігається в БД
+    display_name: Optional[str] = None
+    # З заголовка зображення при завантаженні (з урахуванням EXIF-орієнтації); NULL у старих рядках
+    width: Optional[int] = None
+    height: Optional[int] = None
+    mime_type: Optional[str] = None
+
+    def __post_init__(self):
+        if self.display_name is None:
+            self.display_name = get_display_name(self.original_name)
 
     def as_dict(self) -> Dict[str, Any]:
         # Convert DTO to a dictionary for serialization
@@ -17,7 +38,7 @@ class ImageDTO:
         return asdict(self)
 
 
-@dataclass(kw_only=True)
+@dataclass(slots=True, kw_only=True)
 class ImageDetailsDTO(ImageDTO):
     """Data Transfer Object for detailer image information"""
 
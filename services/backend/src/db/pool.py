@@ -0,0 +1,125 @@
+"""Connection pool sizing and instrumentation.
+
+Each worker process owns its own pool, so the per-worker size is derived from
+how many queries the worker can actually run at once (see
+``default_pool_size()``) instead of a fixed 2..20 that, multiplied by
+WEB_SERVER_WORKERS, mostly holds idle server connections.
+
+The pool classes add a histogram of the time requests wait for a connection
+on top of psycopg_pool's own counters (``get_stats()``).
+"""
+
+import bisect
+import threading
+from time import monotonic
+from typing import Any, Optional
+
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+from settings.config import AppConfig
+
+# Межі кошиків гістограми очікування з'єднання, мс
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class WaitHistogram:
+    """Thread-safe cumulative histogram of connection wait times in milliseconds."""
+
+    def __init__(self, buckets: tuple[float, ...] = WAIT_BUCKETS_MS):
+        self.buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, wait_ms: float) -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, wait_ms)] += 1
+            self._sum_ms += wait_ms
+
+    def snapshot(self) -> dict[str, Any]:
+        """Cumulative counts per upper bound (``le``), as in a Prometheus histogram."""
+        with self._lock:
+            counts, total_ms = list(self._counts), self._sum_ms
+        cumulative, running = {}, 0
+        for bound, count in zip([*map(str, self.buckets), '+Inf'], counts):
+            running += count
+            cumulative[bound] = running
+        return {"buckets": cumulative, "count": running, "sum_ms": round(total_ms, 3)}
+
+
+class InstrumentedConnectionPool(ConnectionPool):
+    """ConnectionPool that records how long each getconn() waited."""
+
+    def __init__(self, *args, **kwargs):
+        self.wait_histogram = WaitHistogram()
+        super().__init__(*args, **kwargs)
+
+    def getconn(self, timeout: Optional[float] = None):
+        started = monotonic()
+        try:
+            return super().getconn(timeout=timeout)
+        finally:
+            self.wait_histogram.observe((monotonic() - started) * 1000)
+
+
+class AsyncInstrumentedConnectionPool(AsyncConnectionPool):
+    """AsyncConnectionPool that records how long each getconn() waited."""
+
+    def __init__(self, *args, **kwargs):
+        self.wait_histogram = WaitHistogram()
+        super().__init__(*args, **kwargs)
+
+    async def getconn(self, timeout: Optional[float] = None):
+        started = monotonic()
+        try:
+            return await super().getconn(timeout=timeout)
+        finally:
+            self.wait_histogram.observe((monotonic() - started) * 1000)
+
+
+def default_pool_size(config: AppConfig) -> tuple[int, int]:
+    """Work out (min_size, max_size) of a worker's pool from the server mode and worker count.
+
+    A worker never needs more connections than requests it handles at once:
+    one in ``single`` mode, SERVER_THREADS in ``threaded``/``prefork``. The
+    asyncio engine has no such bound, so it gets its share of
+    DB_POOL_TOTAL_CONNECTIONS (which also caps the other modes).
+    DB_POOL_MIN_SIZE/DB_POOL_MAX_SIZE override the result.
+    """
+    share = max(1, config.DB_POOL_TOTAL_CONNECTIONS // max(1, config.WEB_SERVER_WORKERS))
+    if config.SERVER_ENGINE == "asyncio":
+        max_size = share
+    elif config.SERVER_MODE == "single":
+        max_size = 1
+    else:
+        max_size = min(share, config.SERVER_THREADS)
+
+    max_size = config.DB_POOL_MAX_SIZE or max_size
+    min_size = config.DB_POOL_MIN_SIZE if config.DB_POOL_MIN_SIZE is not None else 1
+    return min(min_size, max_size), max_size
+
+
+def pool_kwargs(config: AppConfig) -> dict[str, Any]:
+    """Keyword arguments for the pool constructors taken from AppConfig."""
+    min_size, max_size = default_pool_size(config)
+    return {
+        "min_size": min_size,
+        "max_size": max_size,
+        "timeout": config.DB_POOL_TIMEOUT,
+        "max_waiting": config.DB_POOL_MAX_WAITING,
+        "max_idle": config.DB_POOL_MAX_IDLE,
+        "max_lifetime": config.DB_POOL_MAX_LIFETIME,
+        # Автопідготовка запитів psycopg після N виконань; None — вимкнено
+        "kwargs": {"prepare_threshold": config.DB_PREPARE_THRESHOLD or None},
+    }
+
+
+def pool_stats(pool: Optional[ConnectionPool | AsyncConnectionPool]) -> Optional[dict[str, Any]]:
+    """psycopg_pool counters plus the wait histogram; None if the pool isn't open in this process."""
+    if pool is None:
+        return None
+    stats: dict[str, Any] = dict(pool.get_stats())
+    histogram = getattr(pool, 'wait_histogram', None)
+    if histogram is not None:
+        stats["wait_ms"] = histogram.snapshot()
+    return stats
@@ -1,12 +1,20 @@
-from typing import Optional, List
-from psycopg_pool import ConnectionPool
+from datetime import datetime
+from typing import Any, Callable, Iterator, Optional, List, Sequence, Set, Tuple
+from psycopg import BaseConnection
+from psycopg.adapt import Loader
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
 from psycopg.errors import Error as PsycopgError
+from psycopg.rows import dict_row
 
+from cache.ttl import TTLCache
+from dto.pagination import CursorDTO
 from interfaces.repositories import (
+    AsyncImageRepository,
     ImageRepository,
     ImageDTO,
     ImageDetailsDTO
 )
+from metrics.registry import timed_query
 from exceptions.repository_errors import (
     EntityCreationError,
     EntityDeletionError,
@@ -14,166 +22,650 @@ from exceptions.repository_errors import (
 )
 
 
-class PostgresImageRepository(ImageRepository):
-    """Postgres implementation of the ImageRepository interface."""
+# Колонки ImageDetailsDTO у порядку _row_to_details; file_type (enum) у текстовому режимі і так приходить str
+_DETAILS_COLUMNS = "id, filename, original_name, size, upload_time, file_type, display_name, width, height, mime_type"
+# Що можна вибрати в list_all(projection=...) — усе JSON-сумісне (див. configure_connection)
+_PROJECTABLE_COLUMNS = frozenset({"id", "filename", "original_name", "size", "upload_time", "file_type", "content_hash",
+                                  "display_name", "width", "height", "mime_type"})
 
-    def __init__(self, pool: ConnectionPool):
-        """Initialization of repository"""
-        self._pool = pool
 
-    def create(self, image: ImageDTO) -> ImageDetailsDTO:
-        """Create new image record in DB"""
+class IsoTimestamptzLoader(Loader):
+    """Load timestamptz as an ISO 8601 string without building a datetime.
+
+    Postgres' ISO output (``2026-10-17 12:34:56.123+00``) only needs the ``T``
+    separator and a ``+HH:MM`` offset to match what datetime.isoformat() gave
+    the API before, for a fraction of the cost.
+    """
+
+    def load(self, data) -> str:
+        text = bytes(data).decode()
+        if len(text) > 3 and text[-3] in '+-':
+            text += ':00'
+        return text.replace(' ', 'T', 1)
+
+
+def configure_connection(conn: BaseConnection) -> None:
+    """Pool ``configure`` callback: load timestamptz straight into ISO strings.
+
+    upload_time reaches the DTOs (and JSON) as a string anyway, so skipping
+    datetime parsing and isoformat() per row is the cheapest mapping.
+    """
+    conn.adapters.register_loader("timestamptz", IsoTimestamptzLoader)
+
+
+def _row_to_details(row) -> ImageDetailsDTO:
+    """Map a row of _DETAILS_COLUMNS to a DTO."""
+    db_id, filename, original_name, size, upload_time, file_type, display_name, width, height, mime_type = row
+    return ImageDetailsDTO(
+        id=db_id,
+        filename=filename,
+        original_name=original_name,
+        size=size,
+        file_type=file_type,
+        display_name=display_name,
+        width=width,
+        height=height,
+        mime_type=mime_type,
+        upload_time=upload_time
+    )
+
+
+def details_row(cursor) -> Callable[[Sequence[Any]], ImageDetailsDTO]:
+    """psycopg row factory building ImageDetailsDTO straight from _DETAILS_COLUMNS rows."""
+    return _row_to_details
+
+
+def _projection_columns(projection: Sequence[str]) -> str:
+    unknown = set(projection) - _PROJECTABLE_COLUMNS
+    if unknown or not projection:
+        raise ValueError(f"Unknown projection columns: {', '.join(sorted(unknown)) or '(none)'}")
+    return ", ".join(projection)
+
+
+def _list_query(limit: int, offset: int, after: Optional[CursorDTO],
+                columns: str = _DETAILS_COLUMNS) -> tuple[str, tuple]:
+    """Build the list_all query: a keyset seek when a cursor is given, OFFSET otherwise."""
+    if after is not None:
+        # Row comparison іде по частковому індексу idx_images_live_upload_time_id без пропуску рядків
+        query = f"""
+            SELECT {columns}
+            FROM images
+            WHERE deleted_at IS NULL AND (upload_time, id) < (%s, %s)
+            ORDER BY upload_time DESC, id DESC
+            LIMIT %s
+        """
+        return query, (*after.to_sql_params(), limit)
+
+    query = f"""
+        SELECT {columns}
+        FROM images
+        WHERE deleted_at IS NULL
+        ORDER BY upload_time DESC, id DESC
+        LIMIT %s OFFSET %s
+    """
+    return query, (limit, offset)
+
+
+def _list_with_count_query(limit: int, offset: int, after: Optional[CursorDTO]) -> tuple[str, tuple]:
+    """Wrap the list_all query so the page and the exact total come back in one round trip.
+
+    The LEFT JOIN LATERAL keeps one row (with NULL page columns) even when the page is empty.
+    """
+    page_query, params = _list_query(limit, offset, after)
+    query = f"""
+        SELECT page.id, page.filename, page.original_name, page.size, page.upload_time, page.file_type,
+               page.display_name, page.width, page.height, page.mime_type, total.count
+        FROM (SELECT COUNT(*) AS count FROM images WHERE deleted_at IS NULL) AS total
+        LEFT JOIN LATERAL ({page_query}) AS page ON TRUE
+    """
+    return query, params
+
+
+def _create_query(image: ImageDTO) -> tuple[str, tuple]:
+    """Build the create query; an image with a content hash also takes a reference on its blob."""
+    if image.content_hash is None:
         query = """
-            INSERT INTO images (filename, original_name, size, file_type)
-            VALUES (%s, %s, %s, %s)
+            INSERT INTO images (filename, original_name, size, file_type, display_name, width, height, mime_type)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
             RETURNING id, upload_time
         """
+        return query, (image.filename, image.original_name, image.size, image.file_type, image.display_name,
+                       image.width, image.height, image.mime_type)
+
+    # Один запит: новий blob з ref_count = 1 або +1 до наявного (init-sql/030)
+    query = """
+        WITH blob AS (
+            INSERT INTO image_blobs (content_hash, size)
+            VALUES (%s, %s)
+            ON CONFLICT (content_hash) DO UPDATE SET ref_count = image_blobs.ref_count + 1
+            RETURNING content_hash
+        )
+        INSERT INTO images (filename, original_name, size, file_type, display_name, width, height, mime_type,
+                            content_hash)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, (SELECT content_hash FROM blob))
+        RETURNING id, upload_time
+    """
+    return query, (image.content_hash, image.size,
+                   image.filename, image.original_name, image.size, image.file_type, image.display_name,
+                   image.width, image.height, image.mime_type)
+
+
+_GET_BY_ID_QUERY = f"SELECT {_DETAILS_COLUMNS} FROM images WHERE id = %s AND deleted_at IS NULL"
+_GET_BY_FILENAME_QUERY = f"SELECT {_DETAILS_COLUMNS} FROM images WHERE filename = %s AND deleted_at IS NULL"
+
+
+def _created_details(image: ImageDTO, db_id: int, upload_time) -> ImageDetailsDTO:
+    return ImageDetailsDTO(
+        id=db_id,
+        filename=image.filename,
+        original_name=image.original_name,
+        size=image.size,
+        file_type=image.file_type,
+        content_hash=image.content_hash,
+        display_name=image.display_name,
+        width=image.width,
+        height=image.height,
+        mime_type=image.mime_type,
+        upload_time=upload_time
+    )
+
+
+def _group_create_queries(images: List[ImageDTO]) -> list[tuple[str, list[int], list[tuple]]]:
+    """Group the create queries of a batch so each distinct query runs as one executemany().
+
+    Returns (query, indexes into images, params) per group.
+    """
+    groups: dict[str, tuple[list[int], list[tuple]]] = {}
+    for index, image in enumerate(images):
+        query, params = _create_query(image)
+        indexes, params_seq = groups.setdefault(query, ([], []))
+        indexes.append(index)
+        params_seq.append(params)
+    return [(query, indexes, params_seq) for query, (indexes, params_seq) in groups.items()]
+
+
+def _tombstone_query(condition: str) -> str:
+    """Build a query that soft-deletes live images matching ``condition``, returning their filenames."""
+    return f"""
+        UPDATE images SET deleted_at = now()
+        WHERE deleted_at IS NULL AND {condition}
+        RETURNING filename
+    """
+
+
+# Фізично видаляє найстаріші tombstones і звільняє їхні blob; SKIP LOCKED — кілька reaper не заважають один одному
+_PURGE_QUERY = """
+    WITH deleted AS (
+        DELETE FROM images
+        WHERE id IN (
+            SELECT id FROM images
+            WHERE deleted_at IS NOT NULL
+            ORDER BY deleted_at
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING filename, content_hash
+    ), released AS (
+        UPDATE image_blobs SET ref_count = image_blobs.ref_count - refs.count
+        FROM (
+            SELECT content_hash, COUNT(*) AS count FROM deleted
+            WHERE content_hash IS NOT NULL
+            GROUP BY content_hash
+        ) AS refs
+        WHERE image_blobs.content_hash = refs.content_hash
+        RETURNING image_blobs.content_hash, image_blobs.ref_count
+    )
+    SELECT deleted.filename, released.content_hash
+    FROM deleted
+    LEFT JOIN released ON released.content_hash = deleted.content_hash AND released.ref_count <= 0
+"""
+
+
+def _delete_many_condition(filenames: Optional[List[str]],
+                           older_than: Optional[datetime]) -> tuple[str, tuple]:
+    """Build the WHERE clause of delete_many() from its filters."""
+    conditions, params = [], []
+    if filenames is not None:
+        conditions.append("filename = ANY(%s)")
+        params.append(list(filenames))
+    if older_than is not None:
+        conditions.append("upload_time < %s")
+        params.append(older_than)
+    if not conditions:
+        raise ValueError("delete_many() needs filenames or older_than")
+    return " AND ".join(conditions), tuple(params)
+
+
+_DROP_BLOBS_QUERY = "DELETE FROM image_blobs WHERE content_hash = ANY(%s) AND ref_count <= 0"
+
+
+# IMAGE_COUNT_MODE -> запит для count()
+_COUNT_QUERIES = {
+    "exact": "SELECT COUNT(*) FROM images WHERE deleted_at IS NULL",
+    # Лічильник підтримують тригери (init-sql/020); без нього — точний COUNT(*)
+    "counter": """
+        SELECT COALESCE(
+            (SELECT row_count FROM image_counts WHERE table_name = 'images'),
+            (SELECT COUNT(*) FROM images WHERE deleted_at IS NULL)
+        )
+    """,
+    # Оцінка планувальника: миттєво, але точна лише після ANALYZE/autovacuum (включає ще не прибрані tombstones)
+    "estimate": "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = 'images'::regclass",
+}
+
+
+class _CountCacheMixin:
+    """Per-worker short-TTL cache of the image count shared by both repositories."""
+
+    _count_mode: str
+    _count_cache: Optional[TTLCache]
+
+    def _init_count(self, count_mode: str, count_cache_ttl: float) -> None:
+        if count_mode not in _COUNT_QUERIES:
+            raise ValueError(f"Unknown count mode: {count_mode}")
+        self._count_mode = count_mode
+        self._count_cache = TTLCache(maxsize=1, ttl=count_cache_ttl) if count_cache_ttl > 0 else None
+
+    def _cached_count(self) -> Optional[int]:
+        return self._count_cache.get("count") if self._count_cache is not None else None
+
+    def _remember_count(self, total: int) -> None:
+        if self._count_cache is not None:
+            self._count_cache.set("count", total)
+
+    def _forget_count(self) -> None:
+        if self._count_cache is not None:
+            self._count_cache.clear()
+
+    def _needs_joint_count(self) -> bool:
+        """Whether list_page() should fetch the exact count together with the page."""
+        return self._count_mode == "exact" and self._cached_count() is None
+
+
+def _split_page_rows(rows) -> tuple[List[ImageDetailsDTO], int]:
+    total = rows[0][-1] if rows else 0
+    return [_row_to_details(row[:-1]) for row in rows if row[0] is not None], total
+
+
+class PostgresImageRepository(_CountCacheMixin, ImageRepository):
+    """Postgres implementation of the ImageRepository interface."""
+
+    def __init__(self, pool: ConnectionPool, count_mode: str = "exact", count_cache_ttl: float = 0.0,
+                 prepare: bool = True):
+        """Initialization of repository
+
+        count_mode: how count() is computed — "exact", "counter" or "estimate".
+        count_cache_ttl: seconds to reuse a computed count in this worker (0 — no cache).
+        prepare: prepare the hot read queries server-side on first use (otherwise psycopg's prepare_threshold applies)."""
+        self._pool = pool
+        self._prepare = True if prepare else None
+        self._init_count(count_mode, count_cache_ttl)
+
+    @timed_query("create")
+    def create(self, image: ImageDTO) -> ImageDetailsDTO:
+        """Create new image record in DB (and take a reference on its content blob)"""
+        query, params = _create_query(image)
         try:
             with self._pool.connection() as conn:
                 with conn.cursor() as cur:
-                    cur.execute(
-                        query,
-                        (image.filename, image.original_name, image.size, image.file_type),
-                    )
+                    cur.execute(query, params)
                     db_id, upload_time = cur.fetchone() # повертає ОДИН об'єкт
                     conn.commit()
+                    self._forget_count()
 
-                    return ImageDetailsDTO(
-                        id=db_id,
-                        filename=image.filename,
-                        original_name=image.original_name,
-                        size=image.size,
-                        file_type=image.file_type,
-                        upload_time=upload_time.isoformat() if upload_time else None
-                    )
+                    return _created_details(image, db_id, upload_time)
         except PsycopgError as e:
             raise EntityCreationError("image", str(e))
         except Exception as e:
             raise EntityCreationError("image", str(e))
 
-    def delete(self, image_id: int) -> bool:
-        """Delete image record by ID"""
-        query = "DELETE FROM images WHERE id = %s RETURNING id"
+    @timed_query("create_many")
+    def create_many(self, images: List[ImageDTO]) -> List[ImageDetailsDTO]:
+        """Create image records in one transaction (executemany, pipelined by psycopg)"""
+        if not images:
+            return []
+
+        created: List[Optional[ImageDetailsDTO]] = [None] * len(images)
         try:
             with self._pool.connection() as conn:
                 with conn.cursor() as cur:
-                    cur.execute(query, (image_id,))
-                    result = cur.fetchone() # повертає ОДИН об'єкт
+                    for query, indexes, params_seq in _group_create_queries(images):
+                        cur.executemany(query, params_seq, returning=True)
+                        # Кожен рядок executemany(returning=True) — окремий результат
+                        for index in indexes:
+                            db_id, upload_time = cur.fetchone()
+                            created[index] = _created_details(images[index], db_id, upload_time)
+                            cur.nextset()
                     conn.commit()
-                    return result is not None
+                    self._forget_count()
+                    return created
         except PsycopgError as e:
-            raise EntityDeletionError("image", str(e))
+            raise EntityCreationError("image", str(e))
+
+    @timed_query("delete")
+    def delete(self, image_id: int) -> bool:
+        """Soft-delete image record by ID (the reaper removes it later)"""
+        return bool(self._tombstone("id = %s", (image_id,)))
 
+    @timed_query("get_by_id")
     def get_by_id(self, image_id: int) -> Optional[ImageDetailsDTO]:
         """Retrieve image record by ID"""
-        query = """
-            SELECT id, filename, original_name, size, upload_time, file_type::text
-            FROM images
-            WHERE id = %s
-        """
+        query = _GET_BY_ID_QUERY
         try:
             with self._pool.connection() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(query, (image_id,))
-                    row = cur.fetchone() # повертає ОДИН об'єкт
-                    if not row:
-                        return None
-
-                    db_id, filename, original_name, size, upload_time, file_type = row
-                    return ImageDetailsDTO(
-                        id=db_id,
-                        filename=filename,
-                        original_name=original_name,
-                        size=size,
-                        file_type=file_type,
-                        upload_time=upload_time.isoformat() if upload_time else None
-                    )
+                with conn.cursor(row_factory=details_row) as cur:
+                    cur.execute(query, (image_id,), prepare=self._prepare)
+                    return cur.fetchone() # повертає ОДИН об'єкт
         except PsycopgError as e:
             raise QueryExecutionError("get_by_id", str(e))
         except Exception as e:
             raise QueryExecutionError("get_by_id", str(e))
 
+    @timed_query("get_by_filename")
     def get_by_filename(self, filename: str) -> Optional[ImageDetailsDTO]:
         """Retrieve image record by filename"""
-        query = """
-            SELECT id, filename, original_name, size, upload_time, file_type::text
-            FROM images
-            WHERE filename = %s
-        """
+        query = _GET_BY_FILENAME_QUERY
         try:
             with self._pool.connection() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(query, (filename,))
-                    row = cur.fetchone()
-                    if not row:
-                        return None
-
-                    db_id, filename, original_name, size, upload_time, file_type = row
-                    return ImageDetailsDTO(
-                        id=db_id,
-                        filename=filename,
-                        original_name=original_name,
-                        size=size,
-                        file_type=file_type,
-                        upload_time=upload_time.isoformat() if upload_time else None
-                    )
+                with conn.cursor(row_factory=details_row) as cur:
+                    cur.execute(query, (filename,), prepare=self._prepare)
+                    return cur.fetchone()
         except PsycopgError as e:
             raise QueryExecutionError("get_by_filename", str(e))
         except Exception as e:
             raise QueryExecutionError("get_by_filename", str(e))
 
+    @timed_query("delete_by_filename")
     def delete_by_filename(self, filename: str) -> bool:
-        """Delete image record by filename"""
-        query = "DELETE FROM images WHERE filename = %s RETURNING id"
+        """Soft-delete image record by filename (one UPDATE ... RETURNING)"""
+        return bool(self._tombstone("filename = %s", (filename,)))
+
+    @timed_query("delete_many")
+    def delete_many(self, filenames: Optional[List[str]] = None,
+                    older_than: Optional[datetime] = None) -> List[str]:
+        """Soft-delete all images matching the filters in one statement.
+        filenames: delete only these filenames (WHERE filename = ANY(%s)).
+        older_than: delete only images uploaded before this time."""
+        condition, params = _delete_many_condition(filenames, older_than)
+        return self._tombstone(condition, params)
+
+    def _tombstone(self, condition: str, params: tuple) -> List[str]:
         try:
             with self._pool.connection() as conn:
                 with conn.cursor() as cur:
-                    cur.execute(query, (filename,))
-                    result = cur.fetchone()
+                    cur.execute(_tombstone_query(condition), params, prepare=self._prepare)
+                    filenames = [row[0] for row in cur.fetchall()]
+                    conn.commit()
+                    self._forget_count()
+                    return filenames
+        except PsycopgError as e:
+            raise EntityDeletionError("image", str(e))
+
+    @timed_query("purge_deleted")
+    def purge_deleted(self, limit: int = 500) -> List[Tuple[str, Optional[str]]]:
+        """Physically delete up to limit soft-deleted images and drop their blob references"""
+        try:
+            with self._pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(_PURGE_QUERY, (limit,))
+                    rows = cur.fetchall()
+                    orphan_hashes = list({content_hash for _, content_hash in rows if content_hash is not None})
+                    if orphan_hashes:
+                        cur.execute(_DROP_BLOBS_QUERY, (orphan_hashes,))
                     conn.commit()
-                    return result is not None
+                    return rows
         except PsycopgError as e:
             raise EntityDeletionError("image", str(e))
 
-    def list_all(self, limit: int = 10, offset: int = 0) -> List[ImageDetailsDTO]:
+    def iter_filenames(self, batch_size: int = 1000) -> Iterator[str]:
+        """Stream filenames of live images with a server-side cursor"""
+        try:
+            with self._pool.connection() as conn:
+                # Іменований курсор — рядки тягнуться з сервера пачками по itersize
+                with conn.cursor(name="iter_filenames") as cur:
+                    cur.itersize = batch_size
+                    cur.execute("SELECT filename FROM images WHERE deleted_at IS NULL")
+                    for (filename,) in cur:
+                        yield filename
+        except PsycopgError as e:
+            raise QueryExecutionError("iter_filenames", str(e))
+
+    @timed_query("existing_filenames")
+    def existing_filenames(self, filenames: List[str]) -> Set[str]:
+        """Return which of the filenames have a row (live or soft-deleted)"""
+        return self._existing("SELECT filename FROM images WHERE filename = ANY(%s)", filenames,
+                              "existing_filenames")
+
+    @timed_query("existing_blobs")
+    def existing_blobs(self, content_hashes: List[str]) -> Set[str]:
+        """Return which of the content hashes have an image_blobs row"""
+        return self._existing("SELECT content_hash FROM image_blobs WHERE content_hash = ANY(%s)", content_hashes,
+                              "existing_blobs")
+
+    def _existing(self, query: str, values: List[str], operation: str) -> Set[str]:
+        if not values:
+            return set()
+        try:
+            with self._pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, (list(values),))
+                    return {row[0] for row in cur.fetchall()}
+        except PsycopgError as e:
+            raise QueryExecutionError(operation, str(e))
+
+    @timed_query("list_all")
+    def list_all(self, limit: int = 10, offset: int = 0, after: Optional[CursorDTO] = None,
+                 projection: Optional[Sequence[str]] = None) -> List[ImageDetailsDTO] | List[dict[str, Any]]:
         """List images with pagination.
         limit: maximum number of images to return
-        offset: Number of images to skip."""
-        query = """
-            SELECT id, filename, original_name, size, upload_time, file_type::text
-            FROM images
-            ORDER BY upload_time DESC
-            LIMIT %s OFFSET %s
-        """
+        offset: Number of images to skip (ignored when after is given).
+        after: keyset cursor — seek past it using idx_images_live_upload_time_id instead of OFFSET.
+        projection: return only these columns as JSON-encodable dicts instead of DTOs."""
+        if projection is not None:
+            query, params = _list_query(limit, offset, after, _projection_columns(projection))
+            row_factory = dict_row
+        else:
+            query, params = _list_query(limit, offset, after)
+            row_factory = details_row
         try:
             with self._pool.connection() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(query, (limit, offset))
-                    results = cur.fetchall()
-                    return [
-                        ImageDetailsDTO(
-                            id=row[0],
-                            filename=row[1],
-                            original_name=row[2],
-                            size=row[3],
-                            upload_time=row[4].isoformat() if row[4] else None,
-                            file_type=row[5],
-                        )
-                        for row in results
-                    ]
+                with conn.cursor(row_factory=row_factory) as cur:
+                    cur.execute(query, params, prepare=self._prepare)
+                    return cur.fetchall()
         except PsycopgError as e:
             raise QueryExecutionError("list_all", str(e))
 
 
+    @timed_query("count")
     def count(self) -> int:
-        """Count of total number of imsges"""
-        query = "SELECT COUNT(*) FROM images"
+        """Count of total number of imsges (according to count_mode, cached for count_cache_ttl)"""
+        cached = self._cached_count()
+        if cached is not None:
+            return cached
+
+        query = _COUNT_QUERIES[self._count_mode]
         try:
             with self._pool.connection() as conn:
                 with conn.cursor() as cur:
-                    cur.execute(query)
+                    cur.execute(query, prepare=self._prepare)
                     result = cur.fetchone()
+                    self._remember_count(result[0])
                     return result[0]
         except PsycopgError as e:
             raise QueryExecutionError("count", str(e))
 
+    @timed_query("list_page")
+    def list_page(self, limit: int = 10, offset: int = 0,
+                  after: Optional[CursorDTO] = None) -> Tuple[List[ImageDetailsDTO], int]:
+        """List a page of images together with the total count.
+        An exact, uncached count is fetched in the same query as the page."""
+        if not self._needs_joint_count():
+            return self.list_all(limit=limit, offset=offset, after=after), self.count()
+
+        query, params = _list_with_count_query(limit, offset, after)
+        try:
+            with self._pool.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(query, params, prepare=self._prepare)
+                    items, total = _split_page_rows(cur.fetchall())
+                    self._remember_count(total)
+                    return items, total
+        except PsycopgError as e:
+            raise QueryExecutionError("list_page", str(e))
+
+
+class AsyncPostgresImageRepository(_CountCacheMixin, AsyncImageRepository):
+    """Postgres implementation of the AsyncImageRepository interface (asyncio engine)."""
+
+    def __init__(self, pool: AsyncConnectionPool, count_mode: str = "exact", count_cache_ttl: float = 0.0,
+                 prepare: bool = True):
+        """Initialization of repository (see PostgresImageRepository for the options)"""
+        self._pool = pool
+        self._prepare = True if prepare else None
+        self._init_count(count_mode, count_cache_ttl)
+
+    @timed_query("create")
+    async def create(self, image: ImageDTO) -> ImageDetailsDTO:
+        """Create new image record in DB (and take a reference on its content blob)"""
+        query, params = _create_query(image)
+        try:
+            async with self._pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(query, params)
+                    db_id, upload_time = await cur.fetchone()
+                    await conn.commit()
+                    self._forget_count()
+
+                    return _created_details(image, db_id, upload_time)
+        except Exception as e:
+            raise EntityCreationError("image", str(e))
+
+    @timed_query("create_many")
+    async def create_many(self, images: List[ImageDTO]) -> List[ImageDetailsDTO]:
+        """Create image records in one transaction (executemany, pipelined by psycopg)"""
+        if not images:
+            return []
+
+        created: List[Optional[ImageDetailsDTO]] = [None] * len(images)
+        try:
+            async with self._pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    for query, indexes, params_seq in _group_create_queries(images):
+                        await cur.executemany(query, params_seq, returning=True)
+                        # Кожен рядок executemany(returning=True) — окремий результат
+                        for index in indexes:
+                            db_id, upload_time = await cur.fetchone()
+                            created[index] = _created_details(images[index], db_id, upload_time)
+                            cur.nextset()
+                    await conn.commit()
+                    self._forget_count()
+                    return created
+        except PsycopgError as e:
+            raise EntityCreationError("image", str(e))
+
+    @timed_query("delete")
+    async def delete(self, image_id: int) -> bool:
+        """Soft-delete image record by ID (the reaper removes it later)"""
+        return bool(await self._tombstone("id = %s", (image_id,)))
+
+    @timed_query("get_by_id")
+    async def get_by_id(self, image_id: int) -> Optional[ImageDetailsDTO]:
+        """Retrieve image record by ID"""
+        query = _GET_BY_ID_QUERY
+        try:
+            async with self._pool.connection() as conn:
+                async with conn.cursor(row_factory=details_row) as cur:
+                    await cur.execute(query, (image_id,), prepare=self._prepare)
+                    return await cur.fetchone()
+        except PsycopgError as e:
+            raise QueryExecutionError("get_by_id", str(e))
+
+    @timed_query("get_by_filename")
+    async def get_by_filename(self, filename: str) -> Optional[ImageDetailsDTO]:
+        """Retrieve image record by filename"""
+        query = _GET_BY_FILENAME_QUERY
+        try:
+            async with self._pool.connection() as conn:
+                async with conn.cursor(row_factory=details_row) as cur:
+                    await cur.execute(query, (filename,), prepare=self._prepare)
+                    return await cur.fetchone()
+        except PsycopgError as e:
+            raise QueryExecutionError("get_by_filename", str(e))
+
+    @timed_query("delete_by_filename")
+    async def delete_by_filename(self, filename: str) -> bool:
+        """Soft-delete image record by filename (one UPDATE ... RETURNING)"""
+        return bool(await self._tombstone("filename = %s", (filename,)))
+
+    @timed_query("delete_many")
+    async def delete_many(self, filenames: Optional[List[str]] = None,
+                          older_than: Optional[datetime] = None) -> List[str]:
+        """Soft-delete all images matching the filters in one statement"""
+        condition, params = _delete_many_condition(filenames, older_than)
+        return await self._tombstone(condition, params)
+
+    async def _tombstone(self, condition: str, params: tuple) -> List[str]:
+        try:
+            async with self._pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(_tombstone_query(condition), params, prepare=self._prepare)
+                    filenames = [row[0] for row in await cur.fetchall()]
+                    await conn.commit()
+                    self._forget_count()
+                    return filenames
+        except PsycopgError as e:
+            raise EntityDeletionError("image", str(e))
+
+    @timed_query("list_all")
+    async def list_all(self, limit: int = 10, offset: int = 0, after: Optional[CursorDTO] = None,
+                       projection: Optional[Sequence[str]] = None) -> List[ImageDetailsDTO] | List[dict[str, Any]]:
+        """List images with offset or keyset pagination, newest first (DTOs or projection dicts)"""
+        if projection is not None:
+            query, params = _list_query(limit, offset, after, _projection_columns(projection))
+            row_factory = dict_row
+        else:
+            query, params = _list_query(limit, offset, after)
+            row_factory = details_row
+        try:
+            async with self._pool.connection() as conn:
+                async with conn.cursor(row_factory=row_factory) as cur:
+                    await cur.execute(query, params, prepare=self._prepare)
+                    return await cur.fetchall()
+        except PsycopgError as e:
+            raise QueryExecutionError("list_all", str(e))
+
+    @timed_query("count")
+    async def count(self) -> int:
+        """Count of total number of images (according to count_mode, cached for count_cache_ttl)"""
+        cached = self._cached_count()
+        if cached is not None:
+            return cached
+
+        query = _COUNT_QUERIES[self._count_mode]
+        try:
+            async with self._pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(query, prepare=self._prepare)
+                    result = await cur.fetchone()
+                    self._remember_count(result[0])
+                    return result[0]
+        except PsycopgError as e:
+            raise QueryExecutionError("count", str(e))
+
+    @timed_query("list_page")
+    async def list_page(self, limit: int = 10, offset: int = 0,
+                        after: Optional[CursorDTO] = None) -> Tuple[List[ImageDetailsDTO], int]:
+        """List a page of images together with the total count in one round trip when exact"""
+        if not self._needs_joint_count():
+            return await self.list_all(limit=limit, offset=offset, after=after), await self.count()
+
+        query, params = _list_with_count_query(limit, offset, after)
+        try:
+            async with self._pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(query, params, prepare=self._prepare)
+                    items, total = _split_page_rows(await cur.fetchall())
+                    self._remember_count(total)
+                    return items, total
+        except PsycopgError as e:
+            raise QueryExecutionError("list_page", str(e))
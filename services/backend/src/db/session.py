@@ -5,20 +5,51 @@ to the database. It implements a singleton pattern for the connection pool
 to ensure efficient reuse of database connections across the application.
 
 The module supports both direct PostgreSQL connections and connections via
-PgBouncer, based on the application configuration.
+PgBouncer, based on the application configuration. Pool sizing, timeouts and
+prepared statements come from AppConfig (see ``db.pool``).
+
+Pools are created on first use, i.e. inside each worker process after fork.
+A pool inherited through fork is dropped in the child, so a worker never
+shares the parent's sockets.
 
 Side effects:
     - Creates a connection pool on first access.
     - Maintains open database connections in the pool.
 """
 
-from typing import Optional
+import asyncio
+import os
+import threading
+from typing import Any, Optional
 
-from psycopg_pool import ConnectionPool
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
 
+from db.repositories import configure_connection
+from db.pool import AsyncInstrumentedConnectionPool, InstrumentedConnectionPool, pool_kwargs, pool_stats
 from settings.config import config
 
 _pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+_async_pool: Optional[AsyncConnectionPool] = None
+_async_pool_lock = asyncio.Lock()
+
+# Пули батьківського процесу: не закриваємо і не даємо зібрати GC — сокети належать батьку
+_inherited_pools: list = []
+
+
+def _reset_after_fork() -> None:
+    global _pool, _pool_lock, _async_pool, _async_pool_lock
+    _inherited_pools.extend(pool for pool in (_pool, _async_pool) if pool is not None)
+    _pool, _async_pool = None, None
+    _pool_lock, _async_pool_lock = threading.Lock(), asyncio.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+async def configure_async_connection(conn) -> None:
+    configure_connection(conn)
 
 
 def get_connection_pool() -> ConnectionPool:
@@ -38,10 +69,52 @@ def get_connection_pool() -> ConnectionPool:
     """
     global _pool
     if _pool is None:
-        _pool = ConnectionPool(
-            conninfo=config.db_url,
-            min_size=2,
-            max_size=20,
-            open=True
-        )
-    return _pool
\ No newline at end of file
+        # У threaded-режимі перші запити можуть прийти одночасно з різних потоків
+        with _pool_lock:
+            if _pool is None:
+                _pool = InstrumentedConnectionPool(
+                    conninfo=config.db_url,
+                    name=f"images-{os.getpid()}",
+                    open=True,
+                    configure=configure_connection,
+                    **pool_kwargs(config)
+                )
+    return _pool
+
+
+async def get_async_connection_pool() -> AsyncConnectionPool:
+    """Get or create the asyncio database connection pool.
+
+    Async counterpart of get_connection_pool() used by the asyncio server engine.
+    The pool is opened inside the running event loop on first call.
+
+    Returns:
+        AsyncConnectionPool: A reusable pool of async database connections.
+
+    Side effects:
+        - On first call, creates and opens a connection pool.
+        - Maintains open database connections.
+    """
+    global _async_pool
+    if _async_pool is None:
+        async with _async_pool_lock:
+            if _async_pool is None:
+                pool = AsyncInstrumentedConnectionPool(
+                    conninfo=config.db_url,
+                    name=f"images-async-{os.getpid()}",
+                    open=False,
+                    configure=configure_async_connection,
+                    **pool_kwargs(config)
+                )
+                await pool.open()
+                _async_pool = pool
+    return _async_pool
+
+
+def get_pool_stats() -> dict[str, Any]:
+    """Stats of this process's pools (None for a pool that hasn't been opened)."""
+    return {
+        "pid": os.getpid(),
+        "pool": pool_stats(_pool),
+        "async_pool": pool_stats(_async_pool)
+    }
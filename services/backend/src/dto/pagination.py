@@ -1,5 +1,47 @@
+import base64
+import binascii
+import json
 from dataclasses import dataclass
-from typing import Tuple
+from datetime import datetime
+from typing import Optional, Tuple
+
+from interfaces.pagination import InvalidCursorError
+
+
+@dataclass(frozen=True)
+class CursorDTO:
+    """Opaque keyset cursor pointing at the last item of a page.
+
+    Attributes:
+        upload_time (str): ISO timestamp of the last item.
+        id (int): ID of the last item (tie-breaker for equal timestamps).
+    """
+    upload_time: str
+    id: int
+
+    def encode(self) -> str:
+        """Encode the cursor as a URL-safe token."""
+        raw = json.dumps([self.upload_time, self.id], separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @classmethod
+    def decode(cls, token: str) -> "CursorDTO":
+        """Decode a token produced by encode().
+
+        Raises:
+            InvalidCursorError: If the token is malformed.
+        """
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            upload_time, image_id = json.loads(raw)
+            datetime.fromisoformat(upload_time)
+            return cls(upload_time=upload_time, id=int(image_id))
+        except (binascii.Error, ValueError, TypeError) as e:
+            raise InvalidCursorError(token) from e
+
+    def to_sql_params(self) -> Tuple[datetime, int]:
+        """Return (upload_time, id) for a ``(upload_time, id) < (%s, %s)`` seek."""
+        return datetime.fromisoformat(self.upload_time), self.id
 
 
 @dataclass
@@ -9,9 +51,15 @@ class PaginationDTO:
     Attributes:
         page (int): Current page number (1-based).
         per_page (int): Number of items per page.
+        after (Optional[CursorDTO]): Keyset cursor; when set, page is ignored.
     """
     page: int
     per_page: int
+    after: Optional[CursorDTO] = None
+
+    @property
+    def is_keyset(self) -> bool:
+        return self.after is not None
 
     @staticmethod
     def to_limit_offset(page: int, per_page: int) -> Tuple[int, int]:
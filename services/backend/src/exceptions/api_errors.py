@@ -28,8 +28,89 @@ class MaxSizeExceedError(APIError):
         message = f'File size exceeds the maximum allowed size of {max_size_mb:.2f} MB.'
         super().__init__(message)
 
+class ImageTooLargeError(APIError):
+    """Raised when an image has more pixels than allowed (decompression bomb protection)."""
+
+    def __init__(self, max_pixels: int):
+        super().__init__(f'Image dimensions exceed the maximum of {max_pixels} pixels.')
+
 class MultipleFilesUploadError(APIError):
     """Raised when more than one file is uploaded"""
     def __init__(self):
         message = "Only one file can be uploaded per request."
-        super().__init__(message)
\ No newline at end of file
+        super().__init__(message)
+
+class FileSaveError(APIError):
+    """Raised when an uploaded file can't be written to disk."""
+    status_code = 500
+    message = "Internal Server Error"
+
+
+class RangeNotSatisfiableError(APIError):
+    """Raised when a requested byte range lies outside the file."""
+    status_code = 416
+
+    def __init__(self, size: int):
+        self.size = size
+        super().__init__(f"Requested range not satisfiable for a file of {size} bytes.")
+
+
+class InvalidVariantError(APIError):
+    """Raised when image variant parameters (?w=, ?h=, ?fmt=) are invalid."""
+    status_code = 400
+    message = "Invalid image variant parameters."
+
+
+class VariantGenerationError(APIError):
+    """Raised when an image variant can't be generated from its source."""
+    status_code = 500
+    message = "Failed to generate image variant."
+
+
+class ImagePoolBusyError(APIError):
+    """Raised when the image processing pool of a worker has no room for another task."""
+    status_code = 503
+    message = "Image processing is busy, try again later."
+
+
+class ImageTaskTimeoutError(APIError):
+    """Raised when an image processing task doesn't finish in IMAGE_POOL_TASK_TIMEOUT."""
+    status_code = 503
+    message = "Image processing took too long, try again later."
+
+
+class InvalidContentLengthError(APIError):
+    """Raised when the Content-Length header is not a non-negative integer."""
+    status_code = 400
+    message = "Bad Request: Invalid Content-Length."
+
+
+class LengthRequiredError(APIError):
+    """Raised when an upload request has no Content-Length header."""
+    status_code = 411
+    message = "Content-Length required."
+
+
+class MalformedUploadError(APIError):
+    """Raised when an upload body is not valid multipart/form-data."""
+    status_code = 400
+    message = "Bad Request: Malformed multipart body."
+
+
+class MissingFileError(APIError):
+    """Raised when an upload body contains no file part."""
+    status_code = 400
+    message = "Bad Request: No file uploaded."
+
+
+class TooManyFilesError(APIError):
+    """Raised when a batch upload has more files than allowed."""
+
+    def __init__(self, max_files: int):
+        super().__init__(f"Too many files: at most {max_files} can be uploaded per request.")
+
+
+class InvalidDeleteRequestError(APIError):
+    """Raised when a bulk delete request body is invalid."""
+    status_code = 400
+    message = "Bad Request: Expected a JSON object with 'filenames' or 'older_than'."
@@ -0,0 +1,220 @@
+"""Batch operations: many files per request.
+
+Uploads (``POST /api/upload/batch``)
+------------------------------------
+
+The body is parsed by ``StreamingUpload`` exactly like a single upload, each
+file part validated from its image header and streamed straight into its own
+temp file in IMAGE_DIR. Once the body is read, the files are moved into place
+on a bounded per-worker thread pool (UPLOAD_BATCH_WORKERS), and the metadata
+of every saved file is recorded with one ``create_many()`` transaction
+instead of one per file.
+
+A rejected file doesn't fail the batch: the response lists a result per file,
+in body order, with either the saved file or the error.
+
+Deletes (``DELETE /api/files``)
+-------------------------------
+
+The JSON body lists ``filenames`` and/or an ``older_than`` ISO timestamp. All
+matching rows are soft-deleted with one ``delete_many()`` statement; their files
+(and blobs left without references) are removed later by ``handlers.reaper``.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from datetime import datetime, UTC
+from functools import partial
+from typing import Any, BinaryIO, Optional
+
+from db.dto import ImageDetailsDTO, ImageDTO
+from exceptions.api_errors import APIError, InvalidDeleteRequestError
+from handlers.layout import image_path
+from handlers.upload import StreamingUpload, UploadPart, blob_path, check_content_length, read_into, remove_blob
+from settings.config import config
+from settings.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DELETE_BODY_MAX_BYTES = 1024 * 1024
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_batch_executor() -> ThreadPoolExecutor:
+    """Get or create the per-process thread pool for the file work of batch uploads."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=config.UPLOAD_BATCH_WORKERS,
+                    thread_name_prefix="batch"
+                )
+    return _executor
+
+
+def _failed(part: UploadPart, error: APIError) -> dict[str, Any]:
+    return {'original_name': part.filename, 'error': error.message, 'status': error.status_code}
+
+
+def _persist(upload: StreamingUpload, part: UploadPart) -> dict[str, Any]:
+    """Save one received part (already validated while streaming); returns its per-file result."""
+    if part.error is not None:
+        return _failed(part, part.error)
+    try:
+        return upload.save(part)
+    except APIError as e:
+        logger.warning("Rejected %s: %s", part.filename, e.message)
+        upload.discard(part)
+        return _failed(part, e)
+
+
+def persist_batch(upload: StreamingUpload, parts: list[UploadPart]) -> list[dict[str, Any]]:
+    """Save received parts in parallel on the batch thread pool.
+
+    Returns:
+        list[dict[str, Any]]: A result per part, in the order of ``parts``: the saved file
+        info (see StreamingUpload.save()) or original_name, error and status.
+    """
+    return list(get_batch_executor().map(partial(_persist, upload), parts))
+
+
+def save_uploaded_batch(stream: BinaryIO, content_type: str,
+                        content_length: Optional[int]) -> list[dict[str, Any]]:
+    """Read a multipart/form-data body with many files from a blocking stream and save them.
+
+    Raises:
+        APIError: If the request as a whole is rejected (too large, too many files, malformed).
+    """
+    check_content_length(content_length, config.UPLOAD_BATCH_MAX_FILES)
+
+    with StreamingUpload(content_type, max_files=config.UPLOAD_BATCH_MAX_FILES) as upload:
+        read_into(upload, stream, content_length)
+        return persist_batch(upload, upload.finish())
+
+
+def batch_image_dtos(results: list[dict[str, Any]]) -> list[ImageDTO]:
+    """Build the DTOs to record for the saved files of a batch."""
+    return [
+        ImageDTO(
+            filename=result['filename'],
+            original_name=result['original_name'],
+            size=result['size'],
+            file_type=result['file_type'],
+            content_hash=result['content_hash'],
+            width=result['width'],
+            height=result['height'],
+            mime_type=result['mime_type']
+        )
+        for result in results if 'error' not in result
+    ]
+
+
+def batch_response(results: list[dict[str, Any]], created: list[ImageDetailsDTO]) -> dict[str, Any]:
+    """Merge the created records into the per-file results and build the response body."""
+    created_iter = iter(created)
+    for result in results:
+        if 'error' not in result:
+            details = next(created_iter)
+            result['id'] = details.id
+            result['upload_time'] = details.upload_time
+
+    uploaded = len(created)
+    return {"items": results, "uploaded": uploaded, "failed": len(results) - uploaded}
+
+
+def discard_saved(results: list[dict[str, Any]]) -> None:
+    """Remove the saved files of an upload whose metadata couldn't be recorded.
+
+    A blob no other file links to any more is removed as well, so the failed
+    upload leaves nothing behind for the reconciliation pass.
+    """
+    for result in results:
+        if 'error' not in result:
+            try:
+                os.remove(image_path(result['filename']))
+            except OSError as e:
+                logger.error("✖ Failed to remove %s: %s", result['filename'], e)
+                continue
+            with suppress(OSError):
+                # Посилання лише з самого сховища — вміст належав тільки цьому завантаженню
+                if os.stat(blob_path(result['content_hash'])).st_nlink == 1:
+                    remove_blob(result['content_hash'])
+
+
+def check_delete_body_length(content_length: Optional[int]) -> None:
+    """Reject a bulk delete body that is missing or too large before reading it.
+
+    Raises:
+        InvalidDeleteRequestError: If there is no body or it exceeds DELETE_BODY_MAX_BYTES.
+    """
+    if not content_length or content_length > DELETE_BODY_MAX_BYTES:
+        raise InvalidDeleteRequestError()
+
+
+def parse_delete_request(body: bytes) -> tuple[Optional[list[str]], Optional[datetime]]:
+    """Parse a bulk delete body: ``{"filenames": [...], "older_than": "<ISO timestamp>"}``.
+
+    Returns:
+        tuple[Optional[list[str]], Optional[datetime]]: The filenames and the time filter.
+
+    Raises:
+        InvalidDeleteRequestError: If the body is malformed or has no filter.
+    """
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise InvalidDeleteRequestError()
+    if not isinstance(payload, dict):
+        raise InvalidDeleteRequestError()
+
+    filenames = payload.get('filenames')
+    if filenames is not None:
+        if not isinstance(filenames, list) or not all(isinstance(name, str) for name in filenames):
+            raise InvalidDeleteRequestError("'filenames' must be a list of strings.")
+        if len(filenames) > config.DELETE_BATCH_MAX_FILES:
+            raise InvalidDeleteRequestError(
+                f"Too many files: at most {config.DELETE_BATCH_MAX_FILES} can be deleted per request."
+            )
+        # Порядок зберігається, дублікати прибираються
+        filenames = list(dict.fromkeys(filenames))
+
+    older_than = payload.get('older_than')
+    if older_than is not None:
+        try:
+            older_than = datetime.fromisoformat(older_than)
+        except (TypeError, ValueError):
+            raise InvalidDeleteRequestError("'older_than' must be an ISO 8601 timestamp.")
+        if older_than.tzinfo is None:
+            older_than = older_than.replace(tzinfo=UTC)
+
+    if filenames is None and older_than is None:
+        raise InvalidDeleteRequestError()
+    return filenames, older_than
+
+
+def finish_batch_delete(filenames: Optional[list[str]], deleted: list[str]) -> dict[str, Any]:
+    """Build the per-item response of a bulk delete.
+
+    Args:
+        filenames: Filenames requested for deletion (None for a pure ``older_than`` filter).
+        deleted: Filenames soft-deleted by delete_many().
+
+    Returns:
+        dict[str, Any]: items (filename, status, error) in request order, deleted and failed counts.
+    """
+    deleted_names = set(deleted)
+    items = []
+    for filename in (filenames if filenames is not None else deleted):
+        if filename in deleted_names:
+            items.append({'filename': filename, 'status': 200})
+        else:
+            items.append({'filename': filename, 'status': 404, 'error': "File record not found in DB"})
+
+    failed = sum(1 for item in items if item['status'] != 200)
+    return {"items": items, "deleted": len(deleted_names), "failed": failed}
@@ -1,36 +1,64 @@
+import heapq
 import os
 from datetime import datetime, UTC
+from itertools import islice
+from typing import Iterable, Iterator, Optional
 
+from handlers.inventory import ImageRecord, get_image_inventory
+from handlers.layout import iter_image_entries
 from settings.config import config
 from interfaces.handlers import FileHandlerInterface
 
-def list_uploaded_images() -> list[dict[str, str | int]]:
-    """Повертає список метаданих зображення (name, size, created_at) з папки з завантаженнями."""
-    files = []
 
-    try:
-        filenames = os.listdir(config.IMAGE_DIR)
-    except FileNotFoundError:
-        raise FileNotFoundError('Images directory not found.')
-    except PermissionError:
-        raise PermissionError('Permission denied to access images directory.')
+def _scan_images() -> Iterator[ImageRecord]:
+    # DirEntry.stat() — один stat на файл, результат кешується в самому DirEntry
+    for entry in iter_image_entries():
+        try:
+            stat = entry.stat(follow_symlinks=False)
+        except FileNotFoundError:
+            continue
+        yield entry.name, stat.st_size, stat.st_ctime, stat.st_mtime
+
 
-    for filename in filenames:
-        filepath = os.path.join(config.IMAGE_DIR, filename)
-        ext = os.path.splitext(filename)[1].lower()
+def list_uploaded_images(extensions: Optional[Iterable[str]] = None, sort_by_mtime: bool = False,
+                         offset: int = 0, limit: Optional[int] = None,
+                         use_index: bool = False) -> Iterator[dict[str, str | int]]:
+    """Генератор метаданих зображень (filename, size, created_at, modified_at) з папки з завантаженнями.
 
-        if ext in config.SUPPORTED_FORMATS and os.path.isfile(filepath):
-            created_at = datetime.fromtimestamp(os.path.getctime(filepath), tz=UTC).isoformat()
-            size = os.path.getsize(filepath)
-            files.append({
+    Args:
+        extensions: Які розширення повертати (за замовчуванням SUPPORTED_FORMATS).
+        sort_by_mtime: Спершу найновіші за mtime; інакше — в порядку обходу диска.
+        offset: Скільки зображень пропустити.
+        limit: Скільки зображень повернути (None — усі).
+        use_index: Брати дані з інкрементального індексу (handlers.inventory) замість повного обходу.
+    """
+    if not os.path.isdir(config.IMAGE_DIR):
+        raise FileNotFoundError('Images directory not found.')
+
+    extensions = {ext.lower() for ext in (extensions or config.SUPPORTED_FORMATS)}
+    try:
+        records = get_image_inventory().refresh() if use_index else _scan_images()
+        records = (record for record in records if os.path.splitext(record[0])[1].lower() in extensions)
+        stop = offset + limit if limit is not None else None
+        if sort_by_mtime:
+            # Для сторінки досить купи з offset + limit елементів замість повного сортування
+            if stop is not None:
+                records = iter(heapq.nlargest(stop, records, key=lambda record: record[3]))
+            else:
+                records = iter(sorted(records, key=lambda record: record[3], reverse=True))
+        for filename, size, ctime, mtime in islice(records, offset, stop):
+            yield {
                 "filename": filename,
                 "size": size,
-                "created_at": created_at
-            })
-    return files
+                "created_at": datetime.fromtimestamp(ctime, tz=UTC).isoformat(),
+                "modified_at": datetime.fromtimestamp(mtime, tz=UTC).isoformat()
+            }
+    except PermissionError:
+        raise PermissionError('Permission denied to access images directory.')
+
 
 class FileHandler(FileHandlerInterface):
     pass
 
 
-# print(list_uploaded_images())
\ No newline at end of file
+# print(list(list_uploaded_images()))
\ No newline at end of file
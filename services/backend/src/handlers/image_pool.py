@@ -0,0 +1,180 @@
+"""Per-worker process pool for CPU-bound Pillow work.
+
+Decoding, resizing and re-encoding hold the GIL, so they never run on a
+request thread or the event loop: they are submitted to a ``spawn``
+ProcessPoolExecutor of IMAGE_POOL_WORKERS processes. Tasks read their input
+from and write their output to files and return only paths, so no image
+bytes are pickled between processes.
+
+- Backpressure: at most IMAGE_POOL_MAX_PENDING tasks are queued or running;
+  ``submit()`` beyond that raises ImagePoolBusyError (503), ``submit_background()``
+  drops the task.
+- Timeouts: a task gets IMAGE_POOL_TASK_TIMEOUT seconds. The pool process
+  interrupts it with an interval timer, and a waiting request gives up after
+  the same time (cancelling the task if it hasn't started yet).
+"""
+
+import asyncio
+import multiprocessing
+import signal
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from exceptions.api_errors import ImagePoolBusyError, ImageTaskTimeoutError
+from settings.config import config
+from settings.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def _raise_timeout(signum, frame) -> None:
+    raise TimeoutError("image task time limit exceeded")
+
+
+def _run_with_time_limit(fn: Callable[..., Any], timeout: Optional[float], *args: Any) -> Any:
+    """Run ``fn(*args)`` in a pool process, interrupting it after ``timeout`` seconds."""
+    if not timeout or not hasattr(signal, "setitimer"):
+        return fn(*args)
+    # Задачі виконуються в головному потоці процесу пулу — SIGALRM перерве їх між байткодами
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return fn(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class ImagePool:
+    """Bounded process pool for image tasks of one server worker.
+
+    Attributes:
+        max_workers (int): Number of pool processes.
+        max_pending (int): Tasks that may be queued or running at once.
+        task_timeout (float): Seconds a task may run (and a request may wait for it).
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, task_timeout: float):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.task_timeout = task_timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.timeouts = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Пул створюється ліниво — вже у процесі воркера (prefork), а не в батьківському.
+        # spawn, бо fork із багатопотокового процесу може успадкувати захоплені блокування
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def _try_submit(self, fn: Callable[..., Any], args: tuple) -> Optional[Future]:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return None
+            try:
+                future = self._get_executor().submit(_run_with_time_limit, fn, self.task_timeout, *args)
+            except BrokenProcessPool:
+                # Процес пулу впав — наступна задача створить новий пул
+                self._executor = None
+                future = self._get_executor().submit(_run_with_time_limit, fn, self.task_timeout, *args)
+            self._pending += 1
+            self.submitted += 1
+        future.add_done_callback(self._task_done)
+        return future
+
+    def _task_done(self, future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+            if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+                self._executor = None
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """Queue ``fn(*args)`` (a picklable module-level function) for a request that waits for it.
+
+        Raises:
+            ImagePoolBusyError: If max_pending tasks are already queued or running.
+        """
+        future = self._try_submit(fn, args)
+        if future is None:
+            with self._lock:
+                self.rejected += 1
+            logger.warning("✖ Image pool is full (%s pending), rejecting task", self.max_pending)
+            raise ImagePoolBusyError()
+        return future
+
+    def submit_background(self, fn: Callable[..., Any], *args: Any) -> Optional[Future]:
+        """Queue ``fn(*args)`` that nobody waits for; returns None (task dropped) if the pool is full."""
+        future = self._try_submit(fn, args)
+        if future is None:
+            with self._lock:
+                self.dropped += 1
+        return future
+
+    def _timed_out(self, future: Future) -> ImageTaskTimeoutError:
+        # Ще в черзі — просто не запускати; вже виконується — перерве таймер у процесі пулу
+        future.cancel()
+        with self._lock:
+            self.timeouts += 1
+        return ImageTaskTimeoutError()
+
+    def result(self, future: Future) -> Any:
+        """Wait (blocking) for a task submitted with ``submit()``.
+
+        Raises:
+            ImageTaskTimeoutError: If the task didn't finish within task_timeout.
+            Exception: Whatever the task raised.
+        """
+        try:
+            return future.result(timeout=self.task_timeout)
+        except FutureTimeoutError:
+            raise self._timed_out(future)
+
+    async def result_async(self, future: Future) -> Any:
+        """Asyncio counterpart of result(); waits without blocking the event loop."""
+        try:
+            # shield: скасування очікування не повинне скасовувати спільну задачу (її можуть чекати інші)
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.task_timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out(future)
+
+    def stats(self) -> dict[str, int | float]:
+        """Return the pool's size, load and counters."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "dropped": self.dropped,
+                "timeouts": self.timeouts,
+            }
+
+
+_image_pool: Optional[ImagePool] = None
+_image_pool_lock = threading.Lock()
+
+
+def get_image_pool() -> ImagePool:
+    """Get or create the per-process ImagePool configured from AppConfig."""
+    global _image_pool
+    if _image_pool is None:
+        with _image_pool_lock:
+            if _image_pool is None:
+                _image_pool = ImagePool(
+                    max_workers=config.IMAGE_POOL_WORKERS,
+                    max_pending=config.IMAGE_POOL_MAX_PENDING,
+                    task_timeout=config.IMAGE_POOL_TASK_TIMEOUT
+                )
+    return _image_pool
@@ -0,0 +1,103 @@
+"""Header-only image validation: magic bytes, format, dimensions and EXIF orientation.
+
+``StreamingUpload`` keeps the first PROBE_HEAD_BYTES of every file part in
+memory and probes them before anything is written to disk: the magic bytes
+must match the file extension, Pillow must recognize the header and the
+image must have at most MAX_IMAGE_PIXELS pixels. ``Image.open()`` is lazy,
+so no pixel data is decoded; a file whose header doesn't fit in the head
+(e.g. a JPEG with a large EXIF block) is probed from its temp file once the
+part is complete, still without decoding it.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+from PIL import ExifTags, Image, UnidentifiedImageError
+
+from exceptions.api_errors import ImageTooLargeError, NotSupportedFormatError
+from settings.config import config
+
+# Скільки байтів частини тримати в пам'яті до перевірки (заголовки PNG/GIF і JPEG без великого EXIF)
+PROBE_HEAD_BYTES = 64 * 1024
+SNIFF_BYTES = 12
+
+# Розширення -> формат Pillow, якого вимагають magic bytes
+EXTENSION_FORMATS = {
+    '.jpg': 'JPEG',
+    '.jpeg': 'JPEG',
+    '.png': 'PNG',
+    '.gif': 'GIF',
+    '.webp': 'WEBP'
+}
+
+_SIGNATURES = (
+    (b'\xff\xd8\xff', 'JPEG'),
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (b'GIF87a', 'GIF'),
+    (b'GIF89a', 'GIF')
+)
+
+# Орієнтації EXIF з поворотом на 90°: ширина й висота при показі міняються місцями
+_TRANSPOSED_ORIENTATIONS = frozenset({5, 6, 7, 8})
+
+
+@dataclass(slots=True, frozen=True)
+class ImageInfo:
+    """What the header of an image says about it.
+
+    Attributes:
+        format (str): Pillow format name ("JPEG", "PNG", ...).
+        mime_type (str): MIME type of the format.
+        width (int): Width as displayed, i.e. after applying the EXIF orientation.
+        height (int): Height as displayed.
+        orientation (int): EXIF orientation (1 when absent).
+    """
+    format: str
+    mime_type: str
+    width: int
+    height: int
+    orientation: int = 1
+
+
+def sniff_format(head: bytes) -> Optional[str]:
+    """Return the image format recognized from the magic bytes at the start of ``head``."""
+    for signature, image_format in _SIGNATURES:
+        if head.startswith(signature):
+            return image_format
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'WEBP'
+    return None
+
+
+def expected_format(filename: str) -> Optional[str]:
+    """Return the format the extension of ``filename`` promises, or None if it isn't an image extension."""
+    return EXTENSION_FORMATS.get(os.path.splitext(filename)[1].lower())
+
+
+def probe_image(source: str | BinaryIO) -> ImageInfo:
+    """Read format, dimensions and orientation from the image header without decoding pixels.
+
+    Raises:
+        NotSupportedFormatError: If Pillow doesn't recognize the header.
+        ImageTooLargeError: If the image has more than MAX_IMAGE_PIXELS pixels.
+    """
+    try:
+        with Image.open(source) as image:
+            width, height = image.size
+            image_format = image.format
+            mime_type = image.get_format_mimetype() or Image.MIME.get(image_format, 'application/octet-stream')
+            orientation = 1
+            # getexif() без info["exif"] (напр. PNG без eXIf до IDAT) декодує все зображення
+            if 'exif' in image.info:
+                orientation = image.getexif().get(ExifTags.Base.Orientation, 1)
+    except Image.DecompressionBombError:
+        raise ImageTooLargeError(config.MAX_IMAGE_PIXELS)
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError, EOFError):
+        raise NotSupportedFormatError(config.SUPPORTED_FORMATS)
+
+    if width * height > config.MAX_IMAGE_PIXELS:
+        raise ImageTooLargeError(config.MAX_IMAGE_PIXELS)
+    if orientation in _TRANSPOSED_ORIENTATIONS:
+        width, height = height, width
+    return ImageInfo(image_format, mime_type, width, height, orientation)
@@ -0,0 +1,151 @@
+"""Incremental inventory of the images in IMAGE_DIR.
+
+A full inventory stats every file. The index instead remembers, per
+directory, its mtime and the stat results of its files, and is persisted as
+a JSON snapshot (IMAGE_INVENTORY_PATH). On refresh every directory is
+stat'ed once: an unchanged mtime means no file was added, removed or renamed
+there, so its cached entries are reused as is; a changed directory is
+re-read with ``os.scandir()`` and only names new since the last snapshot are
+stat'ed.
+
+This relies on uploaded files never being rewritten in place (every upload
+gets a unique name), so a known name keeps its size and times.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Iterator, Optional
+
+from settings.config import config
+from settings.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+INVENTORY_VERSION = 1
+
+# Зміна каталогу в ту ж мить, що й знімок, може не змінити mtime — такий каталог перечитуємо
+_RACY_WINDOW_NS = 1_000_000_000
+
+# (filename, size, ctime, mtime)
+ImageRecord = tuple[str, int, float, float]
+
+
+class ImageInventory:
+    """Per-directory index of the image files under ``root``, persisted to ``index_path``.
+
+    Attributes:
+        root (str): Directory being indexed (IMAGE_DIR).
+        index_path (str): Path of the JSON snapshot.
+        stat_calls (int): Files stat'ed by the last refresh.
+    """
+
+    def __init__(self, root: str, index_path: str):
+        self.root = root
+        self.index_path = index_path
+        self.stat_calls = 0
+        self._dirs: dict[str, dict[str, Any]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Load the snapshot; a missing, stale or corrupt one just means a full scan."""
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+            if snapshot.get('version') == INVENTORY_VERSION and snapshot.get('root') == self.root:
+                self._dirs = snapshot['dirs']
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, AttributeError) as e:
+            logger.warning("✖ Ignoring unreadable inventory %s: %s", self.index_path, e)
+        self._loaded = True
+
+    def save(self) -> None:
+        """Write the snapshot atomically (temp file + rename next to it)."""
+        directory = os.path.dirname(self.index_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.inventory-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': INVENTORY_VERSION, 'root': self.root, 'dirs': self._dirs}, f,
+                          separators=(',', ':'))
+            os.replace(tmp_path, self.index_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def refresh(self) -> list[ImageRecord]:
+        """Bring the index up to date with the disk, save it and return all records."""
+        with self._lock:
+            if not self._loaded:
+                self.load()
+            self.stat_calls = 0
+
+            dirs = {}
+            pending = ['']
+            while pending:
+                rel_dir = pending.pop()
+                try:
+                    dir_stat = os.stat(os.path.join(self.root, rel_dir))
+                except FileNotFoundError:
+                    continue
+                record = self._dirs.get(rel_dir)
+                if (record is None or record['mtime_ns'] != dir_stat.st_mtime_ns
+                        or dir_stat.st_mtime_ns >= record['scanned_ns'] - _RACY_WINDOW_NS):
+                    record = self._scan_dir(rel_dir, dir_stat.st_mtime_ns, record)
+                dirs[rel_dir] = record
+                pending.extend(os.path.join(rel_dir, name) for name in record['dirs'])
+
+            changed = dirs != self._dirs
+            self._dirs = dirs
+            if changed:
+                try:
+                    self.save()
+                except OSError as e:
+                    logger.warning("✖ Failed to save inventory %s: %s", self.index_path, e)
+            return list(self._records())
+
+    def _scan_dir(self, rel_dir: str, mtime_ns: int, previous: Optional[dict[str, Any]]) -> dict[str, Any]:
+        known = previous['files'] if previous else {}
+        scanned_ns = time.time_ns()
+        files, subdirs = {}, []
+        with os.scandir(os.path.join(self.root, rel_dir)) as entries:
+            for entry in entries:
+                # Службові .blobs/.variants/.inventory і тимчасові .upload-* не індексуємо
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    elif entry.is_file(follow_symlinks=False):
+                        info = known.get(entry.name)
+                        if info is None:
+                            stat = entry.stat(follow_symlinks=False)
+                            info = [stat.st_size, stat.st_ctime, stat.st_mtime]
+                            self.stat_calls += 1
+                        files[entry.name] = info
+                except FileNotFoundError:
+                    continue
+        return {'mtime_ns': mtime_ns, 'scanned_ns': scanned_ns, 'files': files, 'dirs': subdirs}
+
+    def _records(self) -> Iterator[ImageRecord]:
+        for record in self._dirs.values():
+            for name, (size, ctime, mtime) in record['files'].items():
+                yield name, size, ctime, mtime
+
+
+_inventory: Optional[ImageInventory] = None
+_inventory_lock = threading.Lock()
+
+
+def get_image_inventory() -> ImageInventory:
+    """Get or create the per-process ImageInventory of IMAGE_DIR."""
+    global _inventory
+    if _inventory is None:
+        with _inventory_lock:
+            if _inventory is None:
+                _inventory = ImageInventory(config.IMAGE_DIR, config.IMAGE_INVENTORY_PATH)
+    return _inventory
@@ -0,0 +1,159 @@
+"""On-disk layout of uploaded images.
+
+Uploads are fanned out over IMAGE_SHARD_DEPTH levels of two-hex-digit
+directories taken from a hash of the filename, e.g. ``3f/a9/cat_<uuid>.png``,
+so no directory grows past a few thousand entries. The shard depends on the
+name alone, so the DB keeps storing bare filenames and every path is computed
+on the fly. IMAGE_SHARD_DEPTH=0 keeps the old flat layout.
+
+Files uploaded before sharding stay readable in the flat layout:
+``resolve_image_path()`` falls back to ``IMAGE_DIR/<name>``. They can be moved
+online, in batches, while the server keeps serving them:
+
+Usage:
+    python -m handlers.layout [--batch-size N] [--pause SECONDS]
+"""
+
+import argparse
+import hashlib
+import os
+import time
+from typing import Iterator
+
+from settings.config import config
+from settings.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+SHARD_WIDTH = 2
+
+
+def shard_dir(filename: str) -> str:
+    """Return the shard directory of ``filename`` relative to IMAGE_DIR ('' when flat)."""
+    if config.IMAGE_SHARD_DEPTH <= 0:
+        return ''
+    digest = hashlib.md5(filename.encode(), usedforsecurity=False).hexdigest()
+    return os.path.join(*(digest[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(config.IMAGE_SHARD_DEPTH)))
+
+
+def image_path(filename: str) -> str:
+    """Return where ``filename`` is stored in the current layout (new uploads go here)."""
+    return os.path.join(config.IMAGE_DIR, shard_dir(filename), filename)
+
+
+def legacy_image_path(filename: str) -> str:
+    """Return the flat-layout path of ``filename``."""
+    return os.path.join(config.IMAGE_DIR, filename)
+
+
+def resolve_image_path(filename: str) -> str:
+    """Return the path of an existing image, checking the sharded layout first, then the flat one.
+
+    If the image exists in neither, returns its sharded path.
+    """
+    path = image_path(filename)
+    if config.IMAGE_SHARD_DEPTH > 0 and not os.path.exists(path):
+        legacy_path = legacy_image_path(filename)
+        if os.path.exists(legacy_path):
+            return legacy_path
+    return path
+
+
+def iter_image_entries(root: str | None = None) -> Iterator[os.DirEntry]:
+    """Yield a DirEntry per regular file in both layouts.
+
+    Dot-directories (``.blobs``, ``.variants``) are skipped; dot-files (temp
+    ``.upload-*`` files) are yielded.
+    """
+    root = root or config.IMAGE_DIR
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        yield entry
+                    elif entry.is_dir(follow_symlinks=False) and not entry.name.startswith('.'):
+                        yield from iter_image_entries(entry.path)
+                except FileNotFoundError:
+                    continue
+    except FileNotFoundError:
+        return
+
+
+def _flat_files() -> Iterator[str]:
+    try:
+        with os.scandir(config.IMAGE_DIR) as entries:
+            for entry in entries:
+                if not entry.name.startswith('.') and entry.is_file(follow_symlinks=False):
+                    yield entry.name
+    except FileNotFoundError:
+        return
+
+
+def move_to_shard(filename: str) -> bool:
+    """Move a flat-layout image into its shard.
+
+    The file is linked into the shard before the flat name is removed, so
+    at every moment one of the two paths exists and readers never miss it.
+
+    Returns:
+        bool: True if the file was moved, False if it was already gone.
+    """
+    source = legacy_image_path(filename)
+    target = image_path(filename)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except FileExistsError:
+        pass
+    except FileNotFoundError:
+        return False
+    except OSError:
+        # Без жорстких посилань — атомарне перейменування в межах тієї ж ФС
+        try:
+            os.replace(source, target)
+        except FileNotFoundError:
+            return False
+        return True
+    try:
+        os.unlink(source)
+    except FileNotFoundError:
+        pass
+    return True
+
+
+def migrate_to_shards(batch_size: int = 1000, pause: float = 0.0) -> int:
+    """Move every flat-layout image into the sharded layout, ``batch_size`` files at a time.
+
+    Returns:
+        int: Number of moved files.
+    """
+    if config.IMAGE_SHARD_DEPTH <= 0:
+        logger.warning("IMAGE_SHARD_DEPTH is 0, nothing to migrate")
+        return 0
+
+    moved = 0
+    batch = []
+    files = _flat_files()
+    while True:
+        batch.clear()
+        for filename in files:
+            batch.append(filename)
+            if len(batch) == batch_size:
+                break
+        if not batch:
+            break
+        moved += sum(1 for filename in batch if move_to_shard(filename))
+        logger.info("✓ Moved %s images into shards", moved)
+        # Пауза між пачками — щоб міграція не забирала весь диск у живого сервера
+        if pause:
+            time.sleep(pause)
+    return moved
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Move flat-layout images in IMAGE_DIR into shards.")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--pause', type=float, default=0.0, help="seconds to sleep between batches")
+    args = parser.parse_args()
+    migrate_to_shards(args.batch_size, args.pause)
@@ -0,0 +1,115 @@
+"""Precompression of frontend assets.
+
+Writes ``.gz`` (and ``.br`` when the optional ``brotli`` package is installed)
+variants of compressible files under FRONTEND_DIR, so the servers can pick a
+variant by Accept-Encoding without compressing anything per request.
+
+Runs at startup (STATIC_PRECOMPRESS_ON_STARTUP) or as a build step:
+
+Usage:
+    python -m handlers.precompress [source_dir]
+"""
+
+import gzip
+import os
+import sys
+import tempfile
+from typing import Callable, Optional
+
+from handlers.static import COMPRESSIBLE_EXTENSIONS, FRONTEND_DIR, precompressed_path
+from settings.logging_config import get_logger
+
+try:
+    import brotli
+except ImportError:  # brotli — необов'язкова залежність, без неї лише .gz
+    brotli = None
+
+logger = get_logger(__name__)
+
+# Дрібні файли не варто стискати — заголовки з'їдять виграш
+MIN_COMPRESS_SIZE = 256
+
+
+def _compressors() -> dict[str, Callable[[bytes], bytes]]:
+    compressors = {'gzip': lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressors['br'] = lambda data: brotli.compress(data, quality=11)
+    return compressors
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.precompress-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def precompress_file(path: str, root: str = FRONTEND_DIR) -> int:
+    """Write missing or stale compressed variants of one file.
+
+    A variant is kept only if it is smaller than the source.
+
+    Returns:
+        int: Number of variants written.
+    """
+    source_stat = os.stat(path)
+    if source_stat.st_size < MIN_COMPRESS_SIZE:
+        return 0
+
+    data = None
+    written = 0
+    for encoding, compress in _compressors().items():
+        variant = precompressed_path(path, encoding, root)
+        try:
+            if os.stat(variant).st_mtime_ns >= source_stat.st_mtime_ns:
+                continue
+        except FileNotFoundError:
+            pass
+
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+
+        compressed = compress(data)
+        if len(compressed) < len(data):
+            _write_atomic(variant, compressed)
+            written += 1
+        elif os.path.exists(variant):
+            os.remove(variant)
+    return written
+
+
+def precompress_directory(source_dir: str = FRONTEND_DIR) -> dict[str, int]:
+    """Precompress every compressible file under ``source_dir``.
+
+    Returns:
+        dict[str, int]: Number of files scanned and variants written.
+    """
+    scanned = written = 0
+    for root, _, files in os.walk(source_dir):
+        for name in files:
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            scanned += 1
+            written += precompress_file(os.path.join(root, name), source_dir)
+
+    logger.info("Precompressed static assets in %s: %s files, %s variants written", source_dir, scanned, written)
+    return {"scanned": scanned, "written": written}
+
+
+def precompress_on_startup(source_dir: str = FRONTEND_DIR) -> Optional[dict[str, int]]:
+    """Run precompress_directory() without letting failures stop the server."""
+    try:
+        return precompress_directory(source_dir)
+    except OSError as e:
+        logger.warning("✖ Failed to precompress static assets: %s", e)
+        return None
+
+
+if __name__ == '__main__':
+    precompress_directory(sys.argv[1] if len(sys.argv) > 1 else FRONTEND_DIR)
@@ -0,0 +1,196 @@
+"""Background removal of deleted images and reconciliation of IMAGE_DIR with the DB.
+
+Deletes only mark rows with ``deleted_at`` (see ``init-sql/040_images_tombstones.sql``),
+so a DELETE request costs one UPDATE. The reaper, a separate process started by
+``app.run()`` when REAPER_ENABLED is set, then purges tombstones in batches of
+REAPER_BATCH_SIZE: one statement removes the rows and releases their blobs, and
+the files are unlinked in parallel on the batch thread pool.
+
+Every RECONCILE_INTERVAL seconds it also reconciles the disk with the DB:
+
+- files in IMAGE_DIR without a row (crashed uploads, leftover ``.upload-*`` temp
+  files) are removed once they are older than RECONCILE_GRACE_SECONDS;
+- live rows whose file is gone are soft-deleted;
+- blobs without an ``image_blobs`` row are removed.
+
+IMAGE_DIR (both layouts, see ``handlers.layout``) is walked with ``os.scandir()`` and the DB is checked in batches,
+so neither side is loaded into memory at once.
+
+Usage:
+    python -m handlers.reaper [--reconcile]
+"""
+
+import os
+import sys
+import time
+from multiprocessing import Process, current_process
+from typing import Callable, Iterator
+
+from db.dependencies import get_image_repository
+from exceptions.repository_errors import RepositoryError
+from handlers.batch import get_batch_executor
+from handlers.layout import iter_image_entries
+from handlers.static import media_path
+from handlers.upload import BLOB_DIR_NAME, remove_blob
+from interfaces.repositories import ImageRepository
+from settings.config import config
+from settings.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Скільки імен перевіряти в БД одним запитом під час звірки
+RECONCILE_BATCH_SIZE = 1000
+
+
+def _remove_file(filename: str) -> bool:
+    """Unlink the file of a purged image; a missing file counts as removed."""
+    try:
+        os.remove(media_path(filename))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.error("✖ Failed to delete file %s: %s", filename, e)
+        return False
+    return True
+
+
+def reap_once(repository: ImageRepository, limit: int) -> int:
+    """Purge one batch of soft-deleted images: rows, files and orphaned blobs.
+
+    Returns:
+        int: Number of purged images.
+    """
+    purged = repository.purge_deleted(limit)
+    if not purged:
+        return 0
+
+    filenames = [filename for filename, _ in purged]
+    failed = sum(1 for removed in get_batch_executor().map(_remove_file, filenames) if not removed)
+    for content_hash in {content_hash for _, content_hash in purged if content_hash is not None}:
+        remove_blob(content_hash)
+
+    logger.info("✓ Reaper purged %s images (%s files could not be removed)", len(purged), failed)
+    return len(purged)
+
+
+def reap(repository: ImageRepository, limit: int) -> int:
+    """Purge soft-deleted images batch by batch until none are left.
+
+    Returns:
+        int: Number of purged images.
+    """
+    total = 0
+    while True:
+        purged = reap_once(repository, limit)
+        total += purged
+        if purged < limit:
+            return total
+
+
+def _batched(items: Iterator[str], size: int) -> Iterator[list[str]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _stale_files(entries: Iterator[os.DirEntry], grace_seconds: float) -> Iterator[str]:
+    """Yield names of the files last modified more than ``grace_seconds`` ago."""
+    cutoff = time.time() - grace_seconds
+    for entry in entries:
+        try:
+            if entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                yield entry.name
+        except FileNotFoundError:
+            continue
+
+
+def _blob_entries() -> Iterator[os.DirEntry]:
+    try:
+        with os.scandir(os.path.join(config.IMAGE_DIR, BLOB_DIR_NAME)) as entries:
+            yield from (entry for entry in entries if entry.is_file(follow_symlinks=False))
+    except FileNotFoundError:
+        return
+
+
+def _remove_unknown(entries: Iterator[os.DirEntry], grace_seconds: float,
+                    known: Callable[[list[str]], set[str]], remove: Callable[[str], None]) -> int:
+    removed = 0
+    for batch in _batched(_stale_files(entries, grace_seconds), RECONCILE_BATCH_SIZE):
+        for name in set(batch) - known(batch):
+            remove(name)
+            removed += 1
+    return removed
+
+
+def _remove_orphan_file(filename: str) -> None:
+    try:
+        os.remove(media_path(filename))
+        logger.info("✓ Removed orphaned file: %s", filename)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.error("✖ Failed to delete orphaned file %s: %s", filename, e)
+
+
+def reconcile(repository: ImageRepository, grace_seconds: float) -> dict[str, int]:
+    """Bring IMAGE_DIR and the DB back in line after crashes or manual changes.
+
+    Returns:
+        dict[str, int]: Counts of removed orphaned files, soft-deleted rows without a file
+        and removed orphaned blobs.
+    """
+    # Файли без рядка (тимчасові .upload-* теж ніколи не мають рядка)
+    orphan_files = _remove_unknown(iter_image_entries(), grace_seconds,
+                                   repository.existing_filenames, _remove_orphan_file)
+
+    # Рядки без файлу: курсор на сервері, щоб не тягнути всю таблицю в пам'ять
+    missing = (filename for filename in repository.iter_filenames(RECONCILE_BATCH_SIZE)
+               if not os.path.exists(media_path(filename)))
+    missing_rows = 0
+    for batch in _batched(missing, RECONCILE_BATCH_SIZE):
+        missing_rows += len(repository.delete_many(filenames=batch))
+
+    # Blob без рядка в image_blobs
+    orphan_blobs = _remove_unknown(_blob_entries(), grace_seconds,
+                                   repository.existing_blobs, remove_blob)
+
+    result = {"orphan_files": orphan_files, "missing_rows": missing_rows, "orphan_blobs": orphan_blobs}
+    logger.info("✓ Reconciled %s: %s", config.IMAGE_DIR, result)
+    return result
+
+
+def run_reaper() -> None:
+    """Reaper process loop: purge tombstones every REAPER_INTERVAL, reconcile every RECONCILE_INTERVAL."""
+    current_process().name = "reaper"
+    repository = get_image_repository()
+    last_reconcile = time.monotonic()
+
+    while True:
+        try:
+            reap(repository, config.REAPER_BATCH_SIZE)
+            if config.RECONCILE_INTERVAL and time.monotonic() - last_reconcile >= config.RECONCILE_INTERVAL:
+                reconcile(repository, config.RECONCILE_GRACE_SECONDS)
+                last_reconcile = time.monotonic()
+        except RepositoryError as e:
+            logger.error("✖ Reaper pass failed: %s", e.message)
+        time.sleep(config.REAPER_INTERVAL)
+
+
+def start_reaper() -> Process:
+    """Start the reaper in its own process, next to the server workers."""
+    process = Process(target=run_reaper)
+    process.start()
+    logger.info("Reaper started")
+    return process
+
+
+if __name__ == '__main__':
+    _repository = get_image_repository()
+    reap(_repository, config.REAPER_BATCH_SIZE)
+    if '--reconcile' in sys.argv[1:]:
+        reconcile(_repository, config.RECONCILE_GRACE_SECONDS)
@@ -0,0 +1,54 @@
+"""JSON response bodies shared by both server engines.
+
+Bodies are encoded with orjson when it is installed (several times faster on
+lists of dicts, UTF-8 output like ``ensure_ascii=False``) and with the stdlib
+encoder otherwise.
+
+``/api/files`` pages carry a strong ETag of the encoded body, so a client
+that polls an unchanged page gets a bodyless 304.
+"""
+
+import hashlib
+import json
+from typing import Any, Optional
+
+from db.dto import ImageDetailsDTO
+from handlers.static import is_not_modified
+
+try:
+    import orjson
+except ImportError:  # orjson — необов'язкова залежність, без неї stdlib json
+    orjson = None
+
+
+def dumps(payload: Any) -> bytes:
+    """Encode ``payload`` as compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def body_etag(body: bytes) -> str:
+    """Build a strong ETag from a digest of the response body."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def files_page_response(files: list[ImageDetailsDTO], total_count: int, next_cursor: Optional[str],
+                        if_none_match: Optional[str]) -> tuple[int, dict[str, str], bytes]:
+    """Build the ``/api/files`` response: (status, headers, body).
+
+    Returns 304 with an empty body when ``if_none_match`` matches the page's ETag.
+    """
+    body = dumps({
+        # width/height — щоб галерея розклала сторінку до завантаження мініатюр
+        "items": [{"filename": img.filename, "display_name": img.display_name, "width": img.width, "height": img.height}
+                  for img in files],
+        "totalCount": total_count,
+        "nextCursor": next_cursor
+    })
+    etag = body_etag(body)
+    # no-cache: браузер може тримати сторінку, але щоразу перевіряє її через If-None-Match
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if is_not_modified(if_none_match, None, etag, 0):
+        return 304, headers, b""
+    return 200, {"Content-Type": "application/json", **headers}, body
@@ -0,0 +1,291 @@
+"""Static content lookup shared by the server engines.
+
+Maps request paths to files on disk (HTML pages, frontend assets and uploaded
+images) and to their content types, and works out validators (ETag,
+Last-Modified), conditional GET and byte ranges for file responses.
+"""
+
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Callable, Optional
+
+from exceptions.api_errors import RangeNotSatisfiableError
+from handlers.layout import resolve_image_path
+from settings.config import config
+
+FRONTEND_DIR = '/usr/src/frontend'
+
+HTML_PAGES = {
+    '/': 'index.html',
+    '/images/': 'images.html',
+    '/upload/': 'upload.html',
+}
+
+IMAGE_CONTENT_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp'
+}
+
+STATIC_CONTENT_TYPES = {
+    '.css': 'text/css',
+    '.js': 'application/javascript',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.svg': 'image/svg+xml',
+    '.gif': 'image/gif'
+}
+
+
+COMPRESSIBLE_EXTENSIONS = {'.html', '.css', '.js', '.svg', '.json'}
+
+# Суфікси попередньо стиснених варіантів у порядку переваги
+ENCODING_SUFFIXES = {
+    'br': '.br',
+    'gzip': '.gz'
+}
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# style.3f2a9c1b.css, app.5d41402abc4b2a76.js
+_FINGERPRINT_RE = re.compile(r'\.[0-9a-f]{8,}\.[a-z0-9]+$', re.IGNORECASE)
+
+
+def get_content_type(path: str, content_types: dict[str, str]) -> str:
+    """Return the content type for ``path`` by its extension."""
+    ext = os.path.splitext(path)[1].lower()
+    return content_types.get(ext) or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+
+def page_path(request_path: str) -> Optional[str]:
+    """Return the HTML file for a page route, or None if it is not a page."""
+    page = HTML_PAGES.get(request_path)
+    return os.path.join(FRONTEND_DIR, page) if page else None
+
+
+def media_path(image_name: str) -> str:
+    """Return the on-disk path of an uploaded image (sharded or flat layout, see ``handlers.layout``)."""
+    return resolve_image_path(image_name)
+
+
+def frontend_path(asset: str) -> str:
+    """Return the on-disk path of a frontend asset."""
+    return os.path.join(FRONTEND_DIR, asset)
+
+
+def precompressed_path(path: str, encoding: str, root: str = FRONTEND_DIR) -> str:
+    """Return where the ``encoding`` variant of a static file is stored.
+
+    Variants live next to the source file unless STATIC_PRECOMPRESSED_DIR is set,
+    in which case they mirror the ``root`` tree there (FRONTEND_DIR is mounted read-only).
+    """
+    suffix = ENCODING_SUFFIXES[encoding]
+    if config.STATIC_PRECOMPRESSED_DIR:
+        return os.path.join(config.STATIC_PRECOMPRESSED_DIR, os.path.relpath(path, root)) + suffix
+    return path + suffix
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> list[str]:
+    """Return the precompressed encodings the client accepts, best first."""
+    if not accept_encoding:
+        return []
+
+    qualities = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name.strip().lower()] = quality
+
+    wildcard = qualities.get('*', 0.0)
+    return [encoding for encoding in ENCODING_SUFFIXES if qualities.get(encoding, wildcard) > 0]
+
+
+def select_static_variant(path: str, accept_encoding: Optional[str]) -> tuple[str, dict[str, str]]:
+    """Pick the precompressed variant of a frontend file the client can take.
+
+    Args:
+        path (str): Source file on disk.
+        accept_encoding (Optional[str]): The request's Accept-Encoding header.
+
+    Returns:
+        tuple[str, dict[str, str]]: File to send and the extra response headers
+        (Content-Encoding, Vary, Cache-Control).
+    """
+    headers = {}
+    if _FINGERPRINT_RE.search(os.path.basename(path)):
+        headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+
+    if os.path.splitext(path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+        return path, headers
+
+    headers['Vary'] = 'Accept-Encoding'
+    encodings = accepted_encodings(accept_encoding)
+    if not encodings:
+        return path, headers
+
+    source_mtime = os.stat(path).st_mtime_ns
+    for encoding in encodings:
+        variant = precompressed_path(path, encoding)
+        try:
+            # Застарілий варіант (старіший за джерело) ігноруємо
+            if os.stat(variant).st_mtime_ns >= source_mtime:
+                headers['Content-Encoding'] = encoding
+                return variant, headers
+        except FileNotFoundError:
+            continue
+    return path, headers
+
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+@dataclass
+class FileResponse:
+    """Status, headers and byte span to send for a file.
+
+    Attributes:
+        status (int): 200, 206, 304 or 416.
+        headers (dict[str, str]): Response headers, including Content-Length.
+        offset (int): First byte of the file to send.
+        length (int): Number of bytes to send (0 for 304/416).
+    """
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)
+    offset: int = 0
+    length: int = 0
+
+
+def file_etag(st: os.stat_result) -> str:
+    """Build a weak ETag from inode, mtime and size."""
+    return f'W/"{st.st_ino:x}-{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def is_not_modified(if_none_match: Optional[str], if_modified_since: Optional[str], etag: str, mtime: float) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against the file validators.
+
+    If-None-Match takes precedence; If-Modified-Since is only used without it.
+    """
+    if if_none_match:
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return '*' in tags or etag.removeprefix('W/') in tags
+
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since.timestamp()
+
+    return False
+
+
+def if_range_matches(if_range: str, etag: str, last_modified: str) -> bool:
+    """Check an If-Range value against the file validators.
+
+    If-Range needs a strong comparison (RFC 9110, 13.1.5): a weak entity tag
+    on either side never matches, so the full file is sent; a date must equal
+    Last-Modified exactly.
+    """
+    if_range = if_range.strip()
+    if if_range.startswith(('W/', '"')):
+        return not if_range.startswith('W/') and not etag.startswith('W/') and if_range == etag
+    return if_range == last_modified
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """Parse a single ``bytes=`` range into an inclusive (start, end) pair.
+
+    Returns None when there is no usable range (absent, malformed or
+    multi-range), in which case the full file is sent.
+
+    Raises:
+        RangeNotSatisfiableError: If the range lies outside the file.
+    """
+    if not range_header:
+        return None
+
+    match = _RANGE_RE.match(range_header.strip())
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # bytes=-N — останні N байтів
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiableError(size)
+        return max(size - suffix, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiableError(size)
+    return start, min(end, size - 1)
+
+
+def file_headers(st: os.stat_result, content_type: str) -> dict[str, str]:
+    """Build the full-response headers (type, length and validators) for a file."""
+    return {
+        "Content-Type": content_type,
+        "Content-Length": str(st.st_size),
+        "Accept-Ranges": "bytes",
+        "ETag": file_etag(st),
+        "Last-Modified": formatdate(st.st_mtime, usegmt=True)
+    }
+
+
+def prepare_file_response(st: os.stat_result, content_type: str,
+                          get_header: Callable[[str], Optional[str]],
+                          headers: Optional[dict[str, str]] = None) -> FileResponse:
+    """Work out the response for a file from its stat and the request headers.
+
+    Args:
+        st (os.stat_result): Result of stat/fstat on the opened file.
+        content_type (str): Content-Type to send.
+        get_header (Callable[[str], Optional[str]]): Case-insensitive request header lookup.
+        headers (Optional[dict[str, str]]): Precomputed file_headers() (e.g. from the file cache).
+
+    Returns:
+        FileResponse: Status, headers and byte span to send.
+    """
+    headers = dict(headers or file_headers(st, content_type))
+    etag = headers["ETag"]
+    last_modified = headers["Last-Modified"]
+    validators = {"ETag": etag, "Last-Modified": last_modified}
+
+    if is_not_modified(get_header('If-None-Match'), get_header('If-Modified-Since'), etag, st.st_mtime):
+        return FileResponse(status=304, headers=validators)
+
+    range_header = get_header('Range')
+    if_range = get_header('If-Range')
+    if if_range and not if_range_matches(if_range, etag, last_modified):
+        # Файл змінився з моменту першого запиту (або ETag слабкий) — віддаємо повністю
+        range_header = None
+
+    try:
+        byte_range = parse_range(range_header, st.st_size)
+    except RangeNotSatisfiableError:
+        return FileResponse(status=416, headers={"Content-Range": f"bytes */{st.st_size}", "Content-Length": "0"})
+
+    if byte_range is None:
+        return FileResponse(status=200, headers=headers, offset=0, length=st.st_size)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{st.st_size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return FileResponse(status=206, headers=headers, offset=start, length=end - start + 1)
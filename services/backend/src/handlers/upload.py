@@ -1,45 +1,535 @@
+import hashlib
+import io
 import os
+import re
+import tempfile
+import unicodedata
 import uuid
 import shutil
-from typing import cast
+from contextlib import suppress
+from dataclasses import dataclass
+from time import perf_counter
+from typing import BinaryIO
 
-from PIL import  Image, UnidentifiedImageError
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
 
-from services.backend.src.settings.config import config
-from services.backend.src.exceptions.api_errors import NotSupportedFormatError, MaxSizeExceedError
-from services.backend.src.interfaces.protocols import SupportsWrite
+from handlers.image_probe import (
+    PROBE_HEAD_BYTES,
+    SNIFF_BYTES,
+    ImageInfo,
+    expected_format,
+    probe_image,
+    sniff_format
+)
+from handlers.layout import image_path
+from metrics.registry import observe_phase
+from settings.config import config
+from settings.logging_config import get_logger
+from exceptions.api_errors import (
+    APIError,
+    FileSaveError,
+    ImageTooLargeError,
+    InvalidContentLengthError,
+    LengthRequiredError,
+    MalformedUploadError,
+    MaxSizeExceedError,
+    MissingFileError,
+    MultipleFilesUploadError,
+    NotSupportedFormatError,
+    TooManyFilesError
+)
 
-def handle_uploaded_file(file) -> dict[str, str]:
-    filename = file.file_name.decode("utf-8") if file.file_name else "uploaded_file"
-    ext = os.path.splitext(filename)[1].lower()
+logger = get_logger(__name__)
 
-    if ext not in config.SUPPORTED_FORMATS:
-        raise NotSupportedFormatError(config.SUPPORTED_FORMATS)
+# Запас на boundary, заголовки частин і текстові поля понад MAX_FILE_SIZE
+MULTIPART_OVERHEAD = 64 * 1024
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Спільні за вмістом файли (sha256) усередині IMAGE_DIR — для жорстких посилань потрібна та сама ФС
+BLOB_DIR_NAME = '.blobs'
 
-    file.file_object.seek(0, os.SEEK_END)
-    size = file.file_object.tell()
-    file.file_object.seek(0)
 
-    if size > config.MAX_FILE_SIZE:
-        raise MaxSizeExceedError(config.MAX_FILE_SIZE)
+def sanitize_filename(name: str) -> str:
+    # Перетворюємо кирилицю та інші символи у латиницю (якщо можливо)
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    # Замінюємо все, що не букви/цифри/дефіс/підкреслення, на "_"
+    name = re.sub(r'[^a-zA-Z0-9_-]', '_', name)
+    return name
+
+
+def blob_path(content_hash: str) -> str:
+    """Return the path of the content-addressed blob for a SHA-256 hex digest."""
+    return os.path.join(config.IMAGE_DIR, BLOB_DIR_NAME, content_hash)
+
+
+def store_blob(tmp_path: str, content_hash: str, file_path: str) -> bool:
+    """Make file_path a hard link to the blob with the given content hash.
+
+    If the blob already exists the freshly written temp file is discarded, so
+    a duplicate upload costs one directory entry instead of another copy.
+    Otherwise the temp file becomes the blob. Every uploaded file name stays
+    a regular file in IMAGE_DIR, so serving by name works as before.
 
+    Args:
+        tmp_path: Fully written temp file with the uploaded content.
+        content_hash: SHA-256 hex digest of that content.
+        file_path: Final path of the uploaded file.
+
+    Returns:
+        bool: True if the content was already stored (a duplicate upload).
+
+    Raises:
+        OSError: If the blob or the link can't be created.
+    """
+    path = blob_path(content_hash)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
     try:
-        image = Image.open(file.file_object)
-        image.verify()
-        file.file_object.seek(0)
-    except (UnidentifiedImageError, OSError):
-        raise NotSupportedFormatError(config.SUPPORTED_FORMATS)
-
-    original_name = os.path.splitext(filename)[0].lower()
-    unique_name = f"{original_name}_{uuid.uuid4()}{ext}"
-    os.makedirs(config.IMAGE_DIR, exist_ok=True)
-    file_path = os.path.join(config.IMAGE_DIR, unique_name)
-
-    with open(file_path, 'wb') as f:
-        file.file_object.seek(0)
-        shutil.copyfileobj(file.file_object, cast(SupportsWrite, f))
-
-    return {
-        "filename": unique_name,
-        "url": f'/images/{unique_name}'
-    }
\ No newline at end of file
+        _link_or_copy(path, file_path)
+    except FileNotFoundError:
+        os.replace(tmp_path, path)
+        _link_or_copy(path, file_path)
+        return False
+
+    os.unlink(tmp_path)
+    return True
+
+
+def remove_blob(content_hash: str) -> None:
+    """Delete a blob whose last reference is gone; a missing blob is ignored."""
+    with suppress(FileNotFoundError):
+        os.remove(blob_path(content_hash))
+        logger.info("Removed unreferenced blob: %s", content_hash)
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    try:
+        os.link(src, dst)
+    except FileNotFoundError:
+        raise
+    except OSError as e:
+        # Файлова система без жорстких посилань — окрема копія замість посилання
+        logger.warning("Hard link failed (%s), copying %s", e, src)
+        shutil.copyfile(src, dst)
+
+
+def parse_content_length(value: str | None) -> int | None:
+    """Parse a Content-Length header value; None if the header is missing.
+
+    Raises:
+        InvalidContentLengthError: If the value is not a non-negative integer.
+    """
+    if value is None:
+        return None
+    value = value.strip()
+    # int() прийняв би й "+5", "1_000" чи " 5 " — у заголовку дозволені лише цифри
+    if not value.isdigit() or not value.isascii():
+        raise InvalidContentLengthError()
+    return int(value)
+
+
+def check_content_length(content_length: int | None, max_files: int = 1) -> None:
+    """Reject an upload by its Content-Length before any of the body is read.
+
+    Args:
+        content_length: Value of the Content-Length header, None if it is missing.
+        max_files: Number of files the request may carry.
+
+    Raises:
+        LengthRequiredError: If the request has no Content-Length.
+        MaxSizeExceedError: If the body can't fit max_files files of MAX_FILE_SIZE plus multipart framing.
+    """
+    if content_length is None:
+        raise LengthRequiredError()
+    if content_length > max_files * config.MAX_FILE_SIZE + MULTIPART_OVERHEAD:
+        logger.warning("Request body too large: %d bytes", content_length)
+        raise MaxSizeExceedError(config.MAX_FILE_SIZE)
+
+
+@dataclass
+class UploadPart:
+    """A file part of a multipart body, streamed into a temp file in IMAGE_DIR.
+
+    Attributes:
+        filename (str): Client-side file name from Content-Disposition.
+        tmp_path (str | None): Temp file with the content until the part is saved or discarded.
+        size (int): Number of bytes received.
+        content_hash (str | None): SHA-256 hex digest, set once the part is complete.
+        width (int | None): Displayed width from the image header (see handlers.image_probe).
+        height (int | None): Displayed height from the image header.
+        mime_type (str | None): MIME type of the format the header was recognized as.
+        error (APIError | None): Why the part was rejected (batch uploads only).
+    """
+    filename: str
+    tmp_path: str | None = None
+    size: int = 0
+    content_hash: str | None = None
+    width: int | None = None
+    height: int | None = None
+    mime_type: str | None = None
+    error: APIError | None = None
+
+
+class StreamingUpload:
+    """Incremental multipart/form-data parser that writes file parts straight to disk.
+
+    Built on python_multipart's low-level ``MultipartParser`` callbacks, so the
+    body is never spooled by the parser: chunks of each file part go directly
+    into a temp file in IMAGE_DIR, MAX_FILE_SIZE is enforced as bytes arrive,
+    and the SHA-256 of the content is computed on the fly. The head of each
+    part is validated from its image header (magic bytes matching the
+    extension, dimensions, MAX_IMAGE_PIXELS; see ``handlers.image_probe``)
+    before anything is written, so no upload is decoded or read twice. ``save()`` then
+    stores the content once per hash (see ``store_blob()``) and links the final
+    file name to it. Text fields are ignored. Shared by the http.server and asyncio engines.
+
+    With ``max_files=1`` any rejected file fails the whole upload immediately.
+    With more files (batch uploads) a rejected part is recorded in its
+    ``UploadPart.error``, the rest of its data is skipped and parsing goes on.
+
+    Usage:
+        with StreamingUpload(content_type) as upload:
+            upload.write(chunk)  # for every chunk of the body
+            saved_file_info = upload.finalize()
+
+    Leaving the ``with`` block removes the temp files of parts that weren't saved
+    and records the time spent parsing and on disk as request phases of ``route``.
+    """
+
+    def __init__(self, content_type: str, max_files: int = 1):
+        _, options = parse_options_header(content_type)
+        boundary = options.get(b'boundary')
+        if not boundary:
+            raise MalformedUploadError()
+
+        self.max_files = max_files
+        self.route = '/upload/' if max_files == 1 else '/api/upload/batch'
+        self.parts: list[UploadPart] = []
+        self._part: UploadPart | None = None
+        self._sha256 = None
+        self._file: BinaryIO | None = None
+        # Початок поточної частини, що ще не записаний: чекає перевірки заголовка зображення
+        self._head = bytearray()
+        self._probed = False
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        self._part_headers: dict[bytes, bytes] = {}
+        # Час у парсері (разом із записом частин) і окремо запис на диск; save() може йти з кількох потоків
+        self._parser_seconds = 0.0
+        self._stream_disk_seconds = 0.0
+        self._save_seconds: list[float] = []
+        self._parser = MultipartParser(boundary, {
+            'on_part_begin': self._on_part_begin,
+            'on_header_field': self._on_header_field,
+            'on_header_value': self._on_header_value,
+            'on_header_end': self._on_header_end,
+            'on_headers_finished': self._on_headers_finished,
+            'on_part_data': self._on_part_data,
+            'on_part_end': self._on_part_end
+        })
+
+    def __enter__(self) -> 'StreamingUpload':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.abort()
+        observe_phase(self.route, 'parse', self._parser_seconds - self._stream_disk_seconds)
+        observe_phase(self.route, 'disk', self._stream_disk_seconds + sum(self._save_seconds))
+
+    def write(self, chunk: bytes) -> None:
+        """Feed the next chunk of the request body to the parser.
+
+        Raises:
+            NotSupportedFormatError: If a file part has an unsupported extension or its content
+                isn't an image of that format (max_files=1).
+            ImageTooLargeError: If a file part has more than MAX_IMAGE_PIXELS pixels (max_files=1).
+            MaxSizeExceedError: As soon as a file part grows past MAX_FILE_SIZE (max_files=1).
+            MultipleFilesUploadError: If the body has more than one file part (max_files=1).
+            TooManyFilesError: If the body has more than max_files file parts.
+            MalformedUploadError: If the body is not valid multipart/form-data.
+            FileSaveError: If a temp file can't be written.
+        """
+        started = perf_counter()
+        try:
+            self._parser.write(chunk)
+        except FormParserError as e:
+            logger.error("Malformed multipart body: %s", e)
+            raise MalformedUploadError()
+        finally:
+            self._parser_seconds += perf_counter() - started
+
+    def finish(self) -> list[UploadPart]:
+        """Finish parsing and return the received file parts, in body order.
+
+        Raises:
+            MissingFileError: If the body had no file part.
+            MalformedUploadError: If the body ended in the middle of a part.
+            NotSupportedFormatError: If the last file part isn't a valid image (max_files=1).
+        """
+        started = perf_counter()
+        try:
+            self._parser.finalize()
+        except FormParserError as e:
+            logger.error("Malformed multipart body: %s", e)
+            raise MalformedUploadError()
+        finally:
+            self._parser_seconds += perf_counter() - started
+
+        if self._part is not None:
+            raise MalformedUploadError()
+        if not self.parts:
+            raise MissingFileError()
+        return self.parts
+
+    def finalize(self) -> dict[str, str | int]:
+        """Finish parsing and save the single uploaded file (see ``save()``)."""
+        return self.save(self.finish()[0])
+
+    def save(self, part: UploadPart) -> dict[str, str | int]:
+        """Move a received part to its final, unique name in its IMAGE_DIR shard.
+
+        Safe to call for different parts from several threads.
+
+        Returns:
+            dict[str, str | int]: filename, url, size, original_name, file_type,
+            content_hash (SHA-256 hex digest), width, height and mime_type of the saved file.
+
+        Raises:
+            FileSaveError: If the file can't be moved into place.
+        """
+        base_name, ext = os.path.splitext(part.filename)
+        ext = ext.lower()
+        safe_name = sanitize_filename(base_name.lower())
+        unique_name = f'{safe_name}_{uuid.uuid4()}{ext}'
+        file_path = image_path(unique_name)
+
+        started = perf_counter()
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            duplicate = store_blob(part.tmp_path, part.content_hash, file_path)
+        except OSError as e:
+            logger.error("Failed to save file: %s", e)
+            raise FileSaveError()
+        finally:
+            self._save_seconds.append(perf_counter() - started)
+        part.tmp_path = None
+
+        if duplicate:
+            logger.info("File saved as a link to existing content: %s (%s)", unique_name, part.content_hash)
+        else:
+            logger.info("File saved successfully: %s (%d bytes)", unique_name, part.size)
+        return {
+            'filename': unique_name,
+            'url': f'/images/{unique_name}',
+            'size': part.size,
+            'original_name': part.filename,
+            'file_type': ext,
+            'content_hash': part.content_hash,
+            'width': part.width,
+            'height': part.height,
+            'mime_type': part.mime_type
+        }
+
+    def abort(self) -> None:
+        """Close and remove the temp files of all parts that weren't saved."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        for part in self.parts:
+            self.discard(part)
+
+    @staticmethod
+    def discard(part: UploadPart) -> None:
+        """Remove the temp file of a part."""
+        if part.tmp_path is not None:
+            with suppress(OSError):
+                os.unlink(part.tmp_path)
+            part.tmp_path = None
+
+    def _reject(self, error: APIError) -> None:
+        """Fail the upload, or for batch uploads mark the current part and skip its data."""
+        if self.max_files == 1:
+            raise error
+        logger.warning("Rejected %s: %s", self._part.filename, error.message)
+        self._part.error = error
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.discard(self._part)
+
+    def _on_part_begin(self) -> None:
+        self._part_headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._part_headers[bytes(self._header_field).lower()] = bytes(self._header_value)
+        self._header_field.clear()
+        self._header_value.clear()
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._part_headers.get(b'content-disposition'))
+        file_name = options.get(b'filename')
+        if file_name is None:
+            # Текстові поля форми не потрібні — їхні дані просто пропускаються
+            return
+
+        if len(self.parts) >= self.max_files:
+            raise MultipleFilesUploadError() if self.max_files == 1 else TooManyFilesError(self.max_files)
+
+        self._part = UploadPart(filename=file_name.decode('utf-8', 'replace') or "uploaded_file")
+        self.parts.append(self._part)
+        logger.info("Receiving file: %s", self._part.filename)
+
+        ext = os.path.splitext(self._part.filename)[1].lower()
+        if ext not in config.SUPPORTED_FORMATS:
+            logger.warning("Unsupported format: %s", ext)
+            self._reject(NotSupportedFormatError(config.SUPPORTED_FORMATS))
+            return
+
+        try:
+            os.makedirs(config.IMAGE_DIR, exist_ok=True)
+            fd, self._part.tmp_path = tempfile.mkstemp(dir=config.IMAGE_DIR, prefix='.upload-')
+            self._file = os.fdopen(fd, 'wb')
+        except OSError as e:
+            logger.error("Failed to create upload file: %s", e)
+            raise FileSaveError()
+        self._sha256 = hashlib.sha256()
+        self._head.clear()
+        self._probed = False
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._part is None or self._part.error is not None:
+            return
+
+        self._part.size += end - start
+        if self._part.size > config.MAX_FILE_SIZE:
+            logger.warning("File too large: more than %d bytes", config.MAX_FILE_SIZE)
+            self._reject(MaxSizeExceedError(config.MAX_FILE_SIZE))
+            return
+
+        chunk = memoryview(data)[start:end]
+        self._sha256.update(chunk)
+        if self._probed:
+            self._write(chunk)
+            return
+
+        self._head += chunk
+        if len(self._head) >= PROBE_HEAD_BYTES and self._probe_head(complete=False):
+            self._write(self._head)
+            self._head.clear()
+
+    def _on_part_end(self) -> None:
+        part = self._part
+        if part is None or part.error is not None:
+            self._part = None
+            return
+
+        if not self._probed:
+            # Уся частина менша за PROBE_HEAD_BYTES — перевіряється ціла, з пам'яті
+            if not self._probe_head(complete=True):
+                self._part = None
+                return
+            self._write(self._head)
+            self._head.clear()
+
+        part.content_hash = self._sha256.hexdigest()
+        started = perf_counter()
+        try:
+            self._file.close()
+        except OSError as e:
+            logger.error("Failed to save file: %s", e)
+            raise FileSaveError()
+        finally:
+            self._file = None
+            self._stream_disk_seconds += perf_counter() - started
+
+        if part.width is None:
+            # Заголовок не вмістився в PROBE_HEAD_BYTES — читаємо його з файлу, як і раніше без декодування
+            try:
+                self._set_image_info(part, probe_image(part.tmp_path))
+            except APIError as e:
+                logger.warning("Invalid image %s: %s", part.filename, e.message)
+                self._reject(e)
+        self._part = None
+
+    def _write(self, data: bytes | bytearray | memoryview) -> None:
+        started = perf_counter()
+        try:
+            self._file.write(data)
+        except OSError as e:
+            logger.error("Failed to save file: %s", e)
+            raise FileSaveError()
+        finally:
+            self._stream_disk_seconds += perf_counter() - started
+
+    def _probe_head(self, complete: bool) -> bool:
+        """Validate the buffered head of the current part; returns False if the part was rejected.
+
+        Args:
+            complete (bool): The head is the whole part, so an unreadable header is final.
+        """
+        self._probed = True
+        part = self._part
+        head = bytes(self._head)
+        sniffed = sniff_format(head[:SNIFF_BYTES])
+        if sniffed is None or sniffed != expected_format(part.filename):
+            logger.warning("Content of %s doesn't match its extension (detected %s)", part.filename, sniffed)
+            self._reject(NotSupportedFormatError(config.SUPPORTED_FORMATS))
+            return False
+
+        try:
+            self._set_image_info(part, probe_image(io.BytesIO(head)))
+        except ImageTooLargeError as e:
+            logger.warning("Image too large: %s", part.filename)
+            self._reject(e)
+            return False
+        except NotSupportedFormatError as e:
+            if complete:
+                logger.warning("Invalid image %s: %s", part.filename, e.message)
+                self._reject(e)
+                return False
+        return True
+
+    @staticmethod
+    def _set_image_info(part: UploadPart, info: ImageInfo) -> None:
+        part.width, part.height, part.mime_type = info.width, info.height, info.mime_type
+
+
+def read_into(upload: StreamingUpload, stream: BinaryIO, content_length: int) -> None:
+    """Feed content_length bytes of a blocking stream into upload chunk by chunk.
+
+    Raises:
+        MalformedUploadError: If the stream ends before content_length bytes.
+    """
+    remaining = content_length
+    while remaining > 0:
+        chunk = stream.read(min(UPLOAD_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise MalformedUploadError()
+        upload.write(chunk)
+        remaining -= len(chunk)
+
+
+def save_uploaded_stream(stream: BinaryIO, content_type: str, content_length: int | None) -> dict[str, str | int]:
+    """Read a multipart/form-data body from a blocking stream and store its file in IMAGE_DIR.
+
+    Args:
+        stream: Readable request body, e.g. BaseHTTPRequestHandler.rfile.
+        content_type: Content-Type header of the request, including the boundary.
+        content_length: Content-Length header of the request.
+
+    Returns:
+        dict[str, str | int]: Information about the saved file, see StreamingUpload.save().
+
+    Raises:
+        APIError: If the upload is rejected; the rest of the body may be left unread.
+    """
+    check_content_length(content_length)
+
+    with StreamingUpload(content_type) as upload:
+        read_into(upload, stream, content_length)
+        return upload.finalize()
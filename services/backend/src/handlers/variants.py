@@ -0,0 +1,313 @@
+"""Resized / re-encoded variants of uploaded images.
+
+``/media/<name>?w=320&fmt=webp`` serves a derivative of the original instead of
+the full-size file. Derivatives are stored once in VARIANT_DIR under a key
+derived from the source file (name, size, mtime) and the requested parameters,
+so a replaced original gets new derivatives and old ones are never served.
+
+Resizing is CPU-bound, so it runs in the worker's image pool
+(``handlers.image_pool``: bounded queue, 503 when full, per-task timeout)
+instead of the request thread / event loop. Concurrent requests for the same
+missing variant wait on a single job. ``warm()`` queues variants nobody waits
+for yet, e.g. gallery thumbnails right after an upload.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import urllib.parse
+from concurrent.futures import CancelledError, Future
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from exceptions.api_errors import APIError, ImageTaskTimeoutError, InvalidVariantError, VariantGenerationError
+from handlers.image_pool import ImagePool, get_image_pool
+from handlers.layout import image_path
+from settings.config import config
+from settings.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# ?fmt= -> (формат Pillow, розширення файлу)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', '.webp'),
+    'jpeg': ('JPEG', '.jpg'),
+    'jpg': ('JPEG', '.jpg'),
+    'png': ('PNG', '.png'),
+}
+
+# Формат за замовчуванням (без ?fmt=) — той самий, що в оригіналу
+_SOURCE_FORMATS = {
+    '.jpg': 'jpeg',
+    '.jpeg': 'jpeg',
+    '.png': 'png',
+    '.webp': 'webp',
+    '.gif': 'png',
+}
+
+
+@dataclass(frozen=True)
+class VariantSpec:
+    """Requested size and format of a variant.
+
+    Attributes:
+        width (Optional[int]): Maximum width in pixels (None — not limited).
+        height (Optional[int]): Maximum height in pixels (None — not limited).
+        fmt (Optional[str]): Output format key of VARIANT_FORMATS (None — as the source).
+    """
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fmt: Optional[str] = None
+
+    def resolve_format(self, source_path: str) -> str:
+        return self.fmt or _SOURCE_FORMATS.get(os.path.splitext(source_path)[1].lower(), 'png')
+
+
+def _parse_dimension(value: Optional[str], name: str) -> Optional[int]:
+    if value is None:
+        return None
+    if not value.isdigit() or not 0 < int(value) <= config.VARIANT_MAX_DIMENSION:
+        raise InvalidVariantError(f"'{name}' must be an integer between 1 and {config.VARIANT_MAX_DIMENSION}.")
+    return int(value)
+
+
+def parse_variant_params(query: str) -> Optional[VariantSpec]:
+    """Parse ``w``, ``h`` and ``fmt`` from a /media/ query string.
+
+    Returns:
+        Optional[VariantSpec]: The requested variant, or None if the original is requested.
+
+    Raises:
+        InvalidVariantError: If a parameter is malformed or out of range.
+    """
+    params = {key: values[0] for key, values in urllib.parse.parse_qs(query).items()}
+    width = _parse_dimension(params.get('w'), 'w')
+    height = _parse_dimension(params.get('h'), 'h')
+    fmt = params.get('fmt')
+    if fmt is not None:
+        fmt = fmt.lower()
+        if fmt not in VARIANT_FORMATS:
+            raise InvalidVariantError(f"'fmt' must be one of: {', '.join(VARIANT_FORMATS)}.")
+
+    if width is None and height is None and fmt is None:
+        return None
+    return VariantSpec(width=width, height=height, fmt=fmt)
+
+
+def render_variant(source: str, dest: str, width: Optional[int], height: Optional[int],
+                   fmt: str, quality: int) -> str:
+    """Resize ``source`` into ``dest`` (runs in a pool process).
+
+    The aspect ratio is kept and images are never upscaled. ``dest`` appears
+    atomically, so readers never see a partially written file.
+    """
+    pil_format, _ = VARIANT_FORMATS[fmt]
+    with Image.open(source) as image:
+        size = (width or image.width, height or image.height)
+        # JPEG декодується одразу у зменшеному масштабі — значно швидше для великих фото
+        image.draft('RGB', size)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+
+        if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        elif image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            image = image.convert('RGBA')
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest), prefix='.variant-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                image.save(f, format=pil_format, quality=quality, optimize=True)
+            os.replace(tmp_path, dest)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    return dest
+
+
+class VariantService:
+    """Looks up stored variants and generates missing ones in the image pool.
+
+    Attributes:
+        variant_dir (str): Root directory of stored variants.
+        quality (int): Encoder quality for WEBP/JPEG.
+    """
+
+    def __init__(self, variant_dir: str, quality: int, pool: Optional[ImagePool] = None):
+        self.variant_dir = variant_dir
+        self.quality = quality
+        self._pool = pool
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.generated = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def variant_path(self, source: str, st: os.stat_result, spec: VariantSpec) -> str:
+        """Return where the variant of ``source`` with ``spec`` is stored."""
+        fmt = spec.resolve_format(source)
+        key = f"{os.path.basename(source)}:{st.st_size}:{st.st_mtime_ns}:{spec.width}x{spec.height}:{fmt}:{self.quality}"
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.variant_dir, digest[:2], digest + VARIANT_FORMATS[fmt][1])
+
+    @property
+    def pool(self) -> ImagePool:
+        return self._pool or get_image_pool()
+
+    def _resolve(self, source: str, spec: VariantSpec, background: bool = False) -> tuple[str, Optional[Future]]:
+        """Return the variant path and, if it still has to be generated, the job producing it.
+
+        With ``background`` a full pool drops the job (the future is None) instead of raising.
+
+        Raises:
+            FileNotFoundError: If the source image does not exist.
+            ImagePoolBusyError: If the image pool is full (not with ``background``).
+        """
+        st = os.stat(source)
+        dest = self.variant_path(source, st, spec)
+
+        with self._lock:
+            if os.path.exists(dest):
+                self.hits += 1
+                return dest, None
+
+            future = self._inflight.get(dest)
+            if future is not None:
+                self.coalesced += 1
+                return dest, future
+
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            args = (render_variant, source, dest, spec.width, spec.height, spec.resolve_format(source), self.quality)
+            future = self.pool.submit_background(*args) if background else self.pool.submit(*args)
+            if future is None:
+                return dest, None
+            self._inflight[dest] = future
+            self.generated += 1
+
+        future.add_done_callback(lambda _: self._forget(dest))
+        return dest, future
+
+    def _forget(self, dest: str) -> None:
+        with self._lock:
+            self._inflight.pop(dest, None)
+
+    def _failed(self, source: str, error: Exception) -> APIError:
+        logger.error("✖ Failed to generate variant of %s: %s", source, error)
+        with self._lock:
+            self.failures += 1
+        # TimeoutError — задачу перервав таймер у процесі пулу; CancelledError — її скасував інший запит
+        if isinstance(error, (TimeoutError, CancelledError, ImageTaskTimeoutError)):
+            return ImageTaskTimeoutError()
+        return VariantGenerationError()
+
+    def get_variant(self, source: str, spec: VariantSpec) -> str:
+        """Return the path of the variant, generating it if needed (blocks the calling thread).
+
+        Raises:
+            FileNotFoundError: If the source image does not exist.
+            ImagePoolBusyError: If the image pool is full.
+            ImageTaskTimeoutError: If generating the variant took longer than IMAGE_POOL_TASK_TIMEOUT.
+            VariantGenerationError: If the variant can't be generated.
+        """
+        dest, future = self._resolve(source, spec)
+        if future is None:
+            return dest
+        try:
+            return self.pool.result(future)
+        except (OSError, ValueError, UnidentifiedImageError, BrokenProcessPool, CancelledError,
+                ImageTaskTimeoutError) as e:
+            raise self._failed(source, e)
+
+    async def get_variant_async(self, source: str, spec: VariantSpec) -> str:
+        """Asyncio counterpart of get_variant(); waits for the job without blocking the loop."""
+        dest, future = self._resolve(source, spec)
+        if future is None:
+            return dest
+        try:
+            return await self.pool.result_async(future)
+        except (OSError, ValueError, UnidentifiedImageError, BrokenProcessPool, CancelledError,
+                ImageTaskTimeoutError) as e:
+            raise self._failed(source, e)
+
+    def warm(self, source: str, specs: Iterable[VariantSpec]) -> int:
+        """Queue the missing variants of ``source`` in the background; returns how many were queued.
+
+        Variants that don't fit in the image pool are skipped and generated on first request.
+        """
+        queued = 0
+        for spec in specs:
+            try:
+                _, future = self._resolve(source, spec, background=True)
+            except OSError as e:
+                logger.warning("✖ Can't pre-generate variants of %s: %s", source, e)
+                break
+            queued += future is not None
+        return queued
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/generation counters of this worker."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "generated": self.generated,
+                "coalesced": self.coalesced,
+                "failures": self.failures,
+                "inflight": len(self._inflight),
+                "pool": self.pool.stats(),
+            }
+
+
+_variant_service: Optional[VariantService] = None
+_variant_service_lock = threading.Lock()
+
+
+def get_variant_service() -> VariantService:
+    """Get or create the per-process VariantService configured from AppConfig."""
+    global _variant_service
+    if _variant_service is None:
+        with _variant_service_lock:
+            if _variant_service is None:
+                _variant_service = VariantService(
+                    variant_dir=config.VARIANT_DIR,
+                    quality=config.VARIANT_QUALITY
+                )
+    return _variant_service
+
+
+_upload_specs: Optional[list[VariantSpec]] = None
+
+
+def upload_variant_specs() -> list[VariantSpec]:
+    """Parse UPLOAD_PREGENERATE_VARIANTS once per process; invalid entries are logged and skipped."""
+    global _upload_specs
+    if _upload_specs is None:
+        specs = []
+        for query in config.UPLOAD_PREGENERATE_VARIANTS:
+            try:
+                spec = parse_variant_params(query)
+            except InvalidVariantError as e:
+                logger.error("✖ Invalid UPLOAD_PREGENERATE_VARIANTS entry %r: %s", query, e.message)
+                continue
+            if spec is not None:
+                specs.append(spec)
+        _upload_specs = specs
+    return _upload_specs
+
+
+def warm_uploaded(filenames: Iterable[str]) -> None:
+    """Queue the UPLOAD_PREGENERATE_VARIANTS of freshly uploaded images in the image pool.
+
+    Doesn't wait for them: a full pool just leaves them to be generated on first request.
+    Without UPLOAD_PREGENERATE_VARIANTS (the default) nothing is queued and the pool isn't started.
+    """
+    specs = upload_variant_specs()
+    if not specs:
+        return
+    service = get_variant_service()
+    for filename in filenames:
+        service.warm(image_path(filename), specs)
@@ -20,3 +20,11 @@ class InvalidPerPageError(PaginationError):
     def __init__(self, value: Any):
         self.value = value
         super().__init__(f"Invalid per_page value: {value}. Per page must be a positive integer.")
+
+
+class InvalidCursorError(PaginationError):
+    """Raised when the ``after`` cursor can't be decoded."""
+
+    def __init__(self, value: Any):
+        self.value = value
+        super().__init__(f"Invalid cursor: {value}.")
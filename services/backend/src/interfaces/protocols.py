@@ -1,3 +1,4 @@
+import socket
 from http.server import HTTPServer
 from socketserver import BaseRequestHandler
 from typing import Protocol, TypeVar, Any, BinaryIO
@@ -23,4 +24,6 @@ class HandlerProtocol(Protocol):
     def end_headers(self) -> None: ...
 
     path: str
+    headers: Any
+    connection: socket.socket
     wfile: BinaryIO
@@ -5,9 +5,11 @@ which handle data access operations for specific entity types.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
 
 from db.dto import ImageDTO, ImageDetailsDTO
+from dto.pagination import CursorDTO
 
 
 class ImageRepository(ABC):
@@ -20,6 +22,8 @@ class ImageRepository(ABC):
     def create(self, image: ImageDTO) -> ImageDetailsDTO:
         """Create a new image record in the data store.
 
+        An image with a content_hash also takes a reference on its content blob.
+
         Args:
             image (ImageDTO): Image data to create.
 
@@ -31,6 +35,23 @@ class ImageRepository(ABC):
         """
         pass
 
+    @abstractmethod
+    def create_many(self, images: List[ImageDTO]) -> List[ImageDetailsDTO]:
+        """Create several image records in a single transaction.
+
+        Either all records are created or none.
+
+        Args:
+            images (List[ImageDTO]): Image data to create.
+
+        Returns:
+            List[ImageDetailsDTO]: Created image data, in the order of ``images``.
+
+        Raises:
+            EntityCreationError: If the batch can't be created.
+        """
+        pass
+
     @abstractmethod
     def get_by_id(self, image_id: int) -> Optional[ImageDetailsDTO]:
         """Retrieve an image by its ID.
@@ -57,7 +78,7 @@ class ImageRepository(ABC):
 
     @abstractmethod
     def delete(self, image_id: int) -> bool:
-        """Delete an image from the data store by ID.
+        """Soft-delete an image by ID; it disappears from reads at once and is purged later.
 
         Args:
             image_id (int): The unique identifier of the image to delete.
@@ -72,7 +93,7 @@ class ImageRepository(ABC):
 
     @abstractmethod
     def delete_by_filename(self, filename: str) -> bool:
-        """Delete an image from the data store by filename.
+        """Soft-delete an image by filename; it disappears from reads at once and is purged later.
 
         Args:
             filename (str): The filename of the image to delete.
@@ -86,16 +107,83 @@ class ImageRepository(ABC):
         pass
 
     @abstractmethod
-    def list_all(self, limit: int = 10, offset: int = 0, order: str = "desc") -> List[ImageDetailsDTO]:
+    def delete_many(self, filenames: Optional[List[str]] = None,
+                    older_than: Optional[datetime] = None) -> List[str]:
+        """Soft-delete all images matching the given filters in a single statement.
+
+        Args:
+            filenames (Optional[List[str]], optional): Delete only images with these filenames.
+            older_than (Optional[datetime], optional): Delete only images uploaded before this time.
+
+        Returns:
+            List[str]: Filenames of the deleted images.
+
+        Raises:
+            EntityDeletionError: If the deletion fails.
+            ValueError: If neither filter is given.
+        """
+        pass
+
+    @abstractmethod
+    def purge_deleted(self, limit: int = 500) -> List[Tuple[str, Optional[str]]]:
+        """Physically remove the oldest soft-deleted images and release their blobs.
+
+        Args:
+            limit (int, optional): Maximum number of images to purge.
+
+        Returns:
+            List[Tuple[str, Optional[str]]]: (filename, content hash) per purged image; the hash is
+            set when the image's blob lost its last reference (the blob file can be removed).
+
+        Raises:
+            EntityDeletionError: If the deletion fails.
+        """
+        pass
+
+    @abstractmethod
+    def iter_filenames(self, batch_size: int = 1000) -> Iterator[str]:
+        """Iterate over the filenames of all live images without loading them at once.
+
+        Raises:
+            QueryExecutionError: If query execution fails.
+        """
+        pass
+
+    @abstractmethod
+    def existing_filenames(self, filenames: List[str]) -> Set[str]:
+        """Return the subset of filenames that have a record, deleted or not.
+
+        Raises:
+            QueryExecutionError: If query execution fails.
+        """
+        pass
+
+    @abstractmethod
+    def existing_blobs(self, content_hashes: List[str]) -> Set[str]:
+        """Return the subset of content hashes that have a blob record.
+
+        Raises:
+            QueryExecutionError: If query execution fails.
+        """
+        pass
+
+    @abstractmethod
+    def list_all(self, limit: int = 10, offset: int = 0, order: str = "desc",
+                 after: Optional[CursorDTO] = None,
+                 projection: Optional[Sequence[str]] = None) -> List[ImageDetailsDTO] | List[Dict[str, Any]]:
         """List images with pagination and sorting.
 
         Args:
             limit (int, optional): Maximum number of images to return. Defaults to 10.
             offset (int, optional): Number of images to skip. Defaults to 0.
             order (str, optional): Sort order for upload_time ("desc" or "asc"). Defaults to "desc".
+            after (Optional[CursorDTO], optional): Keyset cursor; when given, returns the images
+                after it (by upload_time, id) and offset is ignored. Defaults to None.
+            projection (Optional[Sequence[str]], optional): Column names to return as
+                JSON-encodable dicts instead of DTOs. Defaults to None.
 
         Returns:
-            List[ImageDetailsDTO]: List of image data.
+            List[ImageDetailsDTO] | List[Dict[str, Any]]: List of image data (dicts with a projection).
 
         Raises:
             QueryExecutionError: If query execution fails.
@@ -114,3 +202,117 @@ class ImageRepository(ABC):
             QueryExecutionError: If the counting operation fails.
         """
         pass
+
+    @abstractmethod
+    def list_page(self, limit: int = 10, offset: int = 0,
+                  after: Optional[CursorDTO] = None) -> Tuple[List[ImageDetailsDTO], int]:
+        """List a page of images (newest first) together with the total count.
+
+        Implementations may fetch both in a single round trip or reuse a cached count.
+
+        Args:
+            limit (int, optional): Maximum number of images to return. Defaults to 10.
+            offset (int, optional): Number of images to skip. Defaults to 0.
+            after (Optional[CursorDTO], optional): Keyset cursor, see list_all(). Defaults to None.
+
+        Returns:
+            Tuple[List[ImageDetailsDTO], int]: The page and the total count.
+
+        Raises:
+            QueryExecutionError: If query execution fails.
+        """
+        pass
+
+
+class AsyncImageRepository(ABC):
+    """Asynchronous repository interface for image-related data operations.
+
+    Mirrors ImageRepository for the asyncio server engine.
+    """
+
+    @abstractmethod
+    async def create(self, image: ImageDTO) -> ImageDetailsDTO:
+        """Create a new image record in the data store.
+
+        Raises:
+            EntityCreationError: If the entity creation fails.
+        """
+        pass
+
+    @abstractmethod
+    async def create_many(self, images: List[ImageDTO]) -> List[ImageDetailsDTO]:
+        """Create several image records in a single transaction.
+
+        Raises:
+            EntityCreationError: If the batch can't be created.
+        """
+        pass
+
+    @abstractmethod
+    async def get_by_id(self, image_id: int) -> Optional[ImageDetailsDTO]:
+        """Retrieve an image by its ID."""
+        pass
+
+    @abstractmethod
+    async def get_by_filename(self, filename: str) -> Optional[ImageDetailsDTO]:
+        """Retrieve an image by its filename."""
+        pass
+
+    @abstractmethod
+    async def delete(self, image_id: int) -> bool:
+        """Soft-delete an image by ID.
+
+        Raises:
+            EntityDeletionError: If the entity deletion fails.
+        """
+        pass
+
+    @abstractmethod
+    async def delete_by_filename(self, filename: str) -> bool:
+        """Soft-delete an image by filename.
+
+        Raises:
+            EntityDeletionError: If the entity deletion fails.
+        """
+        pass
+
+    @abstractmethod
+    async def delete_many(self, filenames: Optional[List[str]] = None,
+                          older_than: Optional[datetime] = None) -> List[str]:
+        """Soft-delete all images matching the given filters in a single statement.
+
+        Raises:
+            EntityDeletionError: If the deletion fails.
+        """
+        pass
+
+    @abstractmethod
+    async def list_all(self, limit: int = 10, offset: int = 0, after: Optional[CursorDTO] = None,
+                       projection: Optional[Sequence[str]] = None) -> List[ImageDetailsDTO] | List[Dict[str, Any]]:
+        """List images with offset or keyset (``after``) pagination, newest first.
+
+        With ``projection``, returns only those columns as JSON-encodable dicts.
+
+        Raises:
+            QueryExecutionError: If query execution fails.
+        """
+        pass
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Count the total number of images.
+
+        Raises:
+            QueryExecutionError: If the counting operation fails.
+        """
+        pass
+
+    @abstractmethod
+    async def list_page(self, limit: int = 10, offset: int = 0,
+                        after: Optional[CursorDTO] = None) -> Tuple[List[ImageDetailsDTO], int]:
+        """List a page of images together with the total count.
+
+        Raises:
+            QueryExecutionError: If query execution fails.
+        """
+        pass
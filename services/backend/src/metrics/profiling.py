@@ -0,0 +1,238 @@
+"""Opt-in profiling of requests and workers.
+
+Three tools, all off unless configured:
+
+- ``X-Profile`` request header (PROFILING_ENABLED): the request runs under
+  cProfile and the stats are dumped to ``PROFILE_DIR/request-*.prof``
+  (open with ``python -m pstats`` or snakeviz). With the asyncio engine the
+  profile also contains whatever else the event loop ran meanwhile.
+- Sampling profiler (PROFILING_ENABLED): toggled in one worker by SIGUSR2 or
+  ``POST /api/profiler/start|stop`` (needs PROFILING_TOKEN); samples the stacks of all threads every
+  PROFILE_SAMPLING_INTERVAL_MS and writes them to
+  ``PROFILE_DIR/sampling-*.collapsed`` in the collapsed format of
+  flamegraph.pl / speedscope.
+- Slow requests (SLOW_REQUEST_LOG_MS > 0): requests slower than the
+  threshold are logged with the phases recorded by ``metrics.registry``
+  (parse, disk, db, serialize) and the repository operations they ran.
+
+When everything is off ``start_request()`` returns None after two config
+checks and the engines skip the rest.
+"""
+
+import cProfile
+import hmac
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from typing import Any, Optional
+
+from settings.config import config
+from settings.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+TOKEN_HEADER = "X-Profile-Token"
+
+# Фази поточного запиту; None — запит не відстежується
+_request_phases: ContextVar[Optional[list[tuple[str, float]]]] = ContextVar("request_phases", default=None)
+# cProfile в одному потоці може бути лише один — паралельні запити з X-Profile не профілюються
+_request_profiler_lock = threading.Lock()
+
+
+def profile_dir() -> str:
+    directory = config.PROFILE_DIR or os.path.join(tempfile.gettempdir(), "upload-server-profiles")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _output_path(kind: str, suffix: str) -> str:
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(profile_dir(), f"{kind}-{os.getpid()}-{stamp}-{time.perf_counter_ns() % 10**6}{suffix}")
+
+
+def is_authorized(value: Optional[str]) -> bool:
+    """Check a profiling header value against PROFILING_TOKEN (any non-empty value if no token is set).
+
+    An empty PROFILING_TOKEN (``PROFILING_TOKEN=`` in .env) counts as unset.
+    """
+    if not config.PROFILING_ENABLED or not value:
+        return False
+    if not config.PROFILING_TOKEN:
+        return True
+    return hmac.compare_digest(value.encode(), config.PROFILING_TOKEN.encode())
+
+
+def record_phase(phase: str, seconds: float) -> None:
+    """Add a phase to the breakdown of the current request (no-op when it isn't tracked)."""
+    phases = _request_phases.get()
+    if phases is not None:
+        phases.append((phase, seconds))
+
+
+class RequestProfile:
+    """Profiling state of one request, created by ``start_request()``."""
+
+    __slots__ = ("profiler", "phases", "_token")
+
+    def __init__(self, profiler: Optional[cProfile.Profile], phases: Optional[list], token: Optional[Token]):
+        self.profiler = profiler
+        self.phases = phases
+        self._token = token
+
+    def finish(self, method: str, path: str, status: Optional[int], duration: float) -> None:
+        """Stop profiling the request; dump its profile and log its phases if it was slow."""
+        if self.profiler is not None:
+            self.profiler.disable()
+            _request_profiler_lock.release()
+            output = _output_path("request", ".prof")
+            self.profiler.dump_stats(output)
+            logger.info("✓ Profiled %s %s (%.1f ms): %s", method, path, duration * 1000, output)
+
+        if self._token is not None:
+            _request_phases.reset(self._token)
+        if self.phases is not None and duration * 1000 >= config.SLOW_REQUEST_LOG_MS:
+            breakdown = ", ".join(f"{phase}={seconds * 1000:.1f}ms" for phase, seconds in self.phases) or "no phases"
+            logger.warning("⚠ Slow request %s %s -> %s in %.1f ms: %s",
+                           method, path, status, duration * 1000, breakdown)
+
+
+def start_request(profile_header: Optional[str]) -> Optional[RequestProfile]:
+    """Start tracking a request; returns None when neither profiling nor slow-request logging applies.
+
+    Args:
+        profile_header (Optional[str]): Value of the ``X-Profile`` request header.
+    """
+    track_phases = config.SLOW_REQUEST_LOG_MS > 0
+    if not track_phases and not config.PROFILING_ENABLED:
+        return None
+
+    profiler = None
+    if profile_header and is_authorized(profile_header):
+        if _request_profiler_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            logger.warning("✖ Another request is being profiled; X-Profile ignored")
+
+    if profiler is None and not track_phases:
+        return None
+    phases = [] if track_phases else None
+    token = _request_phases.set(phases) if track_phases else None
+    return RequestProfile(profiler, phases, token)
+
+
+class SamplingProfiler:
+    """Samples the Python stacks of every thread of this process into collapsed-stack counts."""
+
+    def __init__(self):
+        # RLock: обробник SIGUSR2 може перервати головний потік, що вже тримає замок
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._output: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def status(self) -> dict[str, Any]:
+        return {"pid": os.getpid(), "running": self.running, "output": self._output}
+
+    def start(self) -> dict[str, Any]:
+        with self._lock:
+            if not self.running:
+                self._stop = threading.Event()
+                self._output = _output_path("sampling", ".collapsed")
+                self._thread = threading.Thread(target=self._run, args=(self._stop, self._output),
+                                                name="sampling-profiler", daemon=True)
+                self._thread.start()
+                logger.info("✓ Sampling profiler started, writing to %s", self._output)
+            return self.status()
+
+    def stop(self) -> dict[str, Any]:
+        # Лише сигнал потоку: файл він допише сам (stop() викликається і з обробника сигналу)
+        with self._lock:
+            self._stop.set()
+            return {**self.status(), "running": False}
+
+    def toggle(self) -> dict[str, Any]:
+        return self.stop() if self.running else self.start()
+
+    def _run(self, stop: threading.Event, output: str) -> None:
+        interval = config.PROFILE_SAMPLING_INTERVAL_MS / 1000
+        deadline = time.monotonic() + config.PROFILE_SAMPLING_MAX_SECONDS
+        own_ident = threading.get_ident()
+        stacks: Counter[str] = Counter()
+        samples = 0
+        while not stop.wait(interval) and time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own_ident:
+                    stacks[_collapse(names.get(ident, str(ident)), frame)] += 1
+            samples += 1
+
+        with open(output, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        logger.info("✓ Sampling profiler stopped after %d samples: %s", samples, output)
+
+
+def _collapse(thread_name: str, frame) -> str:
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    frames.append(thread_name)
+    # Формат collapsed: корінь першим, кадри через ";", лічильник після останнього пробілу
+    return ";".join(reversed(frames))
+
+
+_sampler: Optional[SamplingProfiler] = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampling_profiler() -> SamplingProfiler:
+    """Get or create the SamplingProfiler of this process."""
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = SamplingProfiler()
+    return _sampler
+
+
+def install_signal_handler() -> None:
+    """Toggle this worker's sampling profiler on SIGUSR2 (call from the worker's main thread)."""
+    if not config.PROFILING_ENABLED or not hasattr(signal, "SIGUSR2"):
+        return
+    if threading.current_thread() is not threading.main_thread():
+        logger.warning("✖ SIGUSR2 profiler toggle not installed: server is not running in the main thread")
+        return
+    signal.signal(signal.SIGUSR2, lambda signum, frame: get_sampling_profiler().toggle())
+
+
+PROFILER_PATHS = frozenset({'/api/profiler/start', '/api/profiler/stop'})
+
+
+def control_sampling_profiler(path: str, token: Optional[str]) -> tuple[int, dict[str, Any]]:
+    """Handle ``POST /api/profiler/start|stop`` for this worker: (status, JSON payload).
+
+    Answers 404 while PROFILING_ENABLED is off. The endpoints always need a
+    token: 403 when PROFILING_TOKEN is unset (use SIGUSR2 instead) or when
+    ``token`` (the ``X-Profile-Token`` header) doesn't match it.
+    """
+    if not config.PROFILING_ENABLED:
+        return 404, {"detail": "Not Found"}
+    if not config.PROFILING_TOKEN:
+        return 403, {"detail": "Profiler endpoints require PROFILING_TOKEN"}
+    if not is_authorized(token):
+        return 403, {"detail": "Invalid profiling token"}
+    sampler = get_sampling_profiler()
+    return 200, sampler.start() if path == '/api/profiler/start' else sampler.stop()
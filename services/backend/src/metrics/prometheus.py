@@ -0,0 +1,176 @@
+"""Cross-process aggregation and Prometheus text exposition of the metrics.
+
+Every process flushes its registry snapshot to ``METRICS_DIR/<pid>.json``
+every METRICS_FLUSH_INTERVAL seconds (a temp file + rename, so readers never
+see a partial file). ``render_metrics()`` sums the snapshots of all processes
+(the calling one from memory) into one set of series. Files of exited
+workers are kept until the next ``app.run()``, so counters never go back.
+
+The connection-pool wait histograms (``db.pool.WaitHistogram``) are added to
+each snapshot as ``db_pool_wait_seconds``.
+"""
+
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Iterable
+
+from metrics.registry import METRICS, MetricsRegistry
+from settings.config import config
+from settings.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_POOL_WAIT_METRIC = "db_pool_wait_seconds"
+_POOL_WAIT_HELP = "Time requests waited for a database connection."
+
+
+def metrics_dir() -> str:
+    return config.METRICS_DIR or os.path.join(tempfile.gettempdir(), "upload-server-metrics")
+
+
+def reset_metrics_dir() -> None:
+    """Remove the snapshots of a previous run (called once by app.run() before forking)."""
+    for path in glob.glob(os.path.join(metrics_dir(), '*.json')):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def _pool_wait_series() -> list[list]:
+    """This process's pool wait histograms as snapshot entries (seconds, per-bucket counts)."""
+    from db.session import get_pool_stats
+
+    series = []
+    for pool_name, stats in get_pool_stats().items():
+        wait = stats.get("wait_ms") if isinstance(stats, dict) else None
+        if not wait:
+            continue
+        counts, previous = [], 0
+        for cumulative in wait["buckets"].values():
+            counts.append(cumulative - previous)
+            previous = cumulative
+        series.append([pool_name, counts, wait["sum_ms"] / 1000])
+    return series
+
+
+def process_snapshot(registry: MetricsRegistry) -> dict[str, Any]:
+    snapshot = registry.snapshot()
+    snapshot["pool_wait"] = _pool_wait_series()
+    return snapshot
+
+
+def flush(registry: MetricsRegistry) -> None:
+    """Write this process's snapshot to METRICS_DIR atomically."""
+    directory = metrics_dir()
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.metrics-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(process_snapshot(registry), f, separators=(',', ':'))
+        os.replace(tmp_path, os.path.join(directory, f"{os.getpid()}.json"))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def start_flusher(registry: MetricsRegistry) -> None:
+    """Start the daemon thread flushing ``registry`` every METRICS_FLUSH_INTERVAL seconds."""
+    def run() -> None:
+        while True:
+            time.sleep(config.METRICS_FLUSH_INTERVAL)
+            try:
+                flush(registry)
+            except OSError as e:
+                logger.warning("✖ Failed to flush metrics: %s", e)
+
+    threading.Thread(target=run, name="metrics-flusher", daemon=True).start()
+
+
+def _load_snapshots(registry: MetricsRegistry) -> Iterable[dict[str, Any]]:
+    own_file = f"{os.getpid()}.json"
+    yield process_snapshot(registry)
+    for path in glob.glob(os.path.join(metrics_dir(), '*.json')):
+        if os.path.basename(path) == own_file:
+            continue
+        try:
+            with open(path, encoding='utf-8') as f:
+                yield json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("✖ Skipping unreadable metrics file %s: %s", path, e)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _label_text(names: Iterable[str], values: Iterable[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render_metrics(registry: MetricsRegistry) -> bytes:
+    """Merge the snapshots of all processes and render them in Prometheus text format."""
+    counters: dict[tuple[str, tuple], float] = {}
+    histograms: dict[tuple[str, tuple], list] = {}
+
+    def add_histogram(key: tuple, counts: list[int], total: float) -> None:
+        series = histograms.get(key)
+        if series is None or len(series[0]) != len(counts):
+            histograms[key] = [list(counts), total]
+            return
+        series[0] = [a + b for a, b in zip(series[0], counts)]
+        series[1] += total
+
+    for snapshot in _load_snapshots(registry):
+        for name, labels, value in snapshot.get("counters", ()):
+            key = (name, tuple(labels))
+            counters[key] = counters.get(key, 0.0) + value
+        for name, labels, counts, total in snapshot.get("histograms", ()):
+            add_histogram((name, tuple(labels)), counts, total)
+        for pool_name, counts, total in snapshot.get("pool_wait", ()):
+            add_histogram((_POOL_WAIT_METRIC, (pool_name,)), counts, total)
+
+    from db.pool import WAIT_BUCKETS_MS
+    specs = {**METRICS, _POOL_WAIT_METRIC: ("histogram", _POOL_WAIT_HELP,
+                                            tuple(bound / 1000 for bound in WAIT_BUCKETS_MS))}
+    label_names = {**MetricsRegistry.LABELS, _POOL_WAIT_METRIC: ("pool",)}
+
+    lines = []
+    for name, (kind, help_text, buckets) in specs.items():
+        names = label_names[name]
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "counter":
+            for (series_name, labels), value in sorted(counters.items()):
+                if series_name == name:
+                    lines.append(f"{name}{_label_text(names, labels)} {_format_value(value)}")
+            continue
+
+        for (series_name, labels), (counts, total) in sorted(histograms.items()):
+            if series_name != name:
+                continue
+            cumulative = 0
+            for bound, count in zip([*map(_format_bound, buckets), '+Inf'], counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{name}_bucket{_label_text(names, labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_label_text(names, labels)} {_format_value(total)}")
+            lines.append(f"{name}_count{_label_text(names, labels)} {cumulative}")
+    return ("\n".join(lines) + "\n").encode('utf-8')
@@ -0,0 +1,197 @@
+"""Per-process request metrics: counters and fixed-bucket histograms.
+
+Recording is a dict lookup and a few additions under a lock, cheap enough to
+leave on in production. Each worker keeps its own ``MetricsRegistry``; the
+numbers of all workers are merged when ``/metrics`` is scraped (see
+``metrics.prometheus``).
+
+Recorded:
+
+- ``http_requests_total`` and ``http_request_duration_seconds`` per route,
+  method and status (``observe_request()``, called by both engines);
+- ``http_request_phase_seconds`` per route and phase (parse, disk, db,
+  serialize; ``timed()`` and ``observe_phase()``);
+- ``db_query_seconds`` per repository operation (``timed_query()``);
+- ``upload_bytes_total`` per route (rate() of it is the upload throughput).
+"""
+
+import bisect
+import functools
+import inspect
+import os
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Callable, Iterator, Optional
+
+from metrics.profiling import record_phase
+from settings.config import config
+
+# Межі кошиків у секундах (від швидкого кешу до повільного завантаження)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (type, help, buckets)
+METRICS: dict[str, tuple[str, str, Optional[tuple[float, ...]]]] = {
+    "http_requests_total": ("counter", "HTTP requests by route, method and status.", None),
+    "http_request_duration_seconds": ("histogram", "HTTP request duration by route and method.", LATENCY_BUCKETS),
+    "http_request_phase_seconds": ("histogram", "Time spent in a phase of request handling.", LATENCY_BUCKETS),
+    "db_query_seconds": ("histogram", "Duration of image repository operations.", LATENCY_BUCKETS),
+    "upload_bytes_total": ("counter", "Bytes of upload request bodies received.", None),
+}
+
+# Маршрути з параметром у шляху зводяться до шаблону, щоб не плодити мітки
+_ROUTE_PREFIXES = (
+    ('/api/delete/', '/api/delete/{filename}'),
+    ('/media/', '/media/{filename}'),
+    ('/frontend/', '/frontend/{path}'),
+)
+_ROUTES = frozenset({'/', '/upload/', '/api/files', '/api/upload/batch', '/api/cache/stats', '/api/db/stats',
+                     '/api/profiler/start', '/api/profiler/stop', '/metrics', '/images.html', '/upload.html'})
+
+Labels = tuple[str, ...]
+
+
+def route_of(path: str) -> str:
+    """Return the route template of a request path (query string dropped); "other" if unknown."""
+    path = path.split('?', 1)[0]
+    if path in _ROUTES:
+        return path
+    for prefix, route in _ROUTE_PREFIXES:
+        if path.startswith(prefix):
+            return route
+    return 'other'
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms of one process.
+
+    Series are keyed by (metric name, label values); label names are given
+    once per metric by ``LABELS``.
+    """
+
+    LABELS: dict[str, tuple[str, ...]] = {
+        "http_requests_total": ("route", "method", "status"),
+        "http_request_duration_seconds": ("route", "method"),
+        "http_request_phase_seconds": ("route", "phase"),
+        "db_query_seconds": ("operation",),
+        "upload_bytes_total": ("route",),
+    }
+
+    def __init__(self):
+        self._counters: dict[tuple[str, Labels], float] = {}
+        # [count per bucket (+Inf last), sum]
+        self._histograms: dict[tuple[str, Labels], list] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, labels: Labels, value: float = 1.0) -> None:
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        buckets = METRICS[name][2]
+        key = (name, labels)
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = [[0] * (len(buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(buckets, value)] += 1
+            series[1] += value
+
+    def snapshot(self) -> dict[str, Any]:
+        """JSON-encodable copy of all series (per-bucket, not cumulative, counts)."""
+        with self._lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                "histograms": [[name, list(labels), list(counts), total]
+                               for (name, labels), (counts, total) in self._histograms.items()],
+            }
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Get or create this process's MetricsRegistry (and start flushing it to METRICS_DIR)."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = MetricsRegistry()
+                from metrics.prometheus import start_flusher
+                start_flusher(registry)
+                _registry = registry
+    return _registry
+
+
+def _reset_after_fork() -> None:
+    # Воркер рахує лише свої запити; потік скидання на диск після fork теж треба запустити заново
+    global _registry
+    _registry = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def observe_request(method: str, path: str, status: int, duration: float) -> None:
+    """Count a finished request and record its duration."""
+    if not config.METRICS_ENABLED:
+        return
+    registry = get_metrics_registry()
+    route = route_of(path)
+    registry.inc("http_requests_total", (route, method, str(status)))
+    registry.observe("http_request_duration_seconds", (route, method), duration)
+
+
+def observe_phase(route: str, phase: str, seconds: float) -> None:
+    """Record time spent in one phase (parse, disk, db, serialize) of a request to ``route``."""
+    record_phase(phase, seconds)
+    if config.METRICS_ENABLED:
+        get_metrics_registry().observe("http_request_phase_seconds", (route, phase), seconds)
+
+
+@contextmanager
+def timed(route: str, phase: str) -> Iterator[None]:
+    """Time the enclosed block as ``phase`` of a request to ``route``."""
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        observe_phase(route, phase, perf_counter() - started)
+
+
+def count_upload_bytes(route: str, size: Optional[int]) -> None:
+    if config.METRICS_ENABLED and size:
+        get_metrics_registry().inc("upload_bytes_total", (route,), size)
+
+
+def timed_query(operation: str) -> Callable:
+    """Decorate a sync or async repository method to record its duration in db_query_seconds."""
+    def observe(started: float) -> None:
+        seconds = perf_counter() - started
+        record_phase(f"query:{operation}", seconds)
+        if config.METRICS_ENABLED:
+            get_metrics_registry().observe("db_query_seconds", (operation,), seconds)
+
+    def decorator(method: Callable) -> Callable:
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(*args, **kwargs):
+                started = perf_counter()
+                try:
+                    return await method(*args, **kwargs)
+                finally:
+                    observe(started)
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                observe(started)
+        return wrapper
+
+    return decorator
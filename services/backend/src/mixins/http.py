@@ -1,6 +1,15 @@
 import json
-from typing import Any
+import os
+from time import perf_counter
+from typing import Any, Optional
+from cache.file_cache import get_file_cache
+from handlers.static import prepare_file_response, select_static_variant
 from interfaces.protocols import HandlerProtocol
+from metrics.profiling import PROFILE_HEADER, RequestProfile, start_request
+from metrics.registry import observe_request
+from settings.logging_config import get_logger, log_access
+
+logger = get_logger("http.server")
 
 class HeadersMixin:
     def set_headers(self: HandlerProtocol, status_code: int, headers: dict):
@@ -10,13 +19,83 @@ class HeadersMixin:
         self.end_headers()
 
 class LoggingMixin:
-    def log_message(self: HandlerProtocol, format: str, *args: Any) -> None:
-        if self.path.startswith('/frontend/'):
-            return
-        super().log_message(format, *args)
+    """Route http.server's logging through the queued loggers and record request metrics.
+
+    Must come before BaseHTTPRequestHandler in the bases to override it. The
+    per-request stderr line is replaced by one JSON access-log record with
+    the request duration (see settings.logging_config.log_access), and the
+    request is counted in metrics.registry and profiled if asked to
+    (see metrics.profiling).
+    """
+    _request_started: Optional[float] = None
+    _response_status: Optional[int] = None
+    _profile: Optional[RequestProfile] = None
+
+    def handle_one_request(self) -> None:
+        self._request_started = None
+        self._response_status = None
+        self._profile = None
+        try:
+            super().handle_one_request()
+        finally:
+            if self._profile is not None:
+                started = self._request_started or perf_counter()
+                self._profile.finish(self.command, self.path, self._response_status, perf_counter() - started)
+        if self._response_status is not None:
+            # Помилка ще до розбору заголовків (напр. 414) — без шляху і тривалості
+            started = self._request_started or perf_counter()
+            method, path = getattr(self, 'command', None) or '-', getattr(self, 'path', '-')
+            duration = perf_counter() - started
+            log_access(method, path, self._response_status, duration, "http")
+            observe_request(method, path, self._response_status, duration)
+
+    def parse_request(self) -> bool:
+        self._request_started = perf_counter()
+        if not super().parse_request():
+            return False
+        self._profile = start_request(self.headers.get(PROFILE_HEADER))
+        return True
+
+    def log_request(self, code: Any = '-', size: Any = '-') -> None:
+        self._response_status = int(code) if code != '-' else None
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.info("%s - %s", self.address_string(), format % args)
 
 class JsonResponseMixin:
     def send_json_error(self: HandlerProtocol, status_code: int, message: str) -> None:
         self.set_headers(status_code, {"Content-Type": "application/json"})
         response = {"detail": message}
-        self.wfile.write(json.dumps(response).encode())
\ No newline at end of file
+        self.wfile.write(json.dumps(response).encode())
+
+class FileResponseMixin:
+    def send_file(self: HandlerProtocol, path: str, content_type: str, extra_headers: dict = None) -> None:
+        """Send a file with ETag/Last-Modified validators, Range and conditional GET support.
+
+        Small files are served from the per-worker FileCache. Larger ones go out through
+        socket.sendfile(): zero-copy os.sendfile() where the platform supports it, a chunked
+        read/send copy otherwise, so memory use stays constant regardless of the file size.
+        """
+        cache = get_file_cache()
+        entry = cache.get(path, os.stat(path))
+        if entry is None:
+            # Промах або завеликий файл: один відкритий дескриптор і для кешу, і для sendfile
+            with open(path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                entry = cache.load(path, f, st, content_type)
+                if entry is None:
+                    response = prepare_file_response(st, content_type, self.headers.get)
+                    self.set_headers(response.status, {**response.headers, **(extra_headers or {})})
+                    if response.length:
+                        self.connection.sendfile(f, response.offset, response.length)
+                    return
+
+        response = prepare_file_response(entry.stat, content_type, self.headers.get, entry.headers)
+        self.set_headers(response.status, {**response.headers, **(extra_headers or {})})
+        if response.length:
+            self.wfile.write(memoryview(entry.body)[response.offset:response.offset + response.length])
+
+    def send_static_file(self: HandlerProtocol, path: str, content_type: str) -> None:
+        """Send a frontend file, picking its precompressed variant by Accept-Encoding."""
+        variant, extra_headers = select_static_variant(path, self.headers.get('Accept-Encoding'))
+        self.send_file(variant, content_type, extra_headers)
@@ -1,6 +1,6 @@
 from typing import Dict, Optional, Tuple
 
-from dto.pagination import PaginationDTO
+from dto.pagination import CursorDTO, PaginationDTO
 from interfaces.pagination import InvalidPageNumberError, InvalidPerPageError
 
 
@@ -10,6 +10,7 @@ class PaginationMixin:
     This mixin provides methods to:
     - Parse pagination parameters from query parameters
     - Validate pagination parameters
+    - Parse the keyset ``after`` cursor
     - Return a standardized PaginationDTO
     """
 
@@ -34,6 +35,7 @@ class PaginationMixin:
         Raises:
             InvalidPageNumberError: If page is not a positive integer.
             InvalidPerPageError: If per_page is not a positive integer or exceeds max_per_page.
+            InvalidCursorError: If the ``after`` cursor is malformed.
         """
         page_str = query_params.get('page', str(default_page))
         try:
@@ -53,7 +55,39 @@ class PaginationMixin:
         except ValueError:
             raise InvalidPerPageError(per_page_str)
 
-        return PaginationDTO(page=page, per_page=per_page)
+        return PaginationDTO(page=page, per_page=per_page, after=self.parse_cursor(query_params))
+
+    @staticmethod
+    def parse_cursor(query_params: Dict[str, str]) -> Optional[CursorDTO]:
+        """Parse the keyset ``after`` cursor from query parameters.
+
+        Args:
+            query_params (Dict[str, str]): Dictionary of query parameters.
+
+        Returns:
+            Optional[CursorDTO]: The decoded cursor, or None if ``after`` is absent.
+
+        Raises:
+            InvalidCursorError: If the cursor is malformed.
+        """
+        token = query_params.get('after')
+        return CursorDTO.decode(token) if token else None
+
+    @staticmethod
+    def get_next_cursor(items: list, limit: int) -> Optional[str]:
+        """Build the cursor for the page after ``items``.
+
+        Args:
+            items (list): Items of the current page (with upload_time and id).
+            limit (int): Requested page size.
+
+        Returns:
+            Optional[str]: Encoded cursor, or None if this is the last page.
+        """
+        if len(items) < limit or not items:
+            return None
+        last = items[-1]
+        return CursorDTO(upload_time=last.upload_time, id=last.id).encode()
 
     @staticmethod
     def get_limit_offset(pagination: PaginationDTO) -> Tuple[int, int]:
@@ -0,0 +1,591 @@
+"""asyncio server engine.
+
+Serves the same routes as ``app.UploadHandler`` on top of asyncio streams:
+HTML pages, ``/frontend/*``, ``/media/<name>``, ``/api/files``, ``/api/db/stats``, ``/upload/``,
+``/api/upload/batch``, ``/api/delete/<name>`` and bulk ``DELETE /api/files``.
+Connections are HTTP/1.1 keep-alive, so idle clients (e.g. the nginx upstream
+pool) cost a coroutine rather than a thread or a process. Uploads are parsed chunk by chunk as they arrive from the socket
+and written straight into IMAGE_DIR, and database calls go through the async
+psycopg pool.
+
+Selected with ``SERVER_ENGINE=asyncio``.
+"""
+
+import asyncio
+import json
+import os
+import urllib.parse
+from contextlib import suppress
+from dataclasses import dataclass
+from http import HTTPStatus
+from time import perf_counter
+from typing import Any, Optional
+
+from cache.file_cache import get_file_cache
+from db.dependencies import get_async_image_repository
+from db.dto import ImageDTO
+from db.session import get_pool_stats
+from exceptions.api_errors import APIError
+from exceptions.repository_errors import RepositoryError
+from handlers.batch import (
+    batch_image_dtos,
+    batch_response,
+    check_delete_body_length,
+    discard_saved,
+    finish_batch_delete,
+    parse_delete_request,
+    persist_batch
+)
+from handlers.responses import files_page_response
+from handlers.static import (
+    IMAGE_CONTENT_TYPES,
+    STATIC_CONTENT_TYPES,
+    frontend_path,
+    get_content_type,
+    media_path,
+    page_path,
+    prepare_file_response,
+    select_static_variant
+)
+from handlers.upload import StreamingUpload, check_content_length, parse_content_length
+from handlers.variants import get_variant_service, parse_variant_params, warm_uploaded
+from interfaces.pagination import PaginationError
+from metrics.profiling import (
+    PROFILE_HEADER,
+    PROFILER_PATHS,
+    TOKEN_HEADER as PROFILER_TOKEN_HEADER,
+    control_sampling_profiler,
+    start_request
+)
+from metrics.prometheus import CONTENT_TYPE as METRICS_CONTENT_TYPE, render_metrics
+from metrics.registry import count_upload_bytes, get_metrics_registry, observe_request, timed
+from mixins.pagination import PaginationMixin
+from settings.config import config
+from settings.logging_config import get_logger, log_access
+
+logger = get_logger(__name__)
+
+MAX_HEADER_SIZE = 64 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class AsyncRequest:
+    """Parsed request line and headers of a single HTTP request.
+
+    Attributes:
+        method (str): HTTP method, e.g. "GET".
+        path (str): Raw request target including the query string.
+        version (str): HTTP version from the request line.
+        headers (dict[str, str]): Request headers with lower-case names.
+    """
+    method: str
+    path: str
+    version: str
+    headers: dict[str, str]
+
+    @property
+    def content_length(self) -> Optional[int]:
+        """Parsed Content-Length; raises InvalidContentLengthError for a malformed value."""
+        return parse_content_length(self.headers.get('content-length'))
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[AsyncRequest]:
+    """Read the request line and headers of the next request on a connection.
+
+    Returns:
+        Optional[AsyncRequest]: The parsed request, or None if the client closed
+        the connection, stayed idle longer than ASYNC_KEEPALIVE_TIMEOUT or sent
+        a malformed head.
+    """
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=config.ASYNC_KEEPALIVE_TIMEOUT)
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+        return None
+
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, path, version = lines[0].split(' ', 2)
+    except ValueError:
+        logger.warning("✖ Malformed request line: %r", lines[0])
+        return None
+
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    return AsyncRequest(method=method, path=path, version=version, headers=headers)
+
+
+class AsyncUploadHandler(PaginationMixin):
+    """Handles one request on a keep-alive connection.
+
+    Mirrors ``app.UploadHandler``: the ``do_*`` methods implement the same
+    routes and responses, only with awaitable I/O.
+    """
+
+    def __init__(self, request: AsyncRequest, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.request = request
+        self.path = request.path
+        self.headers = request.headers
+        self.reader = reader
+        self.writer = writer
+        self.close_connection = not request.keep_alive
+        self._body_pending = 'content-length' in request.headers
+        self.status: Optional[int] = None
+
+    async def handle(self) -> None:
+        """Dispatch the request to the matching ``do_*`` method and record it in the access log."""
+        started = perf_counter()
+        profile = start_request(self._get_header(PROFILE_HEADER))
+        try:
+            method = getattr(self, f'do_{self.request.method}', None)
+            try:
+                parse_content_length(self._get_header('Content-Length'))
+            except APIError as e:
+                # Довжину тіла не визначити — з'єднання не перевикористовується
+                self.close_connection = True
+                self._body_pending = False
+                await self.send_json_error(e.status_code, e.message)
+            else:
+                if method is None:
+                    await self.send_json_error(501, f"Unsupported method ({self.request.method})")
+                else:
+                    await method()
+
+            if self._body_pending:
+                await self.drain_body()
+        finally:
+            if profile is not None:
+                profile.finish(self.request.method, self.path, self.status, perf_counter() - started)
+        if self.status is not None:
+            duration = perf_counter() - started
+            log_access(self.request.method, self.path, self.status, duration, "asyncio")
+            observe_request(self.request.method, self.path, self.status, duration)
+
+    async def drain_body(self) -> None:
+        """Skip an unread request body so the connection can be reused."""
+        remaining = self.request.content_length or 0
+        while remaining > 0:
+            chunk = await self.reader.read(min(READ_CHUNK_SIZE, remaining))
+            if not chunk:
+                self.close_connection = True
+                break
+            remaining -= len(chunk)
+        self._body_pending = False
+
+    def write_head(self, status_code: int, headers: dict) -> None:
+        """Buffer the status line and headers, adding the Connection header."""
+        status = HTTPStatus(status_code)
+        self.status = status.value
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+        headers = {**headers, "Connection": "close" if self.close_connection else "keep-alive"}
+        lines.extend(f"{key}: {value}" for key, value in headers.items())
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+
+    async def send(self, status_code: int, headers: dict, body: bytes = b"") -> None:
+        """Write a complete response with Content-Length and Connection headers."""
+        self.write_head(status_code, {**headers, "Content-Length": str(len(body))})
+        self.writer.write(body)
+        await self.writer.drain()
+
+    async def send_json(self, status_code: int, payload: Any) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        await self.send(status_code, {"Content-Type": "application/json"}, body)
+
+    async def send_json_error(self, status_code: int, message: str) -> None:
+        await self.send(status_code, {"Content-Type": "application/json"}, json.dumps({"detail": message}).encode())
+
+    async def send_file(self, path: str, content_type: str, extra_headers: dict = None) -> None:
+        """Send a file with validators, Range and conditional GET support.
+
+        Small files are served from the per-worker FileCache (misses are read in a
+        thread). Larger ones are sent with loop.sendfile(): zero-copy os.sendfile()
+        on plain sockets, a chunked copy otherwise.
+        """
+        cache = get_file_cache()
+        entry = cache.get(path, os.stat(path))
+        if entry is None:
+            # Промах або завеликий файл: один відкритий дескриптор і для кешу, і для sendfile
+            f = await asyncio.to_thread(open, path, 'rb')
+            try:
+                st = os.fstat(f.fileno())
+                entry = await asyncio.to_thread(cache.load, path, f, st, content_type)
+                if entry is None:
+                    response = prepare_file_response(st, content_type, self._get_header)
+                    self.write_head(response.status, {**response.headers, **(extra_headers or {})})
+                    await self.writer.drain()
+                    if response.length:
+                        loop = asyncio.get_running_loop()
+                        await loop.sendfile(self.writer.transport, f, response.offset, response.length)
+                    return
+            finally:
+                f.close()
+
+        response = prepare_file_response(entry.stat, content_type, self._get_header, entry.headers)
+        self.write_head(response.status, {**response.headers, **(extra_headers or {})})
+        if response.length:
+            self.writer.write(memoryview(entry.body)[response.offset:response.offset + response.length])
+        await self.writer.drain()
+
+    async def send_static_file(self, path: str, content_type: str) -> None:
+        """Send a frontend file, picking its precompressed variant by Accept-Encoding."""
+        variant, extra_headers = select_static_variant(path, self._get_header('Accept-Encoding'))
+        await self.send_file(variant, content_type, extra_headers)
+
+    def _get_header(self, name: str) -> Optional[str]:
+        return self.headers.get(name.lower())
+
+    async def do_DELETE(self):
+        if self.path == '/api/files':
+            await self.handle_batch_delete()
+            return
+
+        if not self.path.startswith('/api/delete/'):
+            logger.warning("✖ Unsupported DELETE path: %s", self.path)
+            await self.send_json_error(404, "Not Found")
+            return
+
+        filename = self.path.removeprefix('/api/delete/')
+        repository = await get_async_image_repository()
+
+        # Лише позначка deleted_at: файл, рядок і blob прибирає reaper у фоні
+        try:
+            deleted = await repository.delete_by_filename(filename)
+        except RepositoryError as e:
+            logger.error("✖ Failed to delete DB record: %s", e.message)
+            await self.send_json_error(e.status_code, e.message)
+            return
+
+        if not deleted:
+            logger.warning("✖ No DB record found for: %s", filename)
+            await self.send_json_error(404, "File record not found in DB")
+            return
+        logger.info("✓ Marked as deleted: %s", filename)
+
+        await self.send_json(200, {"detail": "File and DB record deleted"})
+
+    async def handle_batch_delete(self):
+        """DELETE /api/files — soft-delete many images by filenames or upload time in one statement."""
+        content_length = self.request.content_length
+        self._body_pending = False
+        try:
+            check_delete_body_length(content_length)
+        except APIError as e:
+            logger.warning("✖ Invalid bulk delete request: %s", e.message)
+            self.close_connection = True
+            await self.send_json_error(e.status_code, e.message)
+            return
+
+        try:
+            body = await self.reader.readexactly(content_length)
+            filenames, older_than = parse_delete_request(body)
+        except asyncio.IncompleteReadError:
+            self.close_connection = True
+            return
+        except APIError as e:
+            logger.warning("✖ Invalid bulk delete request: %s", e.message)
+            await self.send_json_error(e.status_code, e.message)
+            return
+
+        repository = await get_async_image_repository()
+        try:
+            deleted = await repository.delete_many(filenames=filenames, older_than=older_than)
+        except RepositoryError as e:
+            logger.error("✖ Failed to delete DB records: %s", e.message)
+            await self.send_json_error(e.status_code, e.message)
+            return
+
+        response = finish_batch_delete(filenames, deleted)
+        logger.info("✓ Bulk delete: %s deleted, %s failed", response['deleted'], response['failed'])
+        await self.send_json(200, response)
+
+    async def do_POST(self):
+        logger.info("POST request received: %s", self.path)
+
+        if self.path == '/api/upload/batch':
+            await self.handle_batch_upload()
+            return
+
+        if self.path in PROFILER_PATHS:
+            # Семплер стеків лише того воркера, що прийняв запит
+            status, payload = control_sampling_profiler(self.path, self._get_header(PROFILER_TOKEN_HEADER))
+            await self.send_json(status, payload)
+            return
+
+        if self.path != '/upload/':
+            logger.warning("Invalid POST path: %s", self.path)
+            await self.send_json_error(404, 'Not Found')
+            return
+
+        content_type = self.headers.get('content-type', "")
+        if "multipart/form-data" not in content_type:
+            logger.warning("Invalid Content-Type: %s", content_type)
+            await self.send_json_error(400, "Bad Request: Expected multipart/form-data.")
+            return
+
+        content_length = self.request.content_length
+        try:
+            check_content_length(content_length)
+        except APIError as e:
+            logger.error("APIError: %s", e.message)
+            self.close_connection = True
+            await self.send_json_error(e.status_code, e.message)
+            return
+        logger.info("Content-Length: %d", content_length)
+
+        # Тіло запиту розбирається частинами прямо з сокета у файл в IMAGE_DIR.
+        # Розбір, хешування, перевірка заголовка й запис на диск — у пулі потоків, не в event loop
+        self._body_pending = False
+        remaining = content_length
+        try:
+            with StreamingUpload(content_type) as upload:
+                while remaining > 0:
+                    chunk = await self.reader.read(min(READ_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        self.close_connection = True
+                        return
+                    await asyncio.to_thread(upload.write, chunk)
+                    remaining -= len(chunk)
+                saved_file_info = await asyncio.to_thread(upload.finalize)
+        except APIError as e:
+            logger.error("APIError: %s", e.message)
+            # Великий файл відхиляється одразу, решта тіла не читається
+            self.close_connection = remaining > 0
+            await self.send_json_error(e.status_code, e.message)
+            return
+        count_upload_bytes('/upload/', content_length)
+
+        # --- інтеграція з БД ---
+        repository = await get_async_image_repository()
+        image_dto = ImageDTO(
+            filename=saved_file_info['filename'],
+            original_name=saved_file_info['original_name'],
+            size=saved_file_info['size'],
+            file_type=saved_file_info['file_type'],
+            content_hash=saved_file_info['content_hash'],
+            width=saved_file_info['width'],
+            height=saved_file_info['height'],
+            mime_type=saved_file_info['mime_type']
+        )
+
+        try:
+            with timed('/upload/', 'db'):
+                await repository.create(image_dto)
+        except RepositoryError as e:
+            logger.error("Failed to save image metadata to DB: %s", e.message)
+            # Файл уже збережено — без запису в БД він нікому не потрібен
+            await asyncio.to_thread(discard_saved, [saved_file_info])
+            await self.send_json_error(e.status_code, e.message)
+            return
+
+        logger.info("Upload completed: %s", saved_file_info['filename'])
+        await self.send_json(200, saved_file_info)
+        # Мініатюри галереї (UPLOAD_PREGENERATE_VARIANTS) — у фоні, після відповіді
+        warm_uploaded([saved_file_info['filename']])
+
+    async def handle_batch_upload(self):
+        """POST /api/upload/batch — many files per request, one create_many() transaction."""
+        content_type = self.headers.get('content-type', "")
+        if "multipart/form-data" not in content_type:
+            logger.warning("Invalid Content-Type: %s", content_type)
+            await self.send_json_error(400, "Bad Request: Expected multipart/form-data.")
+            return
+
+        content_length = self.request.content_length
+        try:
+            check_content_length(content_length, config.UPLOAD_BATCH_MAX_FILES)
+        except APIError as e:
+            logger.error("APIError: %s", e.message)
+            self.close_connection = True
+            await self.send_json_error(e.status_code, e.message)
+            return
+
+        self._body_pending = False
+        remaining = content_length
+        try:
+            with StreamingUpload(content_type, max_files=config.UPLOAD_BATCH_MAX_FILES) as upload:
+                while remaining > 0:
+                    chunk = await self.reader.read(min(READ_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        self.close_connection = True
+                        return
+                    await asyncio.to_thread(upload.write, chunk)
+                    remaining -= len(chunk)
+                parts = await asyncio.to_thread(upload.finish)
+                # Збереження файлів (перевірені ще під час розбору) — теж у пулі потоків
+                results = await asyncio.to_thread(persist_batch, upload, parts)
+        except APIError as e:
+            logger.error("APIError: %s", e.message)
+            self.close_connection = remaining > 0
+            await self.send_json_error(e.status_code, e.message)
+            return
+        count_upload_bytes('/api/upload/batch', content_length)
+
+        repository = await get_async_image_repository()
+        try:
+            with timed('/api/upload/batch', 'db'):
+                created = await repository.create_many(batch_image_dtos(results))
+        except RepositoryError as e:
+            logger.error("Failed to save batch metadata to DB: %s", e.message)
+            await asyncio.to_thread(discard_saved, results)
+            await self.send_json_error(e.status_code, e.message)
+            return
+
+        response = batch_response(results, created)
+        logger.info("Batch upload completed: %d saved, %d failed", response['uploaded'], response['failed'])
+        await self.send_json(200, response)
+        warm_uploaded(result['filename'] for result in results if 'error' not in result)
+
+    async def do_GET(self):
+        html_path = page_path(self.path)
+        if html_path:
+            if os.path.isfile(html_path):
+                try:
+                    await self.send_static_file(html_path, "text/html")
+                    logger.info("→ Served %s", os.path.basename(html_path))
+                except Exception as e:
+                    logger.error("✖ Failed to serve %s: %s", os.path.basename(html_path), e)
+                    await self.send_json_error(500, f"Failed to serve {os.path.basename(html_path)}")
+            else:
+                logger.warning("✖ %s not found", os.path.basename(html_path))
+                await self.send_json_error(404, f"{os.path.basename(html_path)} not found")
+            return
+
+        if self.path == '/api/cache/stats':
+            await self.send_json(200, {
+                "pid": os.getpid(),
+                "file_cache": get_file_cache().stats(),
+                "variants": get_variant_service().stats()
+            })
+            return
+
+        if self.path == '/api/db/stats':
+            await self.send_json(200, get_pool_stats())
+            return
+
+        if self.path == '/metrics':
+            # Сума по всіх воркерах: знімки з METRICS_DIR плюс поточні числа цього процесу
+            body = await asyncio.to_thread(render_metrics, get_metrics_registry())
+            await self.send(200, {"Content-Type": METRICS_CONTENT_TYPE}, body)
+            return
+
+        if self.path.startswith('/api/files'):
+            try:
+                parsed_url = urllib.parse.urlparse(self.path)
+                query_params = urllib.parse.parse_qs(parsed_url.query)
+
+                limit = int(query_params.get("limit", [10])[0])
+                offset = int(query_params.get("offset", [0])[0])
+                # Keyset-пагінація: ?after=<cursor> замість OFFSET
+                after = self.parse_cursor({key: values[0] for key, values in query_params.items()})
+
+                repository = await get_async_image_repository()
+                with timed('/api/files', 'db'):
+                    files, total_count = await repository.list_page(limit=limit, offset=offset, after=after)
+
+                with timed('/api/files', 'serialize'):
+                    status, headers, body = files_page_response(
+                        files, total_count, self.get_next_cursor(files, limit), self._get_header('If-None-Match')
+                    )
+                await self.send(status, headers, body)
+                logger.info("→ Served files list (limit=%s, offset=%s, total=%s)", limit, offset, total_count)
+
+            except PaginationError as e:
+                logger.warning("✖ Invalid pagination parameters: %s", e)
+                await self.send_json_error(400, str(e))
+            except Exception as e:
+                logger.error("✖ Failed to get files: %s", e)
+                await self.send_json_error(500, "Failed to get files")
+            return
+
+        if self.path.startswith('/media/'):
+            parsed_url = urllib.parse.urlsplit(self.path)
+            image_name = parsed_url.path.removeprefix('/media/')
+            image_path = media_path(image_name)
+
+            if os.path.isfile(image_path):
+                try:
+                    spec = parse_variant_params(parsed_url.query)
+                    if spec is not None:
+                        image_path = await get_variant_service().get_variant_async(image_path, spec)
+                    await self.send_file(image_path, get_content_type(image_path, IMAGE_CONTENT_TYPES))
+                    logger.info("→ Served image: %s", image_name)
+                except APIError as e:
+                    logger.warning("✖ Failed to serve image variant: %s", e)
+                    await self.send_json_error(e.status_code, str(e))
+                except Exception as e:
+                    logger.error("✖ Failed to serve image: %s", e)
+                    await self.send_json_error(500, "Failed to serve image.")
+            else:
+                logger.warning("✖ Image not found: %s", image_path)
+                await self.send_json_error(404, "Image not found.")
+            return
+
+        if self.path.startswith('/frontend/'):
+            static_path = frontend_path(self.path.removeprefix('/frontend/'))
+
+            if os.path.isfile(static_path):
+                try:
+                    await self.send_static_file(static_path, get_content_type(static_path, STATIC_CONTENT_TYPES))
+                except Exception as e:
+                    logger.error("✖ Failed to serve static file: %s", e)
+                    await self.send_json_error(500, "Failed to serve static file.")
+            else:
+                logger.warning("✖ Static file not found: %s", self.path)
+                await self.send_json_error(404, "Static file not found.")
+            return
+
+        logger.warning("✖ Unknown GET path: %s", self.path)
+        await self.send_json_error(404, "Not Found")
+
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Serve requests on one client connection until it is closed or goes idle."""
+    try:
+        while True:
+            request = await read_request(reader)
+            if request is None:
+                break
+
+            handler = AsyncUploadHandler(request, reader, writer)
+            await handler.handle()
+            if handler.close_connection:
+                break
+    except ConnectionError:
+        pass
+    except Exception as e:
+        logger.error("✖ Unhandled error in connection handler: %s", e)
+    finally:
+        writer.close()
+        with suppress(ConnectionError):
+            await writer.wait_closed()
+
+
+async def serve(port: int, reuse_port: bool = False) -> None:
+    """Listen on ``port`` and serve connections until cancelled."""
+    server = await asyncio.start_server(
+        handle_connection,
+        "0.0.0.0",
+        port,
+        reuse_port=reuse_port,
+        backlog=config.SERVER_REQUEST_QUEUE_SIZE,
+        limit=MAX_HEADER_SIZE
+    )
+    async with server:
+        await server.serve_forever()
+
+
+def run_async_server(port: int, reuse_port: bool = False) -> None:
+    """Run the asyncio engine on ``port`` in the current process (blocking)."""
+    asyncio.run(serve(port, reuse_port))
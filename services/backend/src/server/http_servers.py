@@ -0,0 +1,117 @@
+"""HTTP server implementations for the upload server.
+
+This module provides the server classes behind the ``SERVER_MODE`` setting:
+
+- ``single``: the classic blocking ``HTTPServer``, one request at a time.
+- ``threaded``: ``BoundedThreadingHTTPServer`` with a fixed pool of worker
+  threads and a bounded queue of accepted connections.
+- ``prefork``: the same threaded server, but every worker process binds the
+  same port with ``SO_REUSEPORT`` so the kernel balances connections between
+  processes.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, ThreadingHTTPServer
+from typing import Any, cast
+
+from interfaces.protocols import RequestHandlerFactory
+
+SERVER_MODES = ("single", "threaded", "prefork")
+
+
+class BoundedThreadingHTTPServer(ThreadingHTTPServer):
+    """HTTP server that handles requests on a fixed-size thread pool.
+
+    Unlike ``ThreadingHTTPServer`` it never starts more than ``max_threads``
+    threads. Accepted connections wait in an in-process queue of at most
+    ``request_queue_size`` entries; when the queue is full the accept loop
+    blocks and new clients wait in the kernel listen backlog instead.
+
+    Attributes:
+        max_threads (int): Number of worker threads.
+        request_queue_size (int): Listen backlog and in-process queue depth.
+    """
+
+    def __init__(
+            self,
+            server_address: tuple[str, int],
+            handler_class: Any,
+            max_threads: int = 16,
+            request_queue_size: int = 64,
+            reuse_port: bool = False,
+            bind_and_activate: bool = True
+    ):
+        self.max_threads = max_threads
+        # socketserver використовує request_queue_size як backlog для listen()
+        self.request_queue_size = request_queue_size
+        self.allow_reuse_port = reuse_port
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="http-worker")
+        self._slots = threading.BoundedSemaphore(max_threads + request_queue_size)
+        super().__init__(server_address, handler_class, bind_and_activate)
+
+    def process_request(self, request, client_address) -> None:
+        """Queue the request for a worker thread.
+
+        Blocks the accept loop while all threads are busy and the queue is full.
+        """
+        self._slots.acquire()
+        try:
+            self._executor.submit(self._process_request_worker, request, client_address)
+        except RuntimeError:
+            # Пул вже зупинено (server_close) — закриваємо з'єднання
+            self._slots.release()
+            self.shutdown_request(request)
+
+    def _process_request_worker(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self) -> None:
+        """Close the listening socket and wait for in-flight requests."""
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+
+def create_server(
+        server_address: tuple[str, int],
+        handler_class: Any,
+        mode: str = "threaded",
+        max_threads: int = 16,
+        request_queue_size: int = 64
+) -> HTTPServer:
+    """Build an HTTP server for the given ``SERVER_MODE``.
+
+    Args:
+        server_address (tuple[str, int]): Host and port to bind.
+        handler_class: Request handler class (e.g. ``UploadHandler``).
+        mode (str): One of ``single``, ``threaded`` or ``prefork``.
+        max_threads (int): Worker threads per process (threaded/prefork).
+        request_queue_size (int): Listen backlog and in-process queue depth.
+
+    Returns:
+        HTTPServer: A bound and listening server instance.
+
+    Raises:
+        ValueError: If ``mode`` is not a known server mode.
+    """
+    handler = cast(RequestHandlerFactory, handler_class)
+
+    if mode == "single":
+        return HTTPServer(server_address, handler)
+
+    if mode in ("threaded", "prefork"):
+        return BoundedThreadingHTTPServer(
+            server_address,
+            handler,
+            max_threads=max_threads,
+            request_queue_size=request_queue_size,
+            reuse_port=mode == "prefork"
+        )
+
+    raise ValueError(f"Unknown server mode: {mode}. Expected one of: {', '.join(SERVER_MODES)}")
@@ -1,5 +1,9 @@
+import logging
+
+from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
+from typing import Literal
 
 BASE_DIR = Path(__file__).resolve().parents[4]
 
@@ -14,7 +18,115 @@ class AppConfig(BaseSettings):
     WEB_SERVER_WORKERS: int
     WEB_SERVER_START_PORT: int
 
+    # Режим сервера: single — один запит за раз, threaded — пул потоків,
+    # prefork — усі воркери слухають WEB_SERVER_START_PORT (SO_REUSEPORT)
+    SERVER_MODE: Literal["single", "threaded", "prefork"] = "threaded"
+    SERVER_THREADS: int = 16
+    SERVER_REQUEST_QUEUE_SIZE: int = 64
+
+    # Рушій сервера: http — http.server (UploadHandler), asyncio — server.async_engine
+    SERVER_ENGINE: Literal["http", "asyncio"] = "http"
+    # Скільки секунд тримати неактивне keep-alive з'єднання (asyncio)
+    ASYNC_KEEPALIVE_TIMEOUT: float = 75.0
+
+    # LRU-кеш файлів у пам'яті воркера (0 — вимкнено); більші файли йдуть через sendfile
+    FILE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    FILE_CACHE_MAX_ENTRY_BYTES: int = 1024 * 1024
+
+    # Попередньо стиснені (.gz/.br) варіанти фронтенду; None — поруч із файлами
+    STATIC_PRECOMPRESS_ON_STARTUP: bool = True
+    STATIC_PRECOMPRESSED_DIR: str | None = None
+
+    # totalCount для /api/files: exact — COUNT(*), counter — лічильник на тригерах, estimate — pg_class
+    IMAGE_COUNT_MODE: Literal["exact", "counter", "estimate"] = "exact"
+    # Скільки секунд воркер повторно використовує порахований totalCount (0 — без кешу)
+    IMAGE_COUNT_CACHE_TTL: float = 0.0
+
+    # Варіанти зображень (/media/<name>?w=320&fmt=webp); None — IMAGE_DIR/.variants
+    VARIANT_DIR: str | None = None
+    VARIANT_MAX_DIMENSION: int = 2048
+    VARIANT_QUALITY: int = 80
+    # Варіанти (query-рядки /media/), що генеруються у фоні одразу після завантаження — мініатюри галереї.
+    # Вимкнено за замовчуванням: перше ж завантаження запускає пул процесів воркера (див. IMAGE_POOL_WORKERS)
+    UPLOAD_PREGENERATE_VARIANTS: list[str] = []
+
+    # Пул процесів для роботи Pillow (варіанти, мініатюри) — свій у кожному воркері, запускається при першій задачі.
+    # Кожен процес — окремий інтерпретатор з Pillow (~40-50 МБ): разом WEB_SERVER_WORKERS * IMAGE_POOL_WORKERS
+    IMAGE_POOL_WORKERS: int = 2
+    # Задач у черзі й у роботі; понад це запити отримують 503, фонові задачі пропускаються
+    IMAGE_POOL_MAX_PENDING: int = 32
+    # Секунд на одну задачу (і на очікування її запитом)
+    IMAGE_POOL_TASK_TIMEOUT: float = 15.0
+
+    # Пул з'єднань до БД у кожному воркері; розмір за замовчуванням — з режиму сервера (db.pool.default_pool_size)
+    DB_POOL_MIN_SIZE: int | None = None
+    DB_POOL_MAX_SIZE: int | None = None
+    # Скільки з'єднань на всі воркери разом (ділиться на WEB_SERVER_WORKERS)
+    DB_POOL_TOTAL_CONNECTIONS: int = 40
+    DB_POOL_TIMEOUT: float = 30.0
+    # Скільки запитів може чекати на з'єднання (0 — без ліміту)
+    DB_POOL_MAX_WAITING: int = 0
+    DB_POOL_MAX_IDLE: float = 600.0
+    DB_POOL_MAX_LIFETIME: float = 3600.0
+    # Після скількох виконань запит стає prepared (0 — вимкнено; PgBouncer потребує max_prepared_statements)
+    DB_PREPARE_THRESHOLD: int = 5
+
+    # Кеш перших сторінок списку у воркері (LIST_CACHE_PAGES=0 або LIST_CACHE_TTL=0 — вимкнено)
+    LIST_CACHE_PAGES: int = 3
+    LIST_CACHE_TTL: float = 2.0
+    # Інвалідація між воркерами через LISTEN/NOTIFY (init-sql/050) — окреме з'єднання напряму з Postgres
+    # на кожен воркер в обхід PgBouncer; без неї сторінки застарівають щонайбільше на LIST_CACHE_TTL
+    IMAGE_CACHE_NOTIFY: bool = False
+
+    # POST /api/upload/batch: скільки файлів в одному запиті і скільки потоків їх перевіряє/зберігає
+    UPLOAD_BATCH_MAX_FILES: int = 100
+    UPLOAD_BATCH_WORKERS: int = 4
+    # DELETE /api/files: скільки імен файлів можна передати в одному запиті
+    DELETE_BATCH_MAX_FILES: int = 1000
+
+    # Фонове видалення: DELETE лише ставить deleted_at, reaper прибирає файли й рядки пачками
+    REAPER_ENABLED: bool = True
+    REAPER_INTERVAL: float = 5.0
+    REAPER_BATCH_SIZE: int = 500
+    # Звірка IMAGE_DIR з БД раз на RECONCILE_INTERVAL секунд (0 — вимкнено); молодші за grace файли не чіпаємо
+    RECONCILE_INTERVAL: float = 3600.0
+    RECONCILE_GRACE_SECONDS: float = 600.0
+
+    # Рівні підкаталогів IMAGE_DIR (ab/cd/<name>) для нових файлів; 0 — усе в корені
+    IMAGE_SHARD_DEPTH: int = 2
+    # Знімок інвентаризації IMAGE_DIR (list_uploaded_images(use_index=True)); None — IMAGE_DIR/.inventory/index.json
+    IMAGE_INVENTORY_PATH: str | None = None
+
+    # Логи пише один потік головного процесу; воркери лише кладуть записи в чергу
+    # Назва рівня logging у будь-якому регістрі (debug, INFO, ...)
+    LOG_LEVEL: str = "INFO"
+    # JSON access-лог (LOG_DIR/access.log) з тривалістю запиту
+    ACCESS_LOG_ENABLED: bool = True
+    # Частка успішних запитів, що потрапляють в access-лог; помилки й повільні пишуться завжди
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+    ACCESS_LOG_SLOW_MS: float = 1000.0
+
+    # Метрики для Prometheus (/metrics): кожен процес скидає свої в METRICS_DIR, /metrics їх сумує
+    METRICS_ENABLED: bool = True
+    # None — <tmp>/upload-server-metrics; має бути спільним для всіх воркерів
+    METRICS_DIR: str | None = None
+    METRICS_FLUSH_INTERVAL: float = 5.0
+
+    # Профілювання: cProfile запиту з заголовком X-Profile, семплер стеків воркера (SIGUSR2 або /api/profiler/*)
+    PROFILING_ENABLED: bool = False
+    # Якщо задано (непорожнє) — X-Profile і X-Profile-Token мають дорівнювати йому; без нього /api/profiler/* — 403
+    PROFILING_TOKEN: str | None = None
+    # None — <tmp>/upload-server-profiles
+    PROFILE_DIR: str | None = None
+    PROFILE_SAMPLING_INTERVAL_MS: float = 10.0
+    # Семплер зупиняється сам, якщо його не вимкнули
+    PROFILE_SAMPLING_MAX_SECONDS: float = 300.0
+    # Запити, довші за поріг, логуються з розкладом за фазами; 0 — вимкнено
+    SLOW_REQUEST_LOG_MS: float = 0.0
+
     MAX_FILE_SIZE: int = 5 * 1024 * 1024
+    # Більше пікселів — відмова ще до запису файлу (захист від decompression bomb)
+    MAX_IMAGE_PIXELS: int = 40_000_000
     SUPPORTED_FORMATS: set[str] = {'.jpg', '.png', '.gif'}
 
     POSTGRES_DB: str
@@ -65,6 +177,14 @@ class AppConfig(BaseSettings):
         """
         return self.pgbouncer_url if self.USE_PGBOUNCER else self.database_url
 
+    @field_validator("LOG_LEVEL")
+    @classmethod
+    def normalize_log_level(cls, value: str) -> str:
+        """Upper-case LOG_LEVEL, since logging only accepts level names like "DEBUG"."""
+        level = value.strip().upper()
+        if level not in logging.getLevelNamesMapping():
+            raise ValueError(f"unknown log level {value!r}")
+        return level
 
     model_config = SettingsConfigDict(
         env_file=BASE_DIR / ".env",
@@ -77,6 +197,16 @@ class AppConfig(BaseSettings):
             self.IMAGE_DIR = str(BASE_DIR / self.IMAGE_DIR)
         if not Path(self.LOG_DIR).is_absolute():
             self.LOG_DIR = str(BASE_DIR / self.LOG_DIR)
+        if self.STATIC_PRECOMPRESSED_DIR and not Path(self.STATIC_PRECOMPRESSED_DIR).is_absolute():
+            self.STATIC_PRECOMPRESSED_DIR = str(BASE_DIR / self.STATIC_PRECOMPRESSED_DIR)
+        if not self.IMAGE_INVENTORY_PATH:
+            self.IMAGE_INVENTORY_PATH = str(Path(self.IMAGE_DIR) / '.inventory' / 'index.json')
+        elif not Path(self.IMAGE_INVENTORY_PATH).is_absolute():
+            self.IMAGE_INVENTORY_PATH = str(BASE_DIR / self.IMAGE_INVENTORY_PATH)
+        if not self.VARIANT_DIR:
+            self.VARIANT_DIR = str(Path(self.IMAGE_DIR) / '.variants')
+        elif not Path(self.VARIANT_DIR).is_absolute():
+            self.VARIANT_DIR = str(BASE_DIR / self.VARIANT_DIR)
 
 config = AppConfig()
 config.resolve_paths()
\ No newline at end of file
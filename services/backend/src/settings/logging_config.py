@@ -1,34 +1,193 @@
+"""Logging setup shared by every module.
+
+Loggers from ``get_logger()`` don't write anything on the request path: their
+only handler puts the record on a multiprocessing queue. A single listener
+thread in the main process formats the records and writes them to the
+console, ``LOG_DIR/app.log`` and (for access records) ``LOG_DIR/access.log``.
+Worker processes forked by ``app.run()`` inherit the queue, so all of them
+share the one writer and their lines never interleave mid-line. The main
+process itself logs through an in-process queue of its own (a process
+writing to a multiprocessing queue closes its read end at exit).
+
+A process started with ``spawn`` (e.g. the image variant pool) gets its own
+queue and listener.
+"""
+
+import json
 import logging
+import multiprocessing
+import os
+import queue
+import random
+import threading
+from datetime import datetime, UTC
+from logging.handlers import QueueHandler, QueueListener
+from multiprocessing.util import Finalize
 from pathlib import Path
+from typing import Optional
+
 from dotenv import load_dotenv
-import os
 
-BASE_DIR = Path(__file__).resolve().parents[4]
+from settings.config import config
 
 load_dotenv()  # Завантажує змінні з .env
 
+ACCESS_LOGGER_NAME = "access"
+# Як часто слухач перевіряє, чи його не зупиняють, коли черга порожня
+_POLL_INTERVAL = 0.2
+
+
+class _CollectorListener(QueueListener):
+    """QueueListener that stops once asked to and the queue is drained.
+
+    Children may still be writing when it is stopped, so instead of a
+    sentinel behind the records of this process it waits for a quiet queue.
+    """
+
+    def __init__(self, log_queue, *handlers):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self._stopping = threading.Event()
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return self._sentinel
+
+    def enqueue_sentinel(self):
+        self._stopping.set()
+
+
+class JsonAccessFormatter(logging.Formatter):
+    """One JSON object per line: time, worker and the record's ``access`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=UTC).isoformat(timespec='milliseconds'),
+            "worker": record.processName,
+            **getattr(record, ACCESS_LOGGER_NAME, {})
+        }
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _is_access(record: logging.LogRecord) -> bool:
+    return record.name == ACCESS_LOGGER_NAME
+
+
+def _is_not_access(record: logging.LogRecord) -> bool:
+    return record.name != ACCESS_LOGGER_NAME
+
+
+def _build_handlers() -> list[logging.Handler]:
+    log_dir = Path(config.LOG_DIR)
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    # Консольний логер
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    console_handler.addFilter(_is_not_access)
+
+    # Файловий логер
+    file_handler = logging.FileHandler(log_dir / "app.log", encoding='utf-8')
+    file_handler.setLevel(logging.INFO)
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s'))
+    file_handler.addFilter(_is_not_access)
+
+    access_handler = logging.FileHandler(log_dir / "access.log", encoding='utf-8')
+    access_handler.setFormatter(JsonAccessFormatter())
+    access_handler.addFilter(_is_access)
+    return [console_handler, file_handler, access_handler]
+
+
+_queue_handler: Optional[QueueHandler] = None
+# Черга до збирача: з неї читає лише процес, що її створив, пишуть у неї лише дочірні
+_collector_queue = None
+_listeners: list[QueueListener] = []
+_setup_lock = threading.Lock()
+
+
+def _stop_listeners() -> None:
+    for listener in _listeners:
+        listener.stop()
+
+
+def _get_queue_handler() -> QueueHandler:
+    """Create the queues and start the listeners on first use.
+
+    Records of this process go through an in-process queue; forked children
+    switch to the multiprocessing queue (see _use_collector_queue()).
+    """
+    global _queue_handler, _collector_queue
+    if _queue_handler is None:
+        with _setup_lock:
+            if _queue_handler is None:
+                handlers = _build_handlers()
+                local_queue = queue.SimpleQueue()
+                _collector_queue = multiprocessing.Queue()
+                _listeners.extend([
+                    QueueListener(local_queue, *handlers, respect_handler_level=True),
+                    _CollectorListener(_collector_queue, *handlers)
+                ])
+                for listener in _listeners:
+                    listener.start()
+                # Після join дочірніх процесів — щоб дописати і їхні останні записи
+                Finalize(None, _stop_listeners, exitpriority=-100)
+                _queue_handler = QueueHandler(local_queue)
+    return _queue_handler
+
+
+def _use_collector_queue() -> None:
+    # Потоки слухачів не переживають fork: дочірній процес лише відправляє записи батьківському
+    _listeners.clear()
+    if _queue_handler is not None:
+        _queue_handler.queue = _collector_queue
+
+
+os.register_at_fork(after_in_child=_use_collector_queue)
+
+
 def get_logger(name: str = __name__) -> logging.Logger:
     logger = logging.getLogger(name)
 
     if not logger.handlers:
-        # Консольний логер
-        console_handler = logging.StreamHandler()
-        #  console_formatter = logging.Formatter('%(asctime)s - %(processname)s - %(levelname)s - %(message)s')
-        console_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        console_handler.setFormatter(console_formatter)
-        logger.addHandler(console_handler)
-
-        # Файловий логер
-        log_dir = BASE_DIR / os.getenv("LOG_DIR", "logs")
-        log_dir.mkdir(parents=True, exist_ok=True)
-        log_file = log_dir / "app.log"
-
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setLevel(logging.INFO)  # було WARNING
-        file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
-
-        logger.setLevel(logging.INFO)
-
-    return logger
\ No newline at end of file
+        logger.addHandler(_get_queue_handler())
+        logger.setLevel(config.LOG_LEVEL)
+        logger.propagate = False
+
+    return logger
+
+
+_access_logger: Optional[logging.Logger] = None
+
+
+def log_access(method: str, path: str, status: int, duration: float, engine: str) -> None:
+    """Record one request in the JSON access log (subject to ACCESS_LOG_SAMPLE_RATE).
+
+    Errors (status >= 400) and requests slower than ACCESS_LOG_SLOW_MS are
+    always recorded; successful ones are sampled.
+
+    Args:
+        method (str): HTTP method.
+        path (str): Request target.
+        status (int): Response status code.
+        duration (float): Time from the parsed request head to the end of the response, in seconds.
+        engine (str): Server engine that served the request ("http" or "asyncio").
+    """
+    global _access_logger
+    if not config.ACCESS_LOG_ENABLED:
+        return
+    duration_ms = duration * 1000
+    if (status < 400 and duration_ms < config.ACCESS_LOG_SLOW_MS
+            and config.ACCESS_LOG_SAMPLE_RATE < 1.0 and random.random() >= config.ACCESS_LOG_SAMPLE_RATE):
+        return
+    if _access_logger is None:
+        _access_logger = get_logger(ACCESS_LOGGER_NAME)
+    _access_logger.info("access", extra={ACCESS_LOGGER_NAME: {
+        "method": method,
+        "path": path,
+        "status": status,
+        "duration_ms": round(duration_ms, 3),
+        "engine": engine
+    }})
@@ -0,0 +1,72 @@
+import io
+import os
+import tempfile
+
+import pytest
+from PIL import Image
+
+# settings.config вимагає змінних оточення сервера й БД; для юніт-тестів підійдуть заглушки
+_TEST_ROOT = tempfile.mkdtemp(prefix="upload-server-tests-")
+for name, value in {
+    "WEB_SERVER_WORKERS": "1",
+    "WEB_SERVER_START_PORT": "8000",
+    "POSTGRES_DB": "test",
+    "POSTGRES_DB_PORT": "5432",
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "POSTGRES_HOST": "localhost",
+    "PGBOUNCER_USER": "test",
+    "PGBOUNCER_PASSWORD": "test",
+    "PGBOUNCER_HOST": "localhost",
+    "PGBOUNCER_PORT": "6432",
+    "IMAGE_DIR": os.path.join(_TEST_ROOT, "images"),
+    "LOG_DIR": os.path.join(_TEST_ROOT, "logs"),
+}.items():
+    os.environ.setdefault(name, value)
+
+# Модулі сервера імпортуємо лише після того, як змінні оточення задано
+from handlers.upload import save_uploaded_stream  # noqa: E402
+from settings.config import config  # noqa: E402
+
+BOUNDARY = "XX"
+MULTIPART_CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+@pytest.fixture
+def image_dir(tmp_path, monkeypatch):
+    """Point IMAGE_DIR at an empty per-test directory."""
+    path = tmp_path / "images"
+    path.mkdir()
+    monkeypatch.setattr(config, "IMAGE_DIR", str(path))
+    return path
+
+
+@pytest.fixture
+def make_png():
+    """Build PNG bytes; different colors give different content hashes."""
+    def make(color=(255, 0, 0), size=(30, 20)) -> bytes:
+        buffer = io.BytesIO()
+        Image.new("RGB", size, color).save(buffer, "PNG")
+        return buffer.getvalue()
+    return make
+
+
+@pytest.fixture
+def multipart():
+    """Build (Content-Type, multipart/form-data body) from (filename, content) pairs."""
+    def build(files, closed=True) -> tuple[str, bytes]:
+        body = b""
+        for filename, content in files:
+            body += (f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; '
+                     f'filename="{filename}"\r\n\r\n').encode() + content + b"\r\n"
+        return MULTIPART_CONTENT_TYPE, body + (f"--{BOUNDARY}--\r\n".encode() if closed else b"")
+    return build
+
+
+@pytest.fixture
+def save_upload(image_dir, multipart):
+    """Store one file the way POST /upload does; returns the saved file info."""
+    def save(content: bytes, filename: str = "cat.png") -> dict:
+        content_type, body = multipart([(filename, content)])
+        return save_uploaded_stream(io.BytesIO(body), content_type, len(body))
+    return save
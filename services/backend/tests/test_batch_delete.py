@@ -0,0 +1,70 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from exceptions.api_errors import InvalidDeleteRequestError
+from handlers.batch import (
+    DELETE_BODY_MAX_BYTES, check_delete_body_length, finish_batch_delete, parse_delete_request
+)
+from settings.config import config
+
+
+def body(**payload) -> bytes:
+    return json.dumps(payload).encode()
+
+
+def test_parse_filenames_keeps_order_without_duplicates():
+    assert parse_delete_request(body(filenames=["b.png", "a.png", "b.png"])) == (["b.png", "a.png"], None)
+
+
+def test_parse_older_than_defaults_to_utc():
+    filenames, older_than = parse_delete_request(body(older_than="2026-10-17T12:00:00"))
+    assert filenames is None
+    assert older_than == datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+
+    _, older_than = parse_delete_request(body(filenames=[], older_than="2026-10-17T12:00:00+02:00"))
+    assert older_than == datetime(2026, 10, 17, 10, 0, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("raw", [
+    b"",
+    b"not json",
+    b"[]",
+    body(),
+    body(filenames=None),
+    body(filenames="a.png"),
+    body(filenames=["a.png", 1]),
+    body(older_than="yesterday"),
+    body(older_than=5),
+])
+def test_parse_rejects_malformed_requests(raw):
+    with pytest.raises(InvalidDeleteRequestError):
+        parse_delete_request(raw)
+
+
+def test_parse_limits_number_of_files(monkeypatch):
+    monkeypatch.setattr(config, "DELETE_BATCH_MAX_FILES", 2)
+    assert parse_delete_request(body(filenames=["a", "b"]))[0] == ["a", "b"]
+    with pytest.raises(InvalidDeleteRequestError):
+        parse_delete_request(body(filenames=["a", "b", "c"]))
+
+
+@pytest.mark.parametrize("content_length", [None, 0, DELETE_BODY_MAX_BYTES + 1])
+def test_body_length_is_checked_before_reading(content_length):
+    with pytest.raises(InvalidDeleteRequestError):
+        check_delete_body_length(content_length)
+
+
+def test_finish_batch_delete_reports_missing_files():
+    result = finish_batch_delete(["a.png", "gone.png", "b.png"], ["b.png", "a.png"])
+    assert [(item["filename"], item["status"]) for item in result["items"]] == [
+        ("a.png", 200), ("gone.png", 404), ("b.png", 200)
+    ]
+    assert (result["deleted"], result["failed"]) == (2, 1)
+
+
+def test_finish_batch_delete_by_date_lists_deleted_files():
+    result = finish_batch_delete(None, ["a.png", "b.png"])
+    assert [item["status"] for item in result["items"]] == [200, 200]
+    assert (result["deleted"], result["failed"]) == (2, 0)
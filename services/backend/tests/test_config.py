@@ -0,0 +1,21 @@
+import logging
+
+import pytest
+from pydantic import ValidationError
+
+from settings.config import AppConfig
+
+
+@pytest.mark.parametrize("value, expected", [("debug", "DEBUG"), (" Warning ", "WARNING"), ("ERROR", "ERROR")])
+def test_log_level_is_case_insensitive(monkeypatch, value, expected):
+    # docker-compose задає LOG_LEVEL=debug
+    monkeypatch.setenv("LOG_LEVEL", value)
+    level = AppConfig().LOG_LEVEL
+    assert level == expected
+    logging.getLogger("test-config").setLevel(level)
+
+
+def test_unknown_log_level_is_rejected(monkeypatch):
+    monkeypatch.setenv("LOG_LEVEL", "verbose")
+    with pytest.raises(ValidationError):
+        AppConfig()
@@ -0,0 +1,49 @@
+import os
+
+from handlers.batch import discard_saved
+from handlers.layout import image_path
+from handlers.upload import blob_path, store_blob
+
+
+def test_store_blob_links_duplicates(image_dir):
+    first, second = image_dir / ".upload-1", image_dir / ".upload-2"
+    first.write_bytes(b"same")
+    second.write_bytes(b"same")
+
+    assert store_blob(str(first), "abc", str(image_dir / "a.png")) is False
+    assert store_blob(str(second), "abc", str(image_dir / "b.png")) is True
+
+    # Обидва імені — жорсткі посилання на один blob, тимчасові файли прибрано
+    assert os.stat(blob_path("abc")).st_nlink == 3
+    assert os.path.samefile(image_dir / "a.png", image_dir / "b.png")
+    assert not first.exists() and not second.exists()
+
+
+def test_duplicate_uploads_share_content(save_upload, make_png):
+    first = save_upload(make_png())
+    second = save_upload(make_png(), "copy.png")
+    other = save_upload(make_png(color=(0, 0, 255)))
+
+    assert first["content_hash"] == second["content_hash"] != other["content_hash"]
+    assert os.path.samefile(image_path(first["filename"]), image_path(second["filename"]))
+    assert os.stat(blob_path(first["content_hash"])).st_nlink == 3
+    assert os.stat(blob_path(other["content_hash"])).st_nlink == 2
+
+
+def test_discard_saved_keeps_shared_blob(save_upload, make_png):
+    kept = save_upload(make_png())
+    failed = save_upload(make_png())
+
+    # Запис у БД не вдався: файл прибирається, а blob ще потрібен іншому завантаженню
+    discard_saved([failed, {"original_name": "bad.png", "error": "Unsupported", "status": 400}])
+    assert not os.path.exists(image_path(failed["filename"]))
+    assert os.path.exists(image_path(kept["filename"]))
+    assert os.stat(blob_path(kept["content_hash"])).st_nlink == 2
+
+
+def test_discard_saved_removes_unshared_blob(save_upload, make_png):
+    failed = save_upload(make_png())
+
+    discard_saved([failed])
+    assert not os.path.exists(image_path(failed["filename"]))
+    assert not os.path.exists(blob_path(failed["content_hash"]))
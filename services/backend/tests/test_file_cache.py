@@ -0,0 +1,66 @@
+import os
+
+from cache.file_cache import FileCache
+
+
+def serve(cache: FileCache, path: str):
+    """What the engines do: look up by stat, on a miss load from the one opened file."""
+    entry = cache.get(path, os.stat(path))
+    if entry is None:
+        with open(path, 'rb') as f:
+            entry = cache.load(path, f, os.fstat(f.fileno()), "image/png")
+    return entry
+
+
+def test_hit_after_miss(tmp_path):
+    path = tmp_path / "small.png"
+    path.write_bytes(b"x" * 10)
+    cache = FileCache(max_bytes=100, max_entry_bytes=50)
+
+    assert serve(cache, str(path)).body == b"x" * 10
+    assert serve(cache, str(path)).body == b"x" * 10
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["uncacheable"]) == (1, 1, 0)
+
+
+def test_large_files_are_not_counted_as_misses(tmp_path):
+    path = tmp_path / "large.png"
+    path.write_bytes(b"x" * 60)
+    cache = FileCache(max_bytes=100, max_entry_bytes=50)
+
+    assert serve(cache, str(path)) is None
+    assert serve(cache, str(path)) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["uncacheable"], stats["entries"]) == (0, 0, 2, 0)
+
+
+def test_changed_file_is_invalidated(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_bytes(b"old")
+    cache = FileCache(max_bytes=100, max_entry_bytes=50)
+    serve(cache, str(path))
+
+    path.write_bytes(b"newer")
+    assert serve(cache, str(path)).body == b"newer"
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_lru_eviction_keeps_budget(tmp_path):
+    cache = FileCache(max_bytes=25, max_entry_bytes=25)
+    for name in ("a", "b", "c"):
+        (tmp_path / name).write_bytes(b"x" * 10)
+        serve(cache, str(tmp_path / name))
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 20, 1)
+    assert cache.get(str(tmp_path / "a"), os.stat(tmp_path / "a")) is None
+
+
+def test_disabled_cache_counts_nothing(tmp_path):
+    path = tmp_path / "small.png"
+    path.write_bytes(b"x")
+    cache = FileCache(max_bytes=0, max_entry_bytes=50)
+
+    assert serve(cache, str(path)) is None
+    stats = cache.stats()
+    assert (stats["misses"], stats["uncacheable"]) == (0, 0)
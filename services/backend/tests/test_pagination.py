@@ -0,0 +1,46 @@
+import base64
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from dto.pagination import CursorDTO, PaginationDTO
+from interfaces.pagination import InvalidCursorError
+
+
+def token(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def test_cursor_round_trip():
+    cursor = CursorDTO(upload_time="2026-10-17T17:50:47.280060+00:00", id=42)
+    encoded = cursor.encode()
+    assert '=' not in encoded
+    assert set(encoded) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+    assert CursorDTO.decode(encoded) == cursor
+
+
+def test_cursor_to_sql_params():
+    cursor = CursorDTO(upload_time="2026-10-17T17:50:47+00:00", id=7)
+    assert cursor.to_sql_params() == (datetime(2026, 10, 17, 17, 50, 47, tzinfo=timezone.utc), 7)
+
+
+@pytest.mark.parametrize("value", [
+    "",
+    "!!!",
+    base64.urlsafe_b64encode(b"not json").decode(),
+    token([1]),
+    token(5),
+    token(["yesterday", 1]),
+    token(["2026-10-17T17:50:47+00:00", "x"]),
+    token(["2026-10-17T17:50:47+00:00", 1, 2]),
+])
+def test_cursor_decode_rejects_malformed_tokens(value):
+    with pytest.raises(InvalidCursorError):
+        CursorDTO.decode(value)
+
+
+def test_pagination_limit_offset():
+    assert PaginationDTO(page=3, per_page=20).to_sql_params() == (20, 40)
+    assert not PaginationDTO(page=1, per_page=20).is_keyset
+    assert PaginationDTO(page=1, per_page=20, after=CursorDTO("2026-10-17T00:00:00", 1)).is_keyset
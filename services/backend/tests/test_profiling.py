@@ -0,0 +1,37 @@
+import pytest
+
+from metrics.profiling import control_sampling_profiler, is_authorized
+from settings.config import config
+
+
+@pytest.fixture
+def profiling(monkeypatch):
+    monkeypatch.setattr(config, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(config, "PROFILING_TOKEN", None)
+    return monkeypatch
+
+
+def test_disabled_profiler_is_hidden(monkeypatch):
+    monkeypatch.setattr(config, "PROFILING_ENABLED", False)
+    assert control_sampling_profiler('/api/profiler/start', 'token')[0] == 404
+    assert not is_authorized('token')
+
+
+@pytest.mark.parametrize("token", [None, ""])
+def test_empty_token_counts_as_unset(profiling, token):
+    profiling.setattr(config, "PROFILING_TOKEN", token)
+    assert is_authorized('1')
+    assert not is_authorized('')
+    # Ендпоінти без налаштованого токена не відкриваються нікому
+    assert control_sampling_profiler('/api/profiler/start', 'anything')[0] == 403
+
+
+def test_token_must_match(profiling):
+    profiling.setattr(config, "PROFILING_TOKEN", "secret")
+    assert not is_authorized('1')
+    assert is_authorized('secret')
+    assert control_sampling_profiler('/api/profiler/stop', 'wrong')[0] == 403
+    assert control_sampling_profiler('/api/profiler/stop', None)[0] == 403
+    status, payload = control_sampling_profiler('/api/profiler/stop', 'secret')
+    assert status == 200
+    assert payload["running"] is False
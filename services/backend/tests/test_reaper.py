@@ -0,0 +1,84 @@
+import os
+import time
+
+import pytest
+
+from benchmarks.fakes import InMemoryImageRepository
+from handlers.batch import batch_image_dtos
+from handlers.layout import image_path
+from handlers.reaper import reap, reconcile
+from handlers.upload import blob_path
+
+
+@pytest.fixture
+def repository():
+    return InMemoryImageRepository()
+
+
+@pytest.fixture
+def upload(repository, save_upload):
+    """Save a file and record its row, as a successful upload does."""
+    def upload_and_record(content: bytes) -> dict:
+        saved = save_upload(content)
+        repository.create_many(batch_image_dtos([saved]))
+        return saved
+    return upload_and_record
+
+
+def make_old(path, seconds=3600):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_reap_removes_files_and_orphaned_blobs(repository, upload, make_png):
+    first, second = upload(make_png()), upload(make_png())
+    other = upload(make_png(color=(0, 0, 255)))
+    repository.delete_many(filenames=[first["filename"], other["filename"]])
+
+    assert reap(repository, limit=1) == 2
+    assert not os.path.exists(image_path(first["filename"]))
+    assert not os.path.exists(image_path(other["filename"]))
+    assert not os.path.exists(blob_path(other["content_hash"]))
+    # Вміст first ще належить second
+    assert os.path.exists(blob_path(first["content_hash"]))
+
+    repository.delete_by_filename(second["filename"])
+    assert reap(repository, limit=10) == 1
+    assert not os.path.exists(image_path(second["filename"]))
+    assert not os.path.exists(blob_path(first["content_hash"]))
+    assert reap(repository, limit=10) == 0
+
+
+def test_reap_tolerates_missing_files(repository, upload, make_png):
+    saved = upload(make_png())
+    os.remove(image_path(saved["filename"]))
+    repository.delete_by_filename(saved["filename"])
+
+    assert reap(repository, limit=10) == 1
+    assert not os.path.exists(blob_path(saved["content_hash"]))
+
+
+def test_reconcile(repository, upload, save_upload, image_dir, make_png):
+    kept = upload(make_png())
+    lost = upload(make_png(color=(0, 255, 0)))
+    os.remove(image_path(lost["filename"]))
+    # Файл і blob, для яких рядок так і не з'явився (збій між диском і БД)
+    orphan = save_upload(make_png(color=(0, 0, 255)))
+    make_old(image_path(orphan["filename"]))
+    make_old(blob_path(orphan["content_hash"]))
+    leftover = image_dir / ".upload-leftover"
+    leftover.write_bytes(b"partial")
+    make_old(leftover)
+    recent = save_upload(make_png(color=(9, 9, 9)))
+
+    result = reconcile(repository, grace_seconds=60)
+
+    assert result == {"orphan_files": 2, "missing_rows": 1, "orphan_blobs": 1}
+    assert not os.path.exists(image_path(orphan["filename"]))
+    assert not os.path.exists(blob_path(orphan["content_hash"]))
+    assert not leftover.exists()
+    assert repository.get_by_filename(lost["filename"]) is None
+    # Свіжі файли ще можуть чекати на свій рядок — їх не чіпаємо
+    assert os.path.exists(image_path(recent["filename"]))
+    assert os.path.exists(image_path(kept["filename"]))
+    assert os.path.exists(blob_path(kept["content_hash"]))
@@ -0,0 +1,112 @@
+import os
+from email.utils import formatdate
+
+import pytest
+
+from exceptions.api_errors import RangeNotSatisfiableError
+from handlers.static import file_etag, if_range_matches, parse_range, prepare_file_response
+
+
+@pytest.fixture
+def file_stat(tmp_path):
+    path = tmp_path / "image.png"
+    path.write_bytes(bytes(range(100)))
+    return os.stat(path)
+
+
+def request_headers(**headers):
+    lookup = {name.replace('_', '-').lower(): value for name, value in headers.items()}
+    return lambda name: lookup.get(name.lower())
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=10-", (10, 99)),
+    ("bytes=-20", (80, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes=90-500", (90, 99)),
+    (" bytes=5-5 ", (5, 5)),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", [None, "", "bytes=-", "bytes=0-1,5-6", "items=0-1", "bytes=a-b"])
+def test_parse_range_ignores_unusable_ranges(header):
+    assert parse_range(header, 100) is None
+
+
+@pytest.mark.parametrize("header, size", [("bytes=100-", 100), ("bytes=10-5", 100), ("bytes=-0", 100), ("bytes=-5", 0)])
+def test_parse_range_rejects_unsatisfiable_ranges(header, size):
+    with pytest.raises(RangeNotSatisfiableError):
+        parse_range(header, size)
+
+
+def test_if_range_uses_strong_comparison():
+    last_modified = "Sat, 17 Oct 2026 10:00:00 GMT"
+    assert if_range_matches('"abc"', '"abc"', last_modified)
+    assert not if_range_matches('W/"abc"', 'W/"abc"', last_modified)
+    assert not if_range_matches('"abc"', 'W/"abc"', last_modified)
+    assert if_range_matches(last_modified, 'W/"abc"', last_modified)
+    assert not if_range_matches("Fri, 16 Oct 2026 10:00:00 GMT", 'W/"abc"', last_modified)
+
+
+def test_full_response(file_stat):
+    response = prepare_file_response(file_stat, "image/png", request_headers())
+    assert response.status == 200
+    assert (response.offset, response.length) == (0, 100)
+    assert response.headers["Content-Length"] == "100"
+    assert response.headers["ETag"] == file_etag(file_stat)
+    assert response.headers["Accept-Ranges"] == "bytes"
+
+
+def test_not_modified_by_etag(file_stat):
+    etag = file_etag(file_stat)
+    response = prepare_file_response(file_stat, "image/png", request_headers(If_None_Match=f'"other", {etag}'))
+    assert response.status == 304
+    assert response.length == 0
+    assert set(response.headers) == {"ETag", "Last-Modified"}
+
+
+def test_not_modified_by_date(file_stat):
+    since = formatdate(file_stat.st_mtime + 1, usegmt=True)
+    assert prepare_file_response(file_stat, "image/png", request_headers(If_Modified_Since=since)).status == 304
+
+    earlier = formatdate(file_stat.st_mtime - 10, usegmt=True)
+    assert prepare_file_response(file_stat, "image/png", request_headers(If_Modified_Since=earlier)).status == 200
+
+
+def test_if_none_match_takes_precedence_over_date(file_stat):
+    since = formatdate(file_stat.st_mtime + 1, usegmt=True)
+    headers = request_headers(If_None_Match='"other"', If_Modified_Since=since)
+    assert prepare_file_response(file_stat, "image/png", headers).status == 200
+
+
+def test_partial_response(file_stat):
+    response = prepare_file_response(file_stat, "image/png", request_headers(Range="bytes=10-19"))
+    assert response.status == 206
+    assert (response.offset, response.length) == (10, 10)
+    assert response.headers["Content-Range"] == "bytes 10-19/100"
+    assert response.headers["Content-Length"] == "10"
+
+
+def test_unsatisfiable_range(file_stat):
+    response = prepare_file_response(file_stat, "image/png", request_headers(Range="bytes=200-"))
+    assert response.status == 416
+    assert response.headers == {"Content-Range": "bytes */100", "Content-Length": "0"}
+
+
+def test_if_range_with_last_modified_keeps_range(file_stat):
+    last_modified = formatdate(file_stat.st_mtime, usegmt=True)
+    headers = request_headers(Range="bytes=0-9", If_Range=last_modified)
+    assert prepare_file_response(file_stat, "image/png", headers).status == 206
+
+
+@pytest.mark.parametrize("if_range", ["etag", '"stale"', "Thu, 01 Jan 2026 00:00:00 GMT"])
+def test_if_range_mismatch_sends_full_file(file_stat, if_range):
+    # ETag файлу слабкий, тож If-Range з ним ніколи не збігається
+    if_range = file_etag(file_stat) if if_range == "etag" else if_range
+    response = prepare_file_response(file_stat, "image/png", request_headers(Range="bytes=0-9", If_Range=if_range))
+    assert response.status == 200
+    assert response.length == 100
+    assert "Content-Range" not in response.headers
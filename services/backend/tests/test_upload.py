@@ -0,0 +1,90 @@
+import hashlib
+import io
+
+import pytest
+
+from exceptions.api_errors import (
+    InvalidContentLengthError, LengthRequiredError, MalformedUploadError, MaxSizeExceedError,
+    MultipleFilesUploadError
+)
+from handlers.layout import image_path
+from handlers.upload import StreamingUpload, parse_content_length, save_uploaded_stream
+from settings.config import config
+
+
+def temp_files(image_dir):
+    return list(image_dir.glob(".upload-*"))
+
+
+def feed(upload: StreamingUpload, body: bytes, chunk_size: int = 16) -> None:
+    for start in range(0, len(body), chunk_size):
+        upload.write(body[start:start + chunk_size])
+
+
+@pytest.mark.parametrize("value, expected", [(None, None), ("0", 0), ("1024", 1024), (" 42 ", 42)])
+def test_parse_content_length(value, expected):
+    assert parse_content_length(value) == expected
+
+
+@pytest.mark.parametrize("value", ["", "abc", "-5", "+10", "1e3", "1_000", "12.5", "٣"])
+def test_parse_content_length_rejects_malformed_values(value):
+    with pytest.raises(InvalidContentLengthError):
+        parse_content_length(value)
+
+
+def test_streaming_upload_saves_file(image_dir, multipart, make_png):
+    content = make_png()
+    content_type, body = multipart([("My Cat.PNG", content)])
+    with StreamingUpload(content_type) as upload:
+        # Дрібні шматки: межа частин і заголовок PNG розрізані між викликами write()
+        feed(upload, body)
+        saved = upload.finalize()
+
+    assert saved["filename"].startswith("my_cat_") and saved["filename"].endswith(".png")
+    assert (saved["size"], saved["width"], saved["height"]) == (len(content), 30, 20)
+    assert saved["mime_type"] == "image/png"
+    assert saved["content_hash"] == hashlib.sha256(content).hexdigest()
+    with open(image_path(saved["filename"]), "rb") as f:
+        assert f.read() == content
+    assert not temp_files(image_dir)
+
+
+def test_streaming_upload_enforces_size_limit(image_dir, monkeypatch, multipart, make_png):
+    content = make_png()
+    monkeypatch.setattr(config, "MAX_FILE_SIZE", len(content) - 1)
+    content_type, body = multipart([("cat.png", content)])
+    with pytest.raises(MaxSizeExceedError):
+        with StreamingUpload(content_type) as upload:
+            feed(upload, body)
+    assert not temp_files(image_dir)
+
+
+def test_streaming_upload_rejects_truncated_body(image_dir, multipart, make_png):
+    content_type, body = multipart([("cat.png", make_png())], closed=False)
+    with pytest.raises(MalformedUploadError):
+        with StreamingUpload(content_type) as upload:
+            feed(upload, body)
+            upload.finish()
+    assert not temp_files(image_dir)
+
+
+def test_streaming_upload_rejects_second_file(image_dir, multipart, make_png):
+    content_type, body = multipart([("a.png", make_png()), ("b.png", make_png())])
+    with pytest.raises(MultipleFilesUploadError):
+        with StreamingUpload(content_type) as upload:
+            feed(upload, body)
+    assert not temp_files(image_dir)
+
+
+def test_save_uploaded_stream_rejects_short_stream(image_dir, multipart, make_png):
+    content_type, body = multipart([("cat.png", make_png())])
+    with pytest.raises(MalformedUploadError):
+        save_uploaded_stream(io.BytesIO(body[:-10]), content_type, len(body))
+    assert not temp_files(image_dir)
+
+
+def test_save_uploaded_stream_checks_content_length(image_dir):
+    with pytest.raises(LengthRequiredError):
+        save_uploaded_stream(io.BytesIO(b""), "multipart/form-data; boundary=XX", None)
+    with pytest.raises(MaxSizeExceedError):
+        save_uploaded_stream(io.BytesIO(b""), "multipart/form-data; boundary=XX", 10 ** 12)
@@ -66,7 +66,7 @@ document.addEventListener('DOMContentLoaded', () => {
           const ext = fileData.filename.split('.').pop().toLowerCase();
           const imageExts = ['jpg', 'jpeg', 'png', 'gif', 'webp'];
           const previewHtml = imageExts.includes(ext)
-            ? `<img src="/media/${fileData.filename}" alt="${fileData.display_name}" style="max-width:40px; max-height:40px;">`
+            ? `<img src="/media/${fileData.filename}?w=80&h=80&fmt=webp" alt="${fileData.display_name}" loading="lazy" style="max-width:40px; max-height:40px;">`
             : `<img src="/frontend/img/icon/Group.png" alt="file icon">`;
 
           fileItem.innerHTML = `
@@ -43,6 +43,7 @@ server_reset_query = DISCARD ALL
 max_client_conn = ${MAX_CLIENT_CONN:-200}
 default_pool_size = ${DEFAULT_POOL_SIZE:-20}
 ignore_startup_parameters = extra_float_digits
+max_prepared_statements = ${MAX_PREPARED_STATEMENTS:-200}
 EOL
 
 echo "PgBouncer configuration complete."